@@ -1,6 +1,8 @@
-from .annotation.composition import compose_annotations
-from .annotation.functions import check, iterify
-from .decorator import args2attrs, ordered_by
+from .annotation.composition import compose_annotations, set_validate_every, trusted
+from .annotation.functions import as_memoryview, as_readonly_buffer, check, each, iter_chunks, iterify
+from .annotation.predicates import all_of, any_of, in_range, isinstance_of, satisfies
+from .decorator import args2attrs, bulk_constructor, ordered_by, validated_attrs
+from .deferred import set_defer, validate_all
 #from .mixins import repr_from_init
 
 __version__ = '0.1.3'
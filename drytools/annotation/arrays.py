@@ -0,0 +1,150 @@
+'''
+=====================================================
+annotation.arrays - Coerce parameters to NumPy arrays
+=====================================================
+
+When the :func:`drytools.annotation.composition.compose_annotations` decorator
+is used, :func:`as_array` annotations coerce parameters to
+:class:`numpy.ndarray` without copying unless a copy is unavoidable.
+
+This module requires `NumPy <https://numpy.org>`_ (eg:
+``pip install drytools[numpy]``).
+
+Example:
+
+.. code:: python
+
+    import numpy as np
+    from drytools import compose_annotations
+    from drytools.annotation.arrays import as_array
+
+    @compose_annotations
+    def total(values: as_array(dtype=np.float64, ndim=1, order='C', on_copy='warn')):
+        return values.sum()
+
+    values = np.arange(10.0)
+    total(values)                  # no copy: values is used as-is
+    total(values[::2])             # warns: a contiguous copy is made
+    total('/data/values.npy')      # memory-mapped, not read into memory
+
+'''
+import os
+import warnings
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class ArrayCopyWarning(UserWarning):
+    '''Warning issued by :func:`as_array` annotations (with ``on_copy='warn'``) when they copy data'''
+
+
+def as_array(dtype=None, ndim=None, shape=None, order=None, subok=True, mmap_mode='r', on_copy=None, raises=ValueError):
+    '''
+    Factory for array coercion functions
+
+    Args:
+        dtype: Required :class:`numpy.dtype` (or anything accepted by it).
+               Input with another dtype is converted.
+        ndim (int): Required number of dimensions
+        shape (tuple): Required shape.  Elements which are None match any length.
+        order (str): 'C' or 'F' to require C or Fortran contiguity (None for no requirement)
+        subok (bool): Allow subclasses of :class:`numpy.ndarray` (eg:
+                      :class:`numpy.memmap`) to pass through unchanged.  If
+                      False, a base class view is returned instead.
+        mmap_mode (str): Mode for memory-mapping inputs that are file
+                         paths (see :func:`numpy.load`).  Paths ending in
+                         ``.npy`` are loaded with :func:`numpy.load`, other
+                         files are mapped as raw data with
+                         :class:`numpy.memmap` (using *dtype*, default uint8,
+                         and *shape* if it is fully specified).
+        on_copy: What to do when the coercion copies data: None (nothing),
+                 'warn' (issue an :class:`ArrayCopyWarning`), 'raise' (raise
+                 *raises*) or a callable, which is called with the original
+                 value and the new array.
+        raises (*callable*): Constructor for the :class:`Exception` to raise
+                             if the input has the wrong number of dimensions
+                             or shape (or is copied, with ``on_copy='raise'``)
+
+    Returns:
+        func: Function returning its input (or a view of it) if it already
+        conforms, otherwise a conforming copy.
+
+    Conversions are applied in order of increasing cost: a view is used
+    whenever possible (eg: for objects supporting the buffer protocol) and
+    data is copied only for dtype conversions, contiguity, or inputs
+    that are not arrays (eg: lists).
+    '''
+    if np is None:
+        raise ImportError('as_array requires numpy')
+    if order not in (None, 'C', 'F'):
+        raise ValueError('order must be None, "C" or "F"')
+    if on_copy not in (None, 'warn', 'raise') and not callable(on_copy):
+        raise ValueError('on_copy must be None, "warn", "raise" or callable')
+    if dtype is not None:
+        dtype = np.dtype(dtype)
+    if shape is not None:
+        shape = tuple(shape)
+        if ndim is None:
+            ndim = len(shape)
+        elif ndim != len(shape):
+            raise ValueError('ndim inconsistent with shape')
+    to_array = np.asanyarray if subok else np.asarray
+    def load(path):
+        path = os.fspath(path)
+        if path.endswith('.npy'):
+            return np.load(path, mmap_mode=mmap_mode)
+        fixed_shape = shape if (shape is not None) and (None not in shape) else None
+        return np.memmap(path, dtype=np.uint8 if dtype is None else dtype, mode=mmap_mode, shape=fixed_shape, order=order or 'C')
+    def check_shape(arr):
+        if (ndim is not None) and (arr.ndim != ndim):
+            raise raises('{}-dimensional array; expected {} dimensions'.format(arr.ndim, ndim))
+        if (shape is not None) and any((expected is not None) and (actual != expected) for actual, expected in zip(arr.shape, shape)):
+            raise raises('array of shape {}; expected {}'.format(arr.shape, shape))
+    def report_copy(original, arr):
+        if on_copy is None:
+            return
+        msg = 'copied {} to {} array of shape {}'.format(type(original).__name__, arr.dtype, arr.shape)
+        if on_copy == 'warn':
+            warnings.warn(msg, ArrayCopyWarning, stacklevel=4)
+        elif on_copy == 'raise':
+            raise raises(msg)
+        else:
+            on_copy(original, arr)
+    def coerce(x):
+        source = x
+        if isinstance(x, (str, os.PathLike)):
+            source = load(x)
+        elif isinstance(x, (bytes, bytearray)):
+            source = memoryview(x)
+        arr = to_array(source)
+        check_shape(arr)
+        if (dtype is not None) and (arr.dtype != dtype):
+            arr = arr.astype(dtype, order=order or 'K')  # one copy for both dtype and contiguity
+        if (order == 'C') and not arr.flags.c_contiguous:
+            arr = np.ascontiguousarray(arr)
+        elif (order == 'F') and not arr.flags.f_contiguous:
+            arr = np.asfortranarray(arr)
+        if (arr is not source) and not _is_view_of(arr, source):
+            report_copy(x, arr)
+        return arr
+    return coerce
+
+
+def _is_view_of(arr, x):
+    '''True if *arr* shares data with *x* (rather than holding a copy)'''
+    if isinstance(x, np.ndarray):
+        return np.may_share_memory(arr, x)
+    base = arr.base
+    while base is not None:
+        if base is x or (isinstance(base, memoryview) and base.obj is getattr(x, 'obj', x)):
+            return True
+        base = getattr(base, 'base', None)
+    return False
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -5,15 +5,24 @@ annotation.composition - Decorator to use annotations for function composition
 ==============================================================================
 
 '''
-from collections import ChainMap
-from collections.abc import Sequence
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
 from functools import reduce, wraps
 import inspect
+from itertools import count, dropwhile
+import threading
+import weakref
 
+from drytools.annotation.predicates import fused, isinstance_of
 from drytools.decorator_factory import decorator_factory
+from drytools.deferred import deferral, resolved
 
 @decorator_factory
-def compose_annotations(combine_var_positional=False, combine_var_keyword=False):
+def compose_annotations(combine_var_positional=False, combine_var_keyword=False, validate_every=None, parallel=False,
+                        fresh_defaults=(), adaptive=None, defer=None):
     '''
     Decorator to use compose a function with its callable annotations.
 
@@ -24,13 +33,34 @@ def compose_annotations(combine_var_positional=False, combine_var_keyword=False)
         combine_var_keyword (:class:`bool`): Transform VAR_KEYWORD arguments
           (see :class:`inspect.Parameter`) collectively instead of
           element-wise (the default)
+        validate_every (int): Apply validations (see below) on only one in
+          every *validate_every* calls (a positive :class:`int`).  If None,
+          the global setting (see :func:`set_validate_every`) is used.
+        parallel (:class:`bool` or :class:`int`): Apply element-wise
+          transforms of VAR_POSITIONAL and VAR_KEYWORD arguments in a
+          shared thread pool (useful for I/O-bound transforms) when there
+          are at least *parallel* elements (or 8 if *parallel* is True).
+          Results keep their order.  If any element fails, work on later
+          elements that hasn't started is cancelled, earlier elements are
+          completed, and the exception of the earliest (by position)
+          failed element is raised.
+        fresh_defaults (:class:`str`, iterable or :class:`bool`): Names of
+          parameters (or True for all) whose default values are transformed
+          on every call in which they're omitted (see below)
+        adaptive (int): Specialize the function after this many calls (see
+          below)
+        defer (bool): Analyse the function's signature when it's first
+          called instead of now (if None, the global setting, see
+          :mod:`drytools.deferred`)
 
     Returns:
         func: Original function composed with its callable annotations
 
     A :class:`collections.abc.Sequence` containing only callable
     elements is treated as a pipeline (ie: the raw value is passed to the first
-    element, its return value to the second etc.)
+    element, its return value to the second etc.).  Adjacent
+    :class:`drytools.annotation.predicates.predicate` elements of a pipeline
+    are combined so that they run as one compiled validator.
 
     Example:
         >>> @compose_annotations
@@ -43,10 +73,88 @@ def compose_annotations(combine_var_positional=False, combine_var_keyword=False)
     parameters and return value are "passed through" their respective
     annotations (ie: their values are replaced with those returned from
     their annotations).  This can be useful for coercion or validation.
+
+    Default values (including the empty tuple and dict of omitted variable
+    arguments) are transformed once, when the function is decorated, and
+    the results are reused by every call that omits them if they're
+    immutable (None, numbers, :class:`str`, :class:`bytes`, and tuples and
+    frozensets of these).  Other results (eg: lists and sets) are
+    transformed on each call that omits them, as are the defaults of
+    parameters named in *fresh_defaults* (for impure transforms).  (If
+    transforming a default raises an exception, it's transformed, and the
+    exception raised, on each call that omits it.)
+
+        >>> @compose_annotations
+        ... def remember(x, seen: set=(), tags: (sorted, tuple)=('b', 'a')):
+        ...     seen.add(x)
+        ...     return seen, tags
+        >>> remember(1), remember(2)
+        (({1}, ('a', 'b')), ({2}, ('a', 'b')))
+        >>> remember(3)[1] is remember(4)[1]
+        True
+
+    Adaptive specialization records the types of the arguments passed in
+    the first *adaptive* calls.  Then, for each parameter that always
+    received the same type, the leading elements of its annotation implied
+    by that type are skipped while it keeps doing so (up to the first
+    element that isn't, since it may change the type): coercion to the argument's
+    own (immutable built-in) type, eg: ``int`` for an :class:`int`, and
+    type checks it passes, ie: ``check(isinstance, cls)`` and
+    :class:`drytools.annotation.predicates.isinstance_of`, and
+    :func:`drytools.annotation.functions.each` functions for the containers
+    they return.  Each call first
+    checks the argument types (element types, for variable arguments
+    transformed element-wise), and calls with other types use the full
+    annotations.  The wrapped function's *adaptive_stats* attribute (a
+    read-only mapping) counts 'hits' and 'misses' of the type check.
+
+        >>> from drytools.annotation.functions import check
+        >>> @compose_annotations(adaptive=2)
+        ... def double(x: (int, check(isinstance, int))):
+        ...     return 2 * x
+        >>> [double(v) for v in [1, 2, 3, 4, '5']]
+        [2, 4, 6, 8, 10]
+        >>> sorted(double.adaptive_stats.items())
+        [('hits', 2), ('misses', 1)]
+
+    The annotations applied are removed from the wrapped function's
+    signature and recorded in its *composed_annotations* attribute (see
+    :func:`param_annotations`).  Its *composed_transforms* attribute holds
+    the function applied to each argument (eg: element-wise for variable
+    arguments) and the return value, and its *fresh_defaults* attribute the
+    names of parameters (from *fresh_defaults*) whose defaults are
+    transformed on each call.
+
+    Validations are annotations (or pipeline elements) which only check
+    their input, ie: those returned by
+    :func:`drytools.annotation.functions.check` and
+    :class:`drytools.annotation.predicates.predicate` instances.  For
+    trusted, high-volume call sites, they can be applied to a sample of calls
+    (see *validate_every*) or skipped inside a :func:`trusted` block.
+    Coercions are always applied.  The wrapped function's *validation_stats*
+    attribute (a read-only mapping) counts calls that were 'validated' and
+    'skipped'.  Each thread samples and counts its own calls, so wrapped
+    functions share no mutable state between threads.
+
+        >>> @compose_annotations(validate_every=2)
+        ... def positive(x: (int, check(lambda x: x > 0))):
+        ...     return x
+        >>> [positive(v) for v in ['1', '-2', '-3']]
+        Traceback (most recent call last):
+            ...
+        ValueError: -3
+        >>> with trusted():
+        ...     positive('-4')
+        -4
+        >>> sorted(positive.validation_stats.items())
+        [('skipped', 2), ('validated', 2)]
     '''
-    def decorator(fun):
+    if validate_every is not None:
+        _check_validate_every(validate_every)
+    parallel_threshold = _default_parallel_threshold if parallel is True else int(parallel)
+    def compose(fun):
         passthrough = lambda x:x
-        def get_tx(param_or_sig):
+        def get_tx(param_or_sig, validate=True):
             if isinstance(param_or_sig, inspect.Parameter):
                 kind = param_or_sig.kind
                 annotation = param_or_sig.annotation
@@ -54,54 +162,451 @@ def compose_annotations(combine_var_positional=False, combine_var_keyword=False)
                 assert isinstance(param_or_sig, inspect.Signature)
                 kind = None
                 annotation = param_or_sig.return_annotation
-            if annotation is inspect._empty:
-                return passthrough
-            elif callable(annotation):
-                val_tx = annotation
-            elif isinstance(annotation, Sequence) and (len(annotation) > 0) and all(map(callable, annotation)):
-                val_tx = lambda raw: reduce(lambda v, f: f(v), annotation, raw)
-            else:
+            val_tx = annotation_transform(annotation, validate=validate)
+            if val_tx is None:
                 return passthrough
             if (kind is inspect._VAR_POSITIONAL) and (not combine_var_positional):
+                if parallel_threshold:
+                    return lambda args: tuple(_parallel_map(val_tx, args, parallel_threshold))
                 return lambda args: tuple(map(val_tx, args))
             elif (kind is inspect._VAR_KEYWORD) and (not combine_var_keyword):
+                if parallel_threshold:
+                    return lambda kwargs: dict(zip(kwargs, _parallel_map(val_tx, kwargs.values(), parallel_threshold)))
                 return lambda kwargs: {k: val_tx(v) for k, v in kwargs.items()}
             else:
                 return val_tx
+        def get_txs(validate):
+            txs = {k: get_tx(v, validate=validate) for k, v in sig.parameters.items()}
+            txs['return'] = get_tx(sig, validate=validate)
+            return txs
         sig = inspect.signature(fun)
-        txs = {k: get_tx(v) for k, v in sig.parameters.items()}
-        txs['return'] = get_tx(sig)
+        txs = get_txs(validate=True)
         keys_with_tx = {k for k, f in txs.items() if f is not passthrough}
+        fresh = set(sig.parameters) if fresh_defaults is True else \
+                {fresh_defaults} if isinstance(fresh_defaults, str) else set(fresh_defaults or ())
+        if fresh - set(sig.parameters):
+            raise ValueError('Unknown fresh_defaults: {}'.format(sorted(fresh - set(sig.parameters))))
         if keys_with_tx:
-            params_with_tx = keys_with_tx - {'return'}
-            @wraps(fun)
-            def wrapped(*args, **kwargs):
-                bound = sig.bind(*args, **kwargs)
-                defaults_to_tx = params_with_tx - set(bound.arguments)
-                if defaults_to_tx:
-                    bound = sig.bind(*args, **dict(ChainMap(kwargs, {k: sig.parameters[k].default for k in defaults_to_tx})))
+            params = list(sig.parameters.values())
+            def default(param):
+                if param.kind is inspect._VAR_POSITIONAL:
+                    return ()
+                elif param.kind is inspect._VAR_KEYWORD:
+                    return {}
+                return param.default
+            tx_defaults = {}  # transformed once (validations included)
+            fresh_tx_defaults = set()  # transformed on each call that omits them
+            for param in params:
+                if (param.name not in keys_with_tx) or (default(param) is inspect._empty):
+                    continue
+                if param.name in fresh:
+                    fresh_tx_defaults.add(param.name)
+                    continue
+                try:
+                    tx_default = txs[param.name](default(param))
+                except Exception:
+                    fresh_tx_defaults.add(param.name)
+                    continue
+                if _is_immutable(tx_default):
+                    tx_defaults[param.name] = tx_default
+                else:  # the function could modify a shared result
+                    fresh_tx_defaults.add(param.name)
+            def call(txs, args, kwargs):
+                arguments = sig.bind(*args, **kwargs).arguments
+                if adaptive:
+                    txs = specializer.specialized(txs, arguments)
                 tx_args = []
                 tx_kwargs = {}
-                for k, v in bound.arguments.items():
-                    tx_v = txs[k](v)
-                    param = sig.parameters[k]
+                positional = True  # False once a positional parameter is omitted (later ones are passed by keyword)
+                for param in params:
+                    k = param.name
+                    if k in arguments:
+                        tx_v = txs[k](arguments[k])
+                    elif k in tx_defaults:
+                        tx_v = tx_defaults[k]
+                    elif k in fresh_tx_defaults:
+                        tx_v = txs[k](default(param))
+                    else:
+                        positional = positional and param.kind is inspect._VAR_POSITIONAL
+                        continue
                     if param.kind is inspect._VAR_POSITIONAL:
                         tx_args.extend(tx_v)
                     elif param.kind is inspect._VAR_KEYWORD:
                         tx_kwargs.update(tx_v)
-                    elif param.default is inspect._empty:
-                        tx_args.append(tx_v)
-                    else:
-                        assert param.kind in (inspect._KEYWORD_ONLY, inspect._POSITIONAL_OR_KEYWORD)
+                    elif param.kind is inspect._KEYWORD_ONLY or not positional:
                         tx_kwargs[k] = tx_v
+                    else:
+                        tx_args.append(tx_v)
                 return txs['return'](fun(*tx_args, **tx_kwargs))
+            unvalidated_txs = get_txs(validate=False)
+            if adaptive:
+                element_wise = {k for k, p in sig.parameters.items()
+                                if ((p.kind is inspect._VAR_POSITIONAL) and not combine_var_positional)
+                                or ((p.kind is inspect._VAR_KEYWORD) and not combine_var_keyword)}
+                specializer = _specializer(sig, keys_with_tx - {'return'}, element_wise, adaptive, get_tx, txs, unvalidated_txs)
+            has_validation = any(_has_validation(p.annotation) for p in sig.parameters.values()) or _has_validation(sig.return_annotation)
+            if has_validation:
+                call_numbers = _per_thread_counter()
+                validation_stats = _per_thread_counter()
+                @wraps(fun)
+                def wrapped(*args, **kwargs):
+                    every = _default_validate_every if validate_every is None else validate_every
+                    if _validation_off.get() or ((every != 1) and (call_numbers.increment('calls') % every)):
+                        validation_stats.increment('skipped')
+                        return call(unvalidated_txs, args, kwargs)
+                    validation_stats.increment('validated')
+                    return call(txs, args, kwargs)
+                wrapped.validation_stats = validation_stats
+            else:
+                @wraps(fun)
+                def wrapped(*args, **kwargs):
+                    return call(txs, args, kwargs)
+            if adaptive:
+                wrapped.adaptive_stats = specializer.stats
+            wrapped.composed_annotations = dict(getattr(fun, 'composed_annotations', {}))
             for k in keys_with_tx:
-                wrapped.__annotations__.pop(k)
+                wrapped.composed_annotations[k] = wrapped.__annotations__.pop(k)
+            wrapped.composed_transforms = dict(getattr(fun, 'composed_transforms', {}))
+            wrapped.composed_transforms.update((k, txs[k]) for k in keys_with_tx)
+            wrapped.fresh_defaults = frozenset(getattr(fun, 'fresh_defaults', ())) | (fresh & keys_with_tx)
+            wrapped.__signature__ = sig.replace(
+                parameters=[p.replace(annotation=inspect._empty) if p.name in keys_with_tx else p for p in sig.parameters.values()],
+                return_annotation=inspect._empty if 'return' in keys_with_tx else sig.return_annotation)
             return wrapped
         else:
             return fun
+    def decorator(fun):
+        return deferral(compose, fun, defer)
     return decorator
 
+def annotation_transform(annotation, validate=True):
+    '''
+    Function that applies an annotation to a single value
+
+    Args:
+        annotation: A callable, or a :class:`collections.abc.Sequence` of
+                    callables (pipeline)
+        validate (bool): If False, omit validations (see :func:`is_validation`)
+
+    Returns:
+        func: Function applying *annotation* (as :func:`compose_annotations`
+        does), or None if *annotation* is neither callable nor a pipeline
+        (or consists only of validations that are omitted)
+
+    Example:
+        >>> annotation_transform((float, str))(1)
+        '1.0'
+        >>> annotation_transform('not callable') is None
+        True
+    '''
+    if annotation is inspect._empty:
+        return None
+    elif callable(annotation):
+        return annotation if validate or not is_validation(annotation) else None
+    elif isinstance(annotation, Sequence) and (len(annotation) > 0) and all(map(callable, annotation)):
+        pipeline = fused(annotation if validate else [f for f in annotation if not is_validation(f)])
+        if len(pipeline) == 0:
+            return None
+        elif len(pipeline) == 1:
+            return pipeline[0]
+        return lambda raw: reduce(lambda v, f: f(v), pipeline, raw)
+    else:
+        return None
+
+def param_annotations(fun):
+    '''
+    Annotations of a function's parameters, including those applied by
+    :func:`compose_annotations`
+
+    Args:
+        fun (func): Function, possibly decorated with :func:`compose_annotations`
+
+    Returns:
+        dict: parameter name -> annotation (for annotated parameters)
+
+    Example:
+        >>> @compose_annotations
+        ... def f(x: int, y: 'not callable'):
+        ...     pass
+        >>> sorted(param_annotations(f).items())
+        [('x', <class 'int'>), ('y', 'not callable')]
+    '''
+    fun = resolved(fun)
+    sig = inspect.signature(fun)
+    result = {k: p.annotation for k, p in sig.parameters.items() if p.annotation is not inspect._empty}
+    result.update((k, v) for k, v in getattr(fun, 'composed_annotations', {}).items() if k in sig.parameters)
+    return result
+
+def is_validation(fun):
+    '''
+    Returns:
+        bool: True if *fun* is a validation, ie: it either returns its
+        argument unchanged or raises an exception (see
+        :func:`drytools.annotation.functions.check` and
+        :mod:`drytools.annotation.predicates`)
+    '''
+    return getattr(fun, 'is_validation', False) is True
+
+def _pipeline_elements(annotation):
+    if callable(annotation):
+        return [annotation]
+    elif isinstance(annotation, Sequence) and all(map(callable, annotation)):
+        return list(annotation)
+    return []
+
+def _has_validation(annotation):
+    if callable(annotation):
+        return is_validation(annotation)
+    return isinstance(annotation, Sequence) and any(map(is_validation, annotation))
+
+_immutable_types = (type(None), bool, int, float, complex, str, bytes)
+
+def _is_immutable(value):
+    '''
+    True if value is of a built-in immutable type, or a tuple or frozenset
+    (without instance attributes) of such values, so it can be shared
+    '''
+    if type(value) in _immutable_types:
+        return True
+    return isinstance(value, (tuple, frozenset)) and (not hasattr(value, '__dict__')) and all(map(_is_immutable, value))
+
+'''
+Sampled validation
+------------------
+'''
+_default_validate_every = 1
+_validation_off = ContextVar('drytools_validation_off', default=False)
+
+def set_validate_every(n):
+    '''
+    Set how often validations are applied by functions decorated with
+    :func:`compose_annotations` (unless they specify *validate_every*)
+
+    Args:
+        n (int): Validate one in every *n* calls (1 to validate every call)
+
+    Returns:
+        int: The previous setting
+    '''
+    global _default_validate_every
+    _check_validate_every(n)
+    previous, _default_validate_every = _default_validate_every, n
+    return previous
+
+def _check_validate_every(n):
+    if (not isinstance(n, int)) or (n < 1):
+        raise ValueError(n)
+
+@contextmanager
+def trusted():
+    '''
+    Context manager which skips validations (but not coercions) in functions
+    decorated with :func:`compose_annotations` that are called inside it
+    (in the same thread or asynchronous task)
+    '''
+    token = _validation_off.set(True)
+    try:
+        yield
+    finally:
+        _validation_off.reset(token)
+
+class _per_thread_counter(Mapping):
+    '''
+    Read-only mapping of counts, incremented without shared writes (each
+    thread updates its own :class:`collections.Counter`, and reads add them up)
+
+    When a thread exits, its counts are added to a shared total and its
+    counter is dropped, so short-lived threads don't accumulate counters.
+    '''
+    def __init__(self):
+        self._local = threading.local()
+        self._counters = {}  # live threads' counters, by key
+        self._exited = Counter()  # counts of threads that have exited
+        self._keys = count()
+        self._lock = threading.Lock()
+    def _own_counter(self):
+        try:
+            return self._local.counter
+        except AttributeError:
+            counter, key = Counter(), next(self._keys)
+            with self._lock:
+                self._counters[key] = counter
+            token = self._local.token = _thread_token()  # dropped with the thread's local data
+            weakref.finalize(token, _fold_counter, self._counters, self._exited, self._lock, key)
+            self._local.counter = counter
+            return counter
+    def increment(self, key):
+        '''
+        Returns:
+            int: the calling thread's count for *key* before incrementing
+        '''
+        counter = self._own_counter()
+        previous = counter[key]
+        counter[key] = previous + 1
+        return previous
+    def _total(self):
+        with self._lock:
+            counters = list(self._counters.values())
+            total = Counter(self._exited)
+        for counter in counters:
+            total.update(dict.copy(counter))  # copied atomically in case its thread is adding a key
+        return total
+    def __getitem__(self, key):
+        total = self._total()
+        if key not in total:
+            raise KeyError(key)
+        return total[key]
+    def __iter__(self):
+        return iter(self._total())
+    def __len__(self):
+        return len(self._total())
+    def __repr__(self):
+        return repr(dict(self._total()))
+
+class _thread_token:
+    '''Object referenced only by a thread's local data (so it's finalized when the thread exits)'''
+
+def _fold_counter(counters, exited, lock, key):
+    with lock:
+        exited.update(counters.pop(key))
+
+'''
+Adaptive specialization
+-----------------------
+'''
+_identity_coercions = (bool, int, float, complex, str, bytes, tuple, frozenset)  # cls(x) is x if type(x) is cls
+
+def _implied_by_type(element, cls):
+    '''True if pipeline element has no effect on values of type cls'''
+    if element in _identity_coercions:
+        return element is cls
+    if getattr(element, 'validated_type', None) is cls:  # each() returns its own marked containers unchanged
+        return True
+    if isinstance(element, isinstance_of):
+        return issubclass(cls, element.types)
+    if (getattr(element, 'predicate', None) is isinstance) and (len(element.args) == 1) and not element.kwargs:
+        try:
+            return issubclass(cls, element.args[0])
+        except TypeError:
+            return False
+    return False
+
+class _specializer:
+    '''
+    Records the argument types of the first calls of a function decorated
+    with ``compose_annotations(adaptive=n)``, then provides transforms that
+    skip the leading annotation elements implied by those types (see
+    :func:`_implied_by_type`)
+    '''
+    def __init__(self, sig, names, element_wise, n_calls, get_tx, txs, unvalidated_txs):
+        self.sig = sig
+        self.element_wise = element_wise
+        self.remaining = n_calls
+        self.get_tx = get_tx
+        self.base_txs = {True: txs, False: unvalidated_txs}
+        self.observed = {name: set() for name in names}
+        self.lock = threading.Lock()
+        self.guards = None  # parameter name -> (kind, type), set after n_calls calls
+        self.stats = _per_thread_counter()
+    def _types(self, name, value):
+        if name not in self.element_wise:
+            return [type(value)]
+        return map(type, value.values() if isinstance(value, dict) else value)
+    def _record(self, arguments):
+        with self.lock:
+            if self.guards is not None:
+                return
+            for name, types in self.observed.items():
+                if name in arguments:
+                    types.update(self._types(name, arguments[name]))
+            self.remaining -= 1
+            if self.remaining <= 0:
+                self._specialize()
+    def _specialize(self):
+        guards = {}
+        specialized = {True: {}, False: {}}
+        for name, types in self.observed.items():
+            if len(types) != 1:
+                continue
+            cls, = types
+            param = self.sig.parameters[name]
+            elements = _pipeline_elements(param.annotation)
+            reduced = tuple(dropwhile(lambda e: _implied_by_type(e, cls), elements))  # later elements may see another type
+            if len(reduced) == len(elements):
+                continue
+            guards[name] = cls
+            for validate in (True, False):
+                specialized[validate][name] = self.get_tx(param.replace(annotation=reduced or inspect._empty), validate=validate)
+        self.fast_txs = {id(txs): dict(txs, **specialized[validate]) for validate, txs in self.base_txs.items()}
+        self.guards = guards
+    def specialized(self, txs, arguments):
+        '''Transforms to use for a call with the given arguments'''
+        guards = self.guards
+        if guards is None:
+            self._record(arguments)
+            return txs
+        if not guards:
+            return txs
+        for name, cls in guards.items():
+            if name in arguments:
+                value = arguments[name]
+                if name in self.element_wise:
+                    values = value.values() if isinstance(value, dict) else value
+                    matched = all(type(v) is cls for v in values)
+                else:
+                    matched = type(value) is cls
+                if not matched:
+                    self.stats.increment('misses')
+                    return txs
+        self.stats.increment('hits')
+        return self.fast_txs[id(txs)]
+
+'''
+Parallel transforms
+-------------------
+'''
+_default_parallel_threshold = 8
+_executor = None
+_executor_lock = threading.Lock()
+_worker_thread_prefix = 'drytools-compose_annotations'
+_worker_state = threading.local()  # in_pool is True in the shared pool's threads
+
+def _mark_worker():
+    _worker_state.in_pool = True
+
+def _shared_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(thread_name_prefix=_worker_thread_prefix, initializer=_mark_worker)
+    return _executor
+
+def _parallel_map(fun, values, threshold):
+    '''
+    List of fun(value) for each value, computed in the shared thread pool if
+    there are at least threshold values (and the caller isn't one of the
+    pool's threads, which could otherwise deadlock).  Each call runs in a
+    copy of the caller's context (so eg: :func:`trusted` applies to it).
+    If calls fail, the exception of the first failed value (by position)
+    is raised.
+    '''
+    values = list(values)
+    if (len(values) < threshold) or getattr(_worker_state, 'in_pool', False):
+        return list(map(fun, values))
+    executor = _shared_executor()
+    futures = [executor.submit(copy_context().run, fun, v) for v in values]
+    done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+    if not_done:
+        failed = min(i for i, future in enumerate(futures) if (future in done) and (future.exception() is not None))
+        for future in futures[failed+1:]:
+            future.cancel()
+        wait(futures[:failed])  # an earlier element may fail too
+        for future in futures[:failed+1]:
+            if future.exception() is not None:
+                raise future.exception()
+    return [future.result() for future in futures]
+
 
 if __name__ == '__main__':
     import doctest
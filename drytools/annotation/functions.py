@@ -10,11 +10,15 @@ validate parameters.
 
 '''
 from collections.abc import Iterable
+from weakref import WeakValueDictionary
+
+from drytools.decorator_factory import memoized
 
 '''
 Validation
 ----------
 '''
+@memoized
 def check(predicate, *args, raises=ValueError, **kwargs):
     '''
     Factory for univariate validation functions
@@ -44,11 +48,17 @@ def check(predicate, *args, raises=ValueError, **kwargs):
             ...
         ValueError: -3
 
+    The returned function's *predicate*, *args* and *kwargs* attributes
+    hold the corresponding arguments.  Calls with equal (hashable)
+    arguments return the same function (see
+    :func:`drytools.decorator_factory.memoized`).
     '''
     def checked_passthrough(x):
         if not predicate(x, *args, **kwargs):
             raise raises(x)
         return x
+    checked_passthrough.is_validation = True
+    checked_passthrough.predicate, checked_passthrough.args, checked_passthrough.kwargs = predicate, args, kwargs
     return checked_passthrough
 
 '''
@@ -59,13 +69,17 @@ In addition to the functions below, types (eg: :class:`int`, :class:`str`,
 :class:`pathlib.Path`) are useful for coercion.
 '''
 
-def iterify(x, excluded_types=str):
+atomic_types = (str, bytes, bytearray, memoryview)
+
+def iterify(x, excluded_types=atomic_types):
     '''
     Coerce to an iterable
 
     Args:
         x: Object to coerce
-        excluded_types (:class:`type` or iterable): one or more types to treat as elements even if they are iterable
+        excluded_types (:class:`type` or iterable): one or more types to
+          treat as elements even if they are iterable.  The default treats
+          text and binary buffers (:data:`atomic_types`) as elements.
 
     Returns:
         *iterable*: Either *x* (if it's iterable and not one of *excluded_types*) or a single-element list containing *x*
@@ -78,12 +92,181 @@ def iterify(x, excluded_types=str):
         ['f', 'o', 'o']
         >>> iterify(['foo', 'bar', 'baz'])
         ['foo', 'bar', 'baz']
+        >>> iterify(b'foo')
+        [b'foo']
     '''
     if not isinstance(excluded_types, Iterable):
         excluded_types = [excluded_types]
     ok = isinstance(x, Iterable) and (not any(isinstance(x, t) for t in excluded_types))
     return x if ok else [x]
 
+'''
+Containers
+----------
+
+Immutable containers whose elements have already been passed through a
+pipeline are marked as such, so the same pipeline can recognise them
+instead of processing every element again (eg: when a container is passed
+through several decorated functions with the same annotation).
+'''
+
+_validated_types = WeakValueDictionary()  # (container, pipeline) -> marked subclass of container
+
+def each(*pipeline, container=tuple):
+    '''
+    Factory for functions applying a pipeline to each element of a container
+
+    Args:
+        pipeline (*callable*): Functions to apply to each element (the
+                               element is passed to the first, its return
+                               value to the second etc.)
+        container (:class:`type`): :class:`tuple` or :class:`frozenset`
+
+    Returns:
+        func: Function which coerces its input with :func:`iterify` and
+        returns a *container* of the results of passing its elements
+        through *pipeline*.  The result is an instance of a subclass of
+        *container* (the function's *validated_type* attribute) marking
+        that its elements have passed *pipeline*, and such instances are
+        returned unchanged, without processing their elements again.
+
+    Example:
+        >>> from operator import gt
+        >>> positive = check(gt, 0)
+        >>> positive_ints = each(int, positive)
+        >>> values = positive_ints(['1', 2.5])
+        >>> values
+        (1, 2)
+        >>> positive_ints(values) is values
+        True
+        >>> each(int, positive)(values) is values  # same pipeline elements
+        True
+        >>> each(int, check(gt, 0))(values) is values  # check(gt, 0) is positive
+        True
+        >>> each(float, positive)(values) is values
+        False
+        >>> positive_ints((1, -2))
+        Traceback (most recent call last):
+            ...
+        ValueError: -2
+
+    Pipelines are the same if their elements are the same objects (eg:
+    :func:`check` returns the same function for equal arguments).  Results
+    of operations on marked containers (eg: slices and unions) are plain
+    containers.
+    '''
+    if container not in (tuple, frozenset):
+        raise ValueError('Container must be tuple or frozenset: {!r}'.format(container))
+    if not all(map(callable, pipeline)):
+        raise TypeError('Pipeline elements must be callable')
+    validated_type = _validated_type(container, pipeline)
+    if len(pipeline) == 1:
+        element_tx, = pipeline
+    else:
+        def element_tx(value):
+            for fun in pipeline:
+                value = fun(value)
+            return value
+    def each_element(x):
+        if type(x) is validated_type:
+            return x
+        return validated_type(map(element_tx, iterify(x)))
+    each_element.pipeline, each_element.container, each_element.validated_type = pipeline, container, validated_type
+    return each_element
+
+def _validated_type(container, pipeline):
+    try:
+        return _validated_types[container, pipeline]
+    except KeyError:
+        pass
+    except TypeError:  # unhashable pipeline element
+        return _make_validated_type(container, pipeline)
+    return _validated_types.setdefault((container, pipeline), _make_validated_type(container, pipeline))
+
+def _make_validated_type(container, pipeline):
+    return type('validated_{}'.format(container.__name__), (container,),
+                {'__slots__': (), 'pipeline': pipeline, '__module__': __name__,
+                 '__reduce__': lambda self: (container, (container(self),))})
+
+'''
+Buffers
+-------
+
+Objects supporting the buffer protocol (eg: :class:`bytes`,
+:class:`bytearray`, :class:`array.array`, :class:`mmap.mmap`) can be
+wrapped in a :class:`memoryview` without copying their contents.
+'''
+
+def as_memoryview(x):
+    '''
+    Coerce to a :class:`memoryview` (without copying)
+
+    Args:
+        x: Object supporting the buffer protocol
+
+    Returns:
+        :class:`memoryview`: *x* if it's already a memoryview, otherwise a memoryview of *x*
+
+    Raises:
+        TypeError: if *x* doesn't support the buffer protocol
+
+    Example:
+        >>> data = bytearray(b'foo')
+        >>> view = as_memoryview(data)
+        >>> data[0] = ord('g')
+        >>> view.tobytes()
+        b'goo'
+    '''
+    return x if isinstance(x, memoryview) else memoryview(x)
+
+def as_readonly_buffer(x):
+    '''
+    Coerce to a read-only :class:`memoryview` (without copying)
+
+    Args:
+        x: Object supporting the buffer protocol
+
+    Returns:
+        :class:`memoryview`: read-only view of *x* (*x* itself if it's already one)
+
+    Example:
+        >>> view = as_readonly_buffer(bytearray(b'foo'))
+        >>> view[0] = 0
+        Traceback (most recent call last):
+            ...
+        TypeError: cannot modify read-only memory
+    '''
+    view = as_memoryview(x)
+    return view if view.readonly else view.toreadonly()
+
+def iter_chunks(x, size):
+    '''
+    Iterate over a buffer in fixed-size slices (without copying)
+
+    Args:
+        x: Object supporting the buffer protocol
+        size (int): Number of bytes in each chunk (the last chunk may be shorter)
+
+    Returns:
+        *iterator*: :class:`memoryview` slices of *x*
+
+    Raises:
+        ValueError: if *x* isn't a 1-dimensional buffer of bytes and isn't
+          C-contiguous (so it can't be viewed as bytes without copying)
+
+    Example:
+        >>> [bytes(chunk) for chunk in iter_chunks(b'abcdefg', 3)]
+        [b'abc', b'def', b'g']
+    '''
+    if size < 1:
+        raise ValueError(size)
+    view = as_memoryview(x)
+    if (view.ndim != 1) or (view.format != 'B'):
+        if not view.c_contiguous:
+            raise ValueError('Buffer is not C-contiguous (copy it first, eg: with bytes())')
+        view = view.cast('B')
+    return (view[start:start+size] for start in range(0, view.nbytes, size))
+
 
 
 if __name__ == '__main__':
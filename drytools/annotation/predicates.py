@@ -0,0 +1,361 @@
+'''
+====================================================================
+annotation.predicates - Composable predicates compiled to validators
+====================================================================
+
+The predicates in this module are alternatives to
+:func:`drytools.annotation.functions.check` which can be combined with the
+``&`` (all of) and ``|`` (any of) operators.  A combination is compiled into
+a single generated function, so a chain of clauses costs one Python call
+instead of one per clause.  Adjacent :func:`in_range` clauses in a
+conjunction are merged into a single interval test.
+
+When a value fails, the exception message names the clause that it failed
+(not the merged interval).
+
+Example:
+    >>> from drytools.annotation.composition import compose_annotations
+    >>> @compose_annotations
+    ... def set_age(age: (int, in_range(0) & in_range(upper=200))):
+    ...     return age
+    >>> set_age('42')
+    42
+    >>> set_age(250)
+    Traceback (most recent call last):
+        ...
+    ValueError: 250 does not satisfy in_range(upper=200)
+
+'''
+from abc import ABC, abstractmethod
+
+
+class predicate(ABC):
+    '''
+    Abstract base class for composable predicates
+
+    Calling a predicate validates a value: the value is returned unchanged if
+    it satisfies the predicate, otherwise an exception of type *raises* is
+    raised.  Use :meth:`test` to get a :class:`bool` instead.
+
+    Subclasses implement :meth:`_expr` (and normally ``__repr__``).  Only
+    predicates can be combined with ``&`` and ``|`` (wrap functions
+    returning a :class:`bool` in :class:`satisfies`).
+    '''
+    raises = ValueError
+    is_validation = True
+    _validator = None
+    _tester = None
+    def __and__(self, other):
+        if not isinstance(other, predicate):
+            return NotImplemented
+        return all_of(self, other)
+    def __or__(self, other):
+        if not isinstance(other, predicate):
+            return NotImplemented
+        return any_of(self, other)
+    def __call__(self, x):
+        validator = self._validator
+        if validator is None:
+            validator = self._validator = self._compile_validator()
+        return validator(x)
+    def test(self, x):
+        '''
+        Returns:
+            bool: True if *x* satisfies the predicate
+        '''
+        tester = self._tester
+        if tester is None:
+            tester = self._tester = self._compile_tester()
+        return tester(x)
+    @abstractmethod
+    def _expr(self, var, code):
+        '''
+        Python expression (str) which is true when the value named *var*
+        satisfies the predicate.  Constants are registered with
+        ``code.const``.
+        '''
+    def _fail(self, x):
+        raise self.raises('{!r} does not satisfy {!r}'.format(x, self))
+    def _clauses(self):
+        return [self]
+    def _compile_tester(self):
+        code = _code()
+        code.lines.append('def tester(x):')
+        code.lines.append('    return bool({})'.format(self._expr('x', code)))
+        return code.function('tester', self)
+    def _compile_validator(self):
+        code = _code()
+        code.lines.append('def validator(x):')
+        for clause in _merged_ranges(self._clauses()):
+            code.lines.append('    if not ({}):'.format(clause._expr('x', code)))
+            code.lines.append('        {}(x)'.format(code.const(clause._fail)))
+        code.lines.append('    return x')
+        return code.function('validator', self)
+
+
+class _code:
+    '''Source lines and namespace for a generated function'''
+    def __init__(self):
+        self.lines = []
+        self.namespace = {}
+    def const(self, value):
+        name = '_c{}'.format(len(self.namespace))
+        self.namespace[name] = value
+        return name
+    def function(self, name, source_predicate):
+        source = '\n'.join(self.lines)
+        exec(compile(source, '<drytools predicate {!r}>'.format(source_predicate), 'exec'), self.namespace)
+        return self.namespace[name]
+
+
+class in_range(predicate):
+    '''
+    Value lies within an interval
+
+    Args:
+        lower: Lower bound (None for no lower bound)
+        upper: Upper bound (None for no upper bound)
+        lower_inclusive (bool): Whether *lower* itself is valid
+        upper_inclusive (bool): Whether *upper* itself is valid
+        raises (*callable*): Constructor for the :class:`Exception` raised on failure
+
+    Example:
+        >>> percentage = in_range(0, 100)
+        >>> percentage(42)
+        42
+        >>> percentage.test(101)
+        False
+        >>> in_range(0, lower_inclusive=False)(0)
+        Traceback (most recent call last):
+            ...
+        ValueError: 0 does not satisfy in_range(0, lower_inclusive=False)
+    '''
+    def __init__(self, lower=None, upper=None, *, lower_inclusive=True, upper_inclusive=True, raises=ValueError):
+        self.lower, self.upper = lower, upper
+        self.lower_inclusive, self.upper_inclusive = lower_inclusive, upper_inclusive
+        self.raises = raises
+    def _expr(self, var, code):
+        terms = []
+        if self.lower is not None:
+            terms.extend([code.const(self.lower), '<=' if self.lower_inclusive else '<'])
+        terms.append(var)
+        if self.upper is not None:
+            terms.extend(['<=' if self.upper_inclusive else '<', code.const(self.upper)])
+        return ' '.join(terms) if len(terms) > 1 else 'True'
+    def __repr__(self):
+        args = []
+        if self.lower is not None:
+            args.append(repr(self.lower))
+        if self.upper is not None:
+            args.append(('{!r}' if args else 'upper={!r}').format(self.upper))
+        if not self.lower_inclusive:
+            args.append('lower_inclusive=False')
+        if not self.upper_inclusive:
+            args.append('upper_inclusive=False')
+        return 'in_range({})'.format(', '.join(args))
+
+
+class _merged_range(in_range):
+    '''Intersection of adjacent in_range clauses, reporting failures against the original clauses'''
+    def __init__(self, parts):
+        super().__init__()
+        self.parts = parts
+        for part in parts:
+            if part.lower is not None:
+                if (self.lower is None) or (part.lower > self.lower):
+                    self.lower, self.lower_inclusive = part.lower, part.lower_inclusive
+                elif part.lower == self.lower:
+                    self.lower_inclusive = self.lower_inclusive and part.lower_inclusive
+            if part.upper is not None:
+                if (self.upper is None) or (part.upper < self.upper):
+                    self.upper, self.upper_inclusive = part.upper, part.upper_inclusive
+                elif part.upper == self.upper:
+                    self.upper_inclusive = self.upper_inclusive and part.upper_inclusive
+    def _fail(self, x):
+        for part in self.parts:
+            if not part.test(x):
+                part._fail(x)
+        super()._fail(x)
+    def __repr__(self):
+        return ' & '.join(map(repr, self.parts))
+
+
+def _merged_ranges(clauses):
+    '''Replace each run of adjacent in_range clauses with a single _merged_range'''
+    result = []
+    run = []
+    def flush_run():
+        if len(run) > 1:
+            try:
+                result.append(_merged_range(list(run)))
+            except TypeError:  # bounds not mutually comparable
+                result.extend(run)
+        else:
+            result.extend(run)
+        run.clear()
+    for clause in clauses:
+        if type(clause) is in_range:
+            run.append(clause)
+        else:
+            flush_run()
+            result.append(clause)
+    flush_run()
+    return result
+
+
+class isinstance_of(predicate):
+    '''
+    Value is an instance of one of the given types
+
+    Args:
+        types (:class:`type`): Acceptable types
+        raises (*callable*): Constructor for the :class:`Exception` raised on failure
+
+    Example:
+        >>> isinstance_of(int, float)(1.5)
+        1.5
+        >>> isinstance_of(str)(1)
+        Traceback (most recent call last):
+            ...
+        TypeError: 1 does not satisfy isinstance_of(str)
+    '''
+    def __init__(self, *types, raises=TypeError):
+        if not types:
+            raise TypeError('No types')
+        self.types = types
+        self.raises = raises
+    def _expr(self, var, code):
+        return 'isinstance({}, {})'.format(var, code.const(self.types))
+    def __repr__(self):
+        return 'isinstance_of({})'.format(', '.join(t.__name__ for t in self.types))
+
+
+class satisfies(predicate):
+    '''
+    Value satisfies an arbitrary predicate function (cf: :func:`drytools.annotation.functions.check`)
+
+    Args:
+        fun (*callable*): Function returning True if the value (its first argument) is valid
+        args, kwargs: additional (constant) arguments for *fun*
+        raises (*callable*): Constructor for the :class:`Exception` raised on failure
+
+    Example:
+        >>> satisfies(str.startswith, 'a')('abc')
+        'abc'
+        >>> satisfies(str.startswith, 'a')('xyz')
+        Traceback (most recent call last):
+            ...
+        ValueError: 'xyz' does not satisfy satisfies(startswith, 'a')
+    '''
+    def __init__(self, fun, *args, raises=ValueError, **kwargs):
+        self.fun, self.args, self.kwargs = fun, args, kwargs
+        self.raises = raises
+    def _expr(self, var, code):
+        call_args = [var]
+        call_args.extend(map(code.const, self.args))
+        if self.kwargs:
+            call_args.append('**{}'.format(code.const(self.kwargs)))
+        return '{}({})'.format(code.const(self.fun), ', '.join(call_args))
+    def __repr__(self):
+        args = [getattr(self.fun, '__name__', repr(self.fun))]
+        args.extend(map(repr, self.args))
+        args.extend('{}={!r}'.format(k, v) for k, v in sorted(self.kwargs.items()))
+        return 'satisfies({})'.format(', '.join(args))
+
+
+class all_of(predicate):
+    '''
+    Value satisfies every clause (equivalent to combining clauses with ``&``)
+
+    Clauses are checked in order and the first failing clause determines the
+    exception raised.
+
+    Example:
+        >>> positive_int = all_of(isinstance_of(int), in_range(0, lower_inclusive=False))
+        >>> positive_int(3)
+        3
+        >>> positive_int(3.5)
+        Traceback (most recent call last):
+            ...
+        TypeError: 3.5 does not satisfy isinstance_of(int)
+    '''
+    def __init__(self, *clauses):
+        _check_clauses(clauses)
+        self.clauses = tuple(c for clause in clauses for c in clause._clauses())
+    def _clauses(self):
+        return list(self.clauses)
+    def _expr(self, var, code):
+        return ' and '.join('({})'.format(c._expr(var, code)) for c in _merged_ranges(self.clauses))
+    def __repr__(self):
+        return ' & '.join(map(repr, self.clauses))
+
+
+class any_of(predicate):
+    '''
+    Value satisfies at least one clause (equivalent to combining clauses with ``|``)
+
+    Args:
+        clauses (:class:`predicate`): Alternative clauses
+        raises (*callable*): Constructor for the :class:`Exception` raised on
+          failure.  The default is the clauses' exception type if they all
+          share one, otherwise :class:`ValueError`.
+
+    Example:
+        >>> text_or_number = isinstance_of(str) | isinstance_of(int, float)
+        >>> text_or_number(1)
+        1
+        >>> text_or_number(None)
+        Traceback (most recent call last):
+            ...
+        TypeError: None does not satisfy isinstance_of(str) | isinstance_of(int, float)
+    '''
+    def __init__(self, *clauses, raises=None):
+        _check_clauses(clauses)
+        self.clauses = tuple(c for clause in clauses
+                             for c in (clause.clauses if isinstance(clause, any_of) else [clause]))
+        if raises is None:
+            raises_options = {c.raises for c in self.clauses}
+            raises = raises_options.pop() if len(raises_options) == 1 else ValueError
+        self.raises = raises
+    def _expr(self, var, code):
+        return ' or '.join('({})'.format(c._expr(var, code)) for c in self.clauses)
+    def __repr__(self):
+        return ' | '.join('({!r})'.format(c) if isinstance(c, all_of) else repr(c) for c in self.clauses)
+
+
+def _check_clauses(clauses):
+    if not clauses:
+        raise TypeError('No clauses')
+    for clause in clauses:
+        if not isinstance(clause, predicate):
+            raise TypeError('Not a predicate (wrap functions returning bool in satisfies): {!r}'.format(clause))
+
+
+def fused(pipeline):
+    '''
+    Combine adjacent predicates in an annotation pipeline
+
+    Args:
+        pipeline (sequence): Callables to be applied in order
+
+    Returns:
+        list: *pipeline* with each run of adjacent :class:`predicate`
+        elements replaced by their conjunction (so it runs as one compiled
+        function)
+
+    Example:
+        >>> fused([int, in_range(0), in_range(upper=200), str])
+        [<class 'int'>, in_range(0) & in_range(upper=200), <class 'str'>]
+    '''
+    result = []
+    for element in pipeline:
+        if isinstance(element, predicate) and result and isinstance(result[-1], predicate):
+            result[-1] = result[-1] & element
+        else:
+            result.append(element)
+    return result
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,141 @@
+'''
+=========================================================
+benchmark - Multithreaded throughput of drytools wrappers
+=========================================================
+
+Measures the throughput of decorated calls and constructions with 1, 2,
+4, ... threads making calls at the same time.  On free-threaded CPython
+builds, throughput should scale nearly linearly with the number of threads
+(up to the number of cores) unless the wrappers contend for shared state.
+With the GIL, it stays roughly constant.
+
+Usage:
+
+.. code-block:: bash
+
+    $ python -m drytools.benchmark --threads 1 2 4 8 --calls 20000
+'''
+import os
+import sys
+import threading
+import time
+
+from drytools.annotation.composition import compose_annotations
+from drytools.annotation.functions import check
+from drytools.decorator import args2attrs, ordered_by
+
+
+def throughput(fun, n_threads, n_calls=10000):
+    '''
+    Calls per second when several threads call a function at the same time
+
+    Args:
+        fun (*callable*): Function (with no arguments) to call
+        n_threads (int): Number of threads
+        n_calls (int): Number of calls made by each thread
+
+    Returns:
+        float: total calls per second
+    '''
+    barrier = threading.Barrier(n_threads + 1)
+    errors = []
+    def worker():
+        barrier.wait()
+        try:
+            for _ in range(n_calls):
+                fun()
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+    return n_threads * n_calls / elapsed
+
+def default_scenarios():
+    '''
+    Returns:
+        dict: scenario name -> function (with no arguments) to time
+    '''
+    @compose_annotations
+    def validated(x: (int, check(lambda v: v >= 0)), y: float=1.0):
+        return x * y
+    @compose_annotations(validate_every=10)
+    def sampled(x: (int, check(lambda v: v >= 0)), y: float=1.0):
+        return x * y
+    class record:
+        @args2attrs
+        def __init__(self, name, age, height=1.7):
+            pass
+    @ordered_by('age', 'name', cache_key=True)
+    class ordered(record):
+        pass
+    a, b = ordered('Ann', 31), ordered('Bob', 31)
+    return {
+        'compose_annotations call': lambda: validated('3', 2),
+        'compose_annotations call (validate_every=10)': lambda: sampled('3', 2),
+        'args2attrs construction': lambda: record('Ann', 31),
+        'ordered_by comparison (cache_key=True)': lambda: a < b,
+    }
+
+def default_thread_counts():
+    '''
+    Returns:
+        list: 1, 2, 4, ... up to the number of CPUs
+    '''
+    counts = [1]
+    while counts[-1] * 2 <= (os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+    return counts
+
+def run(thread_counts=None, n_calls=10000, scenarios=None):
+    '''
+    Measure the throughput of each scenario with each number of threads
+
+    Args:
+        thread_counts (list): Numbers of threads (see :func:`default_thread_counts`)
+        n_calls (int): Number of calls per thread
+        scenarios (dict): name -> function (see :func:`default_scenarios`)
+
+    Returns:
+        dict: scenario name -> {number of threads: calls per second}
+    '''
+    thread_counts = default_thread_counts() if thread_counts is None else thread_counts
+    scenarios = default_scenarios() if scenarios is None else scenarios
+    return {name: {n: throughput(fun, n, n_calls) for n in thread_counts} for name, fun in scenarios.items()}
+
+def report(results):
+    '''
+    Returns:
+        str: table of the results of :func:`run`, with the speedup of each
+        number of threads relative to the smallest
+    '''
+    gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+    lines = ['GIL enabled: {}'.format(gil_enabled)]
+    for name, by_threads in results.items():
+        lines.append(name)
+        base_threads = min(by_threads)
+        base = by_threads[base_threads]
+        for n_threads, calls_per_second in sorted(by_threads.items()):
+            speedup = calls_per_second / base
+            lines.append('  {:4d} threads: {:12,.0f} calls/s  speedup {:5.2f} (efficiency {:4.0%})'
+                         .format(n_threads, calls_per_second, speedup, speedup * base_threads / n_threads))
+    return '\n'.join(lines)
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m drytools.benchmark', description=__doc__.split('\n')[3])
+    parser.add_argument('--threads', type=int, nargs='+', help='Numbers of threads (default: 1, 2, 4, ... up to the number of CPUs)')
+    parser.add_argument('--calls', type=int, default=10000, help='Calls per thread')
+    args = parser.parse_args(argv)
+    print(report(run(args.threads, args.calls)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+'''
+================================================
+columnar - Column-oriented storage for instances
+================================================
+
+Many small instances of a class whose ``__init__`` copies its arguments to
+attributes (eg: with :func:`drytools.decorator.args2attrs`) can be stored
+as one column per attribute instead of one ``__dict__`` per instance.
+Numeric columns are typed :class:`array.array` objects (which can be
+viewed as NumPy arrays without copying).
+
+Example:
+    >>> from drytools import args2attrs
+    >>> class person:
+    ...     @args2attrs
+    ...     def __init__(self, name, age, height=1.7):
+    ...         pass
+    ...     def describe(self):
+    ...         return '{} ({})'.format(self.name, self.age)
+    >>> people = columnar(person, typecodes={'age': 'i', 'height': 'd'})
+    >>> people.extend([('Ann', 31), ('Bob', 45, 1.8), {'name': 'Cy', 'age': 8}])
+    >>> people.column('age')
+    array('i', [31, 45, 8])
+    >>> [p.describe() for p in people.filter(lambda age: age > 30, 'age')]
+    ['Ann (31)', 'Bob (45)']
+    >>> people[-1].age += 1
+    >>> people[2:].column('age')
+    array('i', [9])
+'''
+from array import array
+import inspect
+
+
+class columnar:
+    '''
+    Column-oriented container of instances of a class
+
+    Args:
+        cls (:class:`type`): Class of the stored instances.  Its ``__init__``
+                             must save each of its arguments as an attribute
+                             with the same name and must not have variable
+                             keyword arguments.
+        typecodes (dict): :mod:`array` typecodes for columns to store as
+                          :class:`array.array` (other columns are lists)
+
+    Items are row views: lightweight instances of a subclass of *cls* whose
+    attributes read from and write to the columns, so the methods of *cls*
+    work on them.  ``__init__`` is not called for rows (arguments are bound
+    to its signature and defaults are applied, but annotations are not).
+    '''
+    def __init__(self, cls, typecodes=None):
+        typecodes = dict(typecodes or {})
+        sig = inspect.signature(cls.__init__)
+        params = list(sig.parameters.values())[1:]
+        if any(p.kind is inspect._VAR_KEYWORD for p in params):
+            raise ValueError('Variable keyword arguments are not supported')
+        self.cls = cls
+        self.names = tuple(p.name for p in params)
+        if not self.names:
+            raise ValueError('No columns')
+        unknown = set(typecodes) - set(self.names)
+        if unknown:
+            raise ValueError('Unknown columns: {}'.format(sorted(unknown)))
+        self.typecodes = typecodes
+        self._sig = sig
+        self._columns = self._empty_columns()
+        self._row_type = _row_type(cls, self.names)
+    def _empty_columns(self):
+        return {name: array(self.typecodes[name]) if name in self.typecodes else [] for name in self.names}
+    def _with_columns(self, columns):
+        result = object.__new__(type(self))
+        result.__dict__.update(self.__dict__)
+        result._columns = columns
+        return result
+    def _arguments(self, *args, **kwargs):
+        bound = self._sig.bind(None, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = bound.arguments
+        return [arguments[name] for name in self.names]
+    def _add(self, value_lists):
+        new_values = {name: [] for name in self.names}
+        for values in value_lists:
+            for name, value in zip(self.names, values):
+                new_values[name].append(value)
+        typed = {name: array(self.typecodes[name], new_values[name]) for name in self.typecodes}  # may raise before any column changes
+        for name, column in self._columns.items():
+            column.extend(typed.get(name, new_values[name]))
+    def __len__(self):
+        return len(self._columns[self.names[0]])
+    def __iter__(self):
+        return map(self._row, range(len(self)))
+    def _row(self, index):
+        row = object.__new__(self._row_type)
+        row._table = self
+        row._index = index
+        return row
+    def __getitem__(self, key):
+        '''
+        Args:
+            key: int (row view), slice (:class:`columnar` with a subset of
+                 rows) or str (column, see :meth:`column`)
+        '''
+        if isinstance(key, str):
+            return self.column(key)
+        elif isinstance(key, slice):
+            return self._with_columns({name: column[key] for name, column in self._columns.items()})
+        else:
+            n_rows = len(self)
+            index = key + n_rows if key < 0 else key
+            if not 0 <= index < n_rows:
+                raise IndexError(key)
+            return self._row(index)
+    def column(self, name):
+        '''
+        Returns:
+            :class:`array.array` or :class:`list`: the column for attribute *name* (not a copy)
+        '''
+        return self._columns[name]
+    def as_numpy(self, name):
+        '''
+        Returns:
+            :class:`numpy.ndarray`: column *name* as a NumPy array (a view
+            without copying, for :class:`array.array` columns).  Typed
+            columns can't grow while a view exists.
+        '''
+        import numpy as np
+        column = self._columns[name]
+        if isinstance(column, array):
+            return np.frombuffer(column, dtype=column.typecode) if len(column) else np.array([], dtype=column.typecode)
+        return np.array(column)
+    def append(self, *args, **kwargs):
+        '''
+        Add a row, with the same arguments as the class constructor
+        '''
+        self._add([self._arguments(*args, **kwargs)])
+    def extend(self, rows):
+        '''
+        Add rows
+
+        Args:
+            rows (iterable): Each row is a tuple of positional arguments or
+                             a dict of keyword arguments.  No rows are
+                             added if any is invalid.
+        '''
+        self._add([self._arguments(**row) if isinstance(row, dict) else self._arguments(*row) for row in rows])
+    def take(self, indices):
+        '''
+        Returns:
+            :class:`columnar`: new container with the rows at *indices*
+        '''
+        indices = list(indices)
+        return self._with_columns({name: (array(column.typecode, [column[i] for i in indices]) if isinstance(column, array)
+                                          else [column[i] for i in indices])
+                                   for name, column in self._columns.items()})
+    def filter(self, predicate, *names):
+        '''
+        Select rows without creating row views
+
+        Args:
+            predicate (*callable*): Function returning True for rows to keep
+            names (str): Columns whose values are passed to *predicate* (in order)
+
+        Returns:
+            :class:`columnar`: new container with the selected rows
+        '''
+        columns = [self._columns[name] for name in names]
+        return self.take(i for i, values in enumerate(zip(*columns)) if predicate(*values))
+    def __repr__(self):
+        return '<{} of {} {} rows>'.format(type(self).__name__, len(self), self.cls.__name__)
+
+
+def _row_type(cls, names):
+    '''Subclass of cls whose attributes in names are stored in the columns of a columnar'''
+    def column_property(name):
+        def fget(row):
+            return row._table._columns[name][row._index]
+        def fset(row, value):
+            row._table._columns[name][row._index] = value
+        return property(fget, fset)
+    namespace = {name: column_property(name) for name in names}
+    namespace['__slots__'] = ('_table', '_index')
+    namespace['__module__'] = cls.__module__
+    namespace['__qualname__'] = cls.__qualname__
+    return type(cls.__name__, (cls,), namespace)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,411 @@
+'''
+======================================================
+compile - Expand drytools decorators into plain Python
+======================================================
+
+Rewrites a module's source so that uses of
+:func:`drytools.annotation.composition.compose_annotations`,
+:func:`drytools.decorator.args2attrs`, :func:`drytools.decorator.ordered_by`
+and :class:`drytools.mixins.repr_from_init` are replaced by equivalent
+inline code: coercion and validation statements at the start of
+functions, attribute assignments in ``__init__``, explicit comparison
+methods and a literal ``__repr__``.  The generated module calls the
+decorated functions without any wrapper frames.
+
+Usage:
+
+.. code-block:: bash
+
+    $ python -m drytools.compile my_module.py -o my_module_compiled.py
+
+Constructs that can't be expanded statically are left unchanged (so the
+output still needs drytools at run time if any remain), eg:
+
+* decorator arguments that aren't literals, and compose_annotations options
+  other than *combine_var_positional*, *combine_var_keyword* and *defer*
+  (*defer* is dropped, as expanded code does no work at decoration time)
+* annotations referring to names defined in an enclosing class or function
+* generators and coroutines decorated with compose_annotations
+* args2attrs with *lazy* arguments, and ordered_by with *cache_key*
+
+Name and attribute annotations (eg: ``int``, ``pathlib.Path``) are assumed
+to be callable.  The literal ``__repr__`` reflects the signature of the
+class's own ``__init__`` (not those of subclasses) and is only generated if
+the defaults of ``__init__`` are literals.  Requires Python 3.9 or later.
+
+Example:
+    >>> print(compile_source(\'\'\'
+    ... @compose_annotations
+    ... def halve(x: (int, check(gt, 0))) -> str:
+    ...     return x / 2
+    ... \'\'\').strip())
+    def halve(x):
+        x = int(x)
+        if not gt(x, 0):
+            raise ValueError(x)
+        _drytools_r = x / 2
+        _drytools_r = str(_drytools_r)
+        return _drytools_r
+'''
+import ast
+import copy
+import sys
+
+_prefix = '_drytools_'
+_comparisons = [('eq', '=='), ('ne', '!='), ('gt', '>'), ('lt', '<'), ('ge', '>='), ('le', '<=')]
+
+
+class _not_expandable(Exception):
+    pass
+
+
+def compile_source(source, filename='<string>'):
+    '''
+    Expand drytools decorators in Python source code
+
+    Args:
+        source (str): Source code of a module
+        filename (str): Name used in error messages
+
+    Returns:
+        str: Equivalent source code
+    '''
+    tree = ast.parse(source, filename)
+    tree = _expander().visit(tree)
+    ast.fix_missing_locations(tree)
+    return ast.unparse(tree) + '\n'
+
+
+def compile_file(source_path, output_path=None):
+    '''
+    Expand drytools decorators in a Python source file
+
+    Args:
+        source_path (str): Path of the module to compile
+        output_path (str): Path of the file to write (the output is returned if None)
+
+    Returns:
+        str: The generated source code
+    '''
+    with open(source_path, encoding='utf-8') as source_file:
+        source = source_file.read()
+    result = '# Generated from {} by drytools.compile - do not edit\n'.format(source_path) + compile_source(source, source_path)
+    if output_path is not None:
+        with open(output_path, 'w', encoding='utf-8') as output_file:
+            output_file.write(result)
+    return result
+
+
+def _decorator_name(node):
+    '''Terminal name of a decorator expression (eg: "args2attrs" for drytools.args2attrs(...))'''
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Name):
+        return node.id
+    elif isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def _literal_kwargs(node, allowed):
+    '''Keyword arguments of a decorator factory call, which must be literals'''
+    if not isinstance(node, ast.Call):
+        return {}
+    if node.args or any(k.arg is None for k in node.keywords):
+        raise _not_expandable()
+    result = {}
+    for keyword in node.keywords:
+        if keyword.arg not in allowed:
+            raise _not_expandable()
+        try:
+            result[keyword.arg] = ast.literal_eval(keyword.value)
+        except ValueError:
+            raise _not_expandable() from None
+    return result
+
+
+def _stmts(source):
+    return ast.parse(source).body
+
+
+def _bound_names(node):
+    '''Names bound anywhere inside a class or function definition (over-approximated)'''
+    names = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name) and isinstance(child.ctx, (ast.Store, ast.Del)):
+            names.add(child.id)
+        elif isinstance(child, ast.arg):
+            names.add(child.arg)
+        elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and (child is not node):
+            names.add(child.name)
+        elif isinstance(child, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split('.')[0] for alias in child.names)
+    return names
+
+
+def _all_params(args):
+    '''(arg, kind) pairs in signature order'''
+    result = [(a, 'positional') for a in args.posonlyargs + args.args]
+    if args.vararg:
+        result.append((args.vararg, 'var_positional'))
+    result.extend((a, 'keyword_only') for a in args.kwonlyargs)
+    if args.kwarg:
+        result.append((args.kwarg, 'var_keyword'))
+    return result
+
+
+def _defaults(args):
+    '''Dict of parameter name -> default expression'''
+    positional = args.posonlyargs + args.args
+    result = dict(zip([a.arg for a in positional[len(positional) - len(args.defaults):]], args.defaults))
+    result.update((a.arg, d) for a, d in zip(args.kwonlyargs, args.kw_defaults) if d is not None)
+    return result
+
+
+class _expander(ast.NodeTransformer):
+    def __init__(self):
+        self.hoisted = []
+        self.enclosing_names = [set()]
+        self.n_hoisted = 0
+    def visit_Module(self, node):
+        body = []
+        for stmt in node.body:
+            self.hoisted = []
+            new_stmt = self.visit(stmt)
+            body.extend(self.hoisted)
+            body.append(new_stmt)
+        node.body = body
+        return node
+    def visit_FunctionDef(self, node):
+        self.expand_decorators(node, self.expand_function_decorator)
+        self.enclosing_names.append(self.enclosing_names[-1] | _bound_names(node))
+        self.generic_visit(node)
+        self.enclosing_names.pop()
+        return node
+    def visit_ClassDef(self, node):
+        self.enclosing_names.append(self.enclosing_names[-1] | _bound_names(node))
+        self.generic_visit(node)
+        self.enclosing_names.pop()
+        self.expand_decorators(node, self.expand_class_decorator)
+        self.add_literal_repr(node)
+        return node
+    def expand_decorators(self, node, expand):
+        '''Expand decorators from the innermost outwards, stopping at the first one that can't be expanded'''
+        while node.decorator_list:
+            attempt = copy.deepcopy(node)
+            n_hoisted, n_hoisted_stmts = self.n_hoisted, len(self.hoisted)
+            try:
+                expanded = expand(attempt, attempt.decorator_list.pop())
+            except _not_expandable:
+                expanded = False
+            if not expanded:
+                self.n_hoisted = n_hoisted
+                del self.hoisted[n_hoisted_stmts:]
+                return
+            for field in node._fields:
+                setattr(node, field, getattr(attempt, field))
+
+    # Values and annotations
+    def hoist(self, expr):
+        '''Name bound (at module level, before the current statement) to the value of expr'''
+        if isinstance(expr, (ast.Name, ast.Attribute, ast.Constant)):
+            self.check_names(expr)
+            return ast.unparse(expr)
+        self.check_names(expr)
+        name = '{}{}'.format(_prefix, self.n_hoisted)
+        self.n_hoisted += 1
+        self.hoisted.append(ast.Assign(targets=[ast.Name(name, ast.Store())], value=expr))
+        return name
+    def check_names(self, expr):
+        for child in ast.walk(expr):
+            if isinstance(child, ast.Name) and (child.id in self.enclosing_names[-1]):
+                raise _not_expandable()
+    def pipeline(self, annotation):
+        '''List of pipeline elements, or None if compose_annotations would ignore the annotation'''
+        elements = annotation.elts if isinstance(annotation, (ast.Tuple, ast.List)) else [annotation]
+        if (not elements) or any(isinstance(e, (ast.Constant, ast.Tuple, ast.List, ast.Dict, ast.Set, ast.JoinedStr)) for e in elements):
+            return None
+        if any(isinstance(e, ast.Starred) for e in elements):
+            raise _not_expandable()
+        return elements
+    def element_source(self, element, var):
+        '''Statements (source) applying one pipeline element to the variable named var'''
+        if isinstance(element, ast.Call) and (_decorator_name(element) == 'check') and element.args \
+                and not any(isinstance(a, ast.Starred) for a in element.args) \
+                and all(k.arg is not None for k in element.keywords):
+            predicate = self.hoist(element.args[0])
+            call_args = [var] + [self.hoist(a) for a in element.args[1:]]
+            raises = 'ValueError'
+            for keyword in element.keywords:
+                if keyword.arg == 'raises':
+                    raises = self.hoist(keyword.value)
+                else:
+                    call_args.append('{}={}'.format(keyword.arg, self.hoist(keyword.value)))
+            return 'if not {}({}):\n    raise {}({})\n'.format(predicate, ', '.join(call_args), raises, var)
+        return '{var} = {fun}({var})\n'.format(var=var, fun=self.hoist(element))
+    def transform_source(self, elements, var, kind):
+        '''Statements (source) applying a pipeline to the parameter named var'''
+        stmts = ''.join(self.element_source(e, _prefix + 'v' if kind else var) for e in elements)
+        indented = ''.join('    ' + line + '\n' for line in stmts.splitlines())
+        if kind == 'var_positional':
+            return ('{p}values = []\nfor {p}v in {var}:\n{body}    {p}values.append({p}v)\n{var} = tuple({p}values)\n'
+                    .format(p=_prefix, var=var, body=indented))
+        elif kind == 'var_keyword':
+            return ('{p}values = {{}}\nfor {p}k, {p}v in {var}.items():\n{body}    {p}values[{p}k] = {p}v\n{var} = {p}values\n'
+                    .format(p=_prefix, var=var, body=indented))
+        return stmts
+
+    # Function decorators
+    def expand_function_decorator(self, node, decorator):
+        name = _decorator_name(decorator)
+        if name == 'compose_annotations':
+            return self.expand_compose_annotations(node, decorator)
+        elif name == 'args2attrs':
+            return self.expand_args2attrs(node, decorator)
+        return False
+    def expand_compose_annotations(self, node, decorator):
+        options = _literal_kwargs(decorator, {'combine_var_positional', 'combine_var_keyword', 'defer'})
+        if isinstance(node, ast.AsyncFunctionDef) or any(isinstance(n, (ast.Yield, ast.YieldFrom)) for n in self.own_nodes(node)):
+            raise _not_expandable()
+        source = ''
+        for arg, kind in _all_params(node.args):
+            if arg.annotation is None:
+                continue
+            elements = self.pipeline(arg.annotation)
+            if elements is None:
+                continue
+            combined = {'var_positional': 'tuple', 'var_keyword': 'dict'}.get(kind)  # the wrapper unpacks the combined result
+            if (kind == 'var_positional' and options.get('combine_var_positional')) or \
+               (kind == 'var_keyword' and options.get('combine_var_keyword')):
+                source += self.transform_source(elements, arg.arg, None) + '{0} = {1}({0})\n'.format(arg.arg, combined)
+            else:
+                source += self.transform_source(elements, arg.arg, kind if combined else None)
+            arg.annotation = None
+        new_body = _stmts(source)
+        if node.returns is not None:
+            elements = self.pipeline(node.returns)
+            if elements is not None:
+                result_var = _prefix + 'r'
+                return_source = self.transform_source(elements, result_var, None) + 'return {}\n'.format(result_var)
+                falls_through = not isinstance(node.body[-1], ast.Return)
+                self.replace_returns(node, result_var, return_source)
+                if falls_through:
+                    node.body.extend(_stmts('{} = None\n'.format(result_var) + return_source))
+                node.returns = None
+        node.body[:0] = new_body
+        return True
+    def own_nodes(self, node):
+        '''Nodes in a function body, excluding those in nested scopes'''
+        todo = list(node.body)
+        while todo:
+            child = todo.pop()
+            yield child
+            if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+                todo.extend(ast.iter_child_nodes(child))
+    def replace_returns(self, node, result_var, return_source):
+        class return_replacer(ast.NodeTransformer):
+            def visit_Return(self, ret):
+                assign = ast.Assign(targets=[ast.Name(result_var, ast.Store())], value=ret.value or ast.Constant(None))
+                return [assign] + _stmts(return_source)
+            def visit_FunctionDef(self, nested):
+                return nested
+            visit_AsyncFunctionDef = visit_ClassDef = visit_Lambda = visit_FunctionDef
+        replacer = return_replacer()
+        node.body = [new for stmt in node.body for new in _as_list(replacer.visit(stmt))]
+    def expand_args2attrs(self, node, decorator):
+        options = _literal_kwargs(decorator, {'restrict_to', 'exclude', 'expand_kw', 'lazy', 'defer'})
+        iterify_set = lambda x: {x} if isinstance(x, str) else set(x)
+        if iterify_set(options.get('lazy', ())):
+            raise _not_expandable()
+        params = _all_params(node.args)
+        if not params:
+            raise _not_expandable()
+        self_name = params[0][0].arg
+        to_copy = {arg.arg for arg, _ in params[1:]} - iterify_set(options.get('exclude', ()))
+        restrict_to = iterify_set(options.get('restrict_to', ()))
+        if restrict_to:
+            to_copy &= restrict_to
+        if not to_copy:
+            raise _not_expandable()  # args2attrs raises ValueError when decorating
+        source = ''
+        for arg, kind in params[1:]:
+            if arg.arg not in to_copy:
+                continue
+            if (kind == 'var_keyword') and options.get('expand_kw', True):
+                source += 'for {p}k, {p}v in {var}.items():\n    setattr({self}, {p}k, {p}v)\n'.format(p=_prefix, var=arg.arg, self=self_name)
+            else:
+                source += '{self}.{var} = {var}\n'.format(self=self_name, var=arg.arg)
+        node.body[:0] = _stmts(source)
+        return True
+
+    # Class decorators and mixins
+    def expand_class_decorator(self, node, decorator):
+        if _decorator_name(decorator) != 'ordered_by' or not isinstance(decorator, ast.Call):
+            return False
+        if decorator.keywords or not decorator.args:
+            raise _not_expandable()
+        attrs = []
+        for arg in decorator.args:
+            if not (isinstance(arg, ast.Constant) and isinstance(arg.value, str)):
+                raise _not_expandable()
+            attrs.append(arg.value)
+        defined = {s.name for s in node.body if isinstance(s, (ast.FunctionDef, ast.AsyncFunctionDef))} | \
+                  {t.id for s in node.body if isinstance(s, ast.Assign) for t in s.targets if isinstance(t, ast.Name)}
+        key = lambda obj: '({},)'.format(', '.join('{}.{}'.format(obj, attr) for attr in attrs))
+        source = 'def sort_key(self):\n    return {}\n'.format(key('self'))
+        for name, operator in _comparisons:
+            source += 'def __{}__(self, other):\n    return {} {} {}\n'.format(name, key('self'), operator, key('other'))
+        if ('__eq__' not in defined) and ('__hash__' not in defined):  # keep the inherited __hash__, as ordered_by does
+            if len(node.bases) > 1 or node.keywords:
+                raise _not_expandable()
+            source += '__hash__ = {}.__hash__\n'.format(ast.unparse(node.bases[0]) if node.bases else 'object')
+        node.body.extend(_stmts(source))
+        return True
+    def add_literal_repr(self, node):
+        if not any(_decorator_name(base) == 'repr_from_init' for base in node.bases):
+            return
+        defined = {s.name for s in node.body if isinstance(s, (ast.FunctionDef, ast.AsyncFunctionDef))} | \
+                  {t.id for s in node.body if isinstance(s, ast.Assign) for t in s.targets if isinstance(t, ast.Name)}
+        inits = [s for s in node.body if isinstance(s, ast.FunctionDef) and s.name == '__init__']
+        if ('__repr__' in defined) or ('repr_limits' in defined) or (len(inits) != 1):
+            return
+        init = inits[0]
+        defaults = _defaults(init.args)
+        try:
+            default_values = {k: ast.literal_eval(v) for k, v in defaults.items()}
+        except ValueError:
+            return
+        lines = ['def __repr__(self):', '    {}parts = []'.format(_prefix)]
+        for arg, kind in _all_params(init.args)[1:]:
+            attr = 'self.{}'.format(arg.arg)
+            if kind == 'var_positional':
+                lines.append('    {}parts.extend(map(repr, {}))'.format(_prefix, attr))
+            elif kind == 'var_keyword':
+                lines.append("    {p}parts.extend('{{}}={{!r}}'.format(k, v) for k, v in sorted({attr}.items()))".format(p=_prefix, attr=attr))
+            elif arg.arg in default_values:
+                lines.append('    if {} != {!r}:'.format(attr, default_values[arg.arg]))
+                lines.append("        {}parts.append('{}=' + repr({}))".format(_prefix, arg.arg, attr))
+            else:
+                lines.append('    {}parts.append(repr({}))'.format(_prefix, attr))
+        lines.append("    return '{{}}({{}})'.format(type(self).__name__, ', '.join({}parts))".format(_prefix))
+        node.body.extend(_stmts('\n'.join(lines) + '\n'))
+
+
+def _as_list(result):
+    return result if isinstance(result, list) else [result]
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m drytools.compile',
+                                     description='Expand drytools decorators into plain Python')
+    parser.add_argument('source', help='Module to compile')
+    parser.add_argument('-o', '--output', help='Output file (default: standard output)')
+    args = parser.parse_args(argv)
+    result = compile_file(args.source, args.output)
+    if args.output is None:
+        sys.stdout.write(result)
+
+
+if __name__ == '__main__':
+    main()
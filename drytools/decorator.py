@@ -9,16 +9,21 @@ from collections import ChainMap
 from functools import wraps
 from operator import eq, ne, gt, lt, ge, le
 import inspect
+import threading
+from weakref import WeakKeyDictionary, WeakSet
 
-from drytools.annotation.composition import compose_annotations
+from drytools.annotation.composition import _is_immutable, annotation_transform, compose_annotations, param_annotations
 from drytools.annotation.functions import check, iterify
-from drytools.decorator_factory import decorator_factory
+from drytools.decorator_factory import decorator_factory, memoized
+from drytools.deferred import deferral
 
-@decorator_factory
+@decorator_factory(memoize=True)
 @compose_annotations
 def args2attrs(restrict_to:(iterify, set)=(), 
                exclude:(iterify, set)=(), 
-               expand_kw=True):
+               expand_kw=True,
+               lazy:(iterify, set)=(),
+               defer=None):
     '''
     Decorator to copy method arguments to instance attributes that have the
     same names (eg: in __init__)
@@ -27,6 +32,11 @@ def args2attrs(restrict_to:(iterify, set)=(),
         restrict_to (:class:`str` or iterable): if specified, only include these named arguments
         exclude (:class:`str` or iterable): names of arguments to exclude from copying (even if they're in *include*)
         expand_kw (bool): make an individual attribute for each variable keyword argument
+        lazy (:class:`str` or iterable): names of annotated arguments to
+          coerce lazily (see below)
+        defer (bool): Analyse the method's signature when it's first
+          called instead of now (if None, the global setting, see
+          :mod:`drytools.deferred`)
 
     Returns:
         func: decorator
@@ -39,10 +49,42 @@ def args2attrs(restrict_to:(iterify, set)=(),
         >>> inst = my_cls(5,2)
         >>> inst.a, inst.b, inst.total
         (5, 2, 7)
+
+    Calls with equal (hashable) arguments return the same decorator (see
+    :func:`drytools.decorator_factory.decorator_factory`).
+
+    The wrapped function's *copied_args* attribute holds the names of
+    arguments copied to attributes with the same names, *expanded_args*
+    those of expanded variable keyword arguments and *lazy_attrs* the
+    :class:`lazy_attr` for each lazy argument.
+
+    Lazy arguments are stored raw and their annotations (see
+    :func:`drytools.annotation.composition.compose_annotations`) are applied
+    on first access to the attribute, with the result cached on the
+    instance (see :class:`lazy_attr`).  Their annotations are hidden from
+    an outer :func:`compose_annotations`, so the method body receives the
+    raw values.
+
+        >>> def parse(raw):
+        ...     print('parsing {}'.format(raw))
+        ...     return float(raw)
+        >>> class my_lazy_cls:
+        ...     @compose_annotations
+        ...     @args2attrs(lazy='b')
+        ...     def __init__(self, a: int, b: parse):
+        ...         pass
+        >>> inst = my_lazy_cls('1', '2')
+        >>> inst.a
+        1
+        >>> inst.b
+        parsing 2
+        2.0
+        >>> inst.b
+        2.0
     '''
     class to_replace_with_empty_dict:
         pass
-    def decorator(fun):
+    def copy_args(fun):
         sig = inspect.signature(fun)
         params_to_copy = set(list(sig.parameters)[1:]) - exclude
         if restrict_to:
@@ -64,8 +106,25 @@ def args2attrs(restrict_to:(iterify, set)=(),
             expand_param = lambda param_name: param_name in var_kw_params
         else:
             expand_param = lambda param_name: False
+        def lazy_tx(param):
+            if (param.name not in params_to_copy) or expand_param(param.name):
+                raise ValueError('Lazy parameter is not copied to a single attribute: {}'.format(param.name))
+            val_tx = annotation_transform(param.annotation)
+            if val_tx is None:
+                raise ValueError('Lazy parameter has no callable annotation: {}'.format(param.name))
+            if param.kind is inspect._VAR_POSITIONAL:
+                return lambda args: tuple(map(val_tx, args))
+            elif param.kind is inspect._VAR_KEYWORD:
+                return lambda kwargs: {k: val_tx(v) for k, v in kwargs.items()}
+            return val_tx
+        if lazy - set(sig.parameters):
+            raise ValueError('Unknown lazy parameters: {}'.format(sorted(lazy - set(sig.parameters))))
+        lazy_attrs = {name: lazy_attr(name, lazy_tx(sig.parameters[name])) for name in lazy}
+        pretransformed_attrs = {}  # name -> validated_attr whose transform is applied before copying (see validated_attrs)
         @wraps(fun)
         def wrapped(self, *args, **kwargs):
+            if lazy_attrs:
+                _install_lazy_attrs(type(self), wrapped)
             for name, value in ChainMap(sig.bind(self, *args, **kwargs).arguments, defaults).items():
                 if name in params_to_copy:
                     if value is to_replace_with_empty_dict:
@@ -73,23 +132,415 @@ def args2attrs(restrict_to:(iterify, set)=(),
                     if expand_param(name):
                         for k, v in value.items():
                             setattr(self, k, v)
+                    elif name in lazy_attrs:
+                        lazy_attrs[name].set_raw(self, value)
+                    elif name in pretransformed_attrs:
+                        pretransformed_attrs[name].set_raw(self, value)
                     else:
                         setattr(self, name, value)
             return fun(self, *args, **kwargs)
+        wrapped.copied_args = frozenset(name for name in params_to_copy if not expand_param(name))
+        wrapped.expanded_args = frozenset(filter(expand_param, params_to_copy))
+        wrapped.lazy_attrs = lazy_attrs
+        wrapped.pretransformed_attrs = pretransformed_attrs
+        if lazy_attrs:
+            wrapped.__annotations__ = {k: v for k, v in fun.__annotations__.items() if k not in lazy_attrs}
+            wrapped.__signature__ = sig.replace(parameters=[p.replace(annotation=inspect._empty) if p.name in lazy_attrs else p
+                                                            for p in sig.parameters.values()])
         return wrapped
+    def decorator(fun):
+        return deferral(copy_args, fun, defer)
     return decorator
 
+class lazy_attr:
+    '''
+    Non-data descriptor that applies a transform to an instance's raw value
+    on first access and caches the result on the instance (so later reads
+    are ordinary attribute lookups)
+
+    Args:
+        name (str): Attribute name
+        tx (*callable*): Transform applied to the raw value
+
+    Used by :func:`args2attrs` (with the *lazy* argument), which installs the
+    descriptor on the class defining the decorated method when the method
+    is first called for an instance of that class (or a subclass).
+    :class:`TypeError` is raised instead if the class already has an
+    attribute with the same name (eg: a class constant or a
+    :class:`validated_attr`).  Threads reading the attribute concurrently
+    for the first time may each apply the transform, but they all get a
+    value (the last one computed is cached).
+    '''
+    def __init__(self, name, tx):
+        self.name = name
+        self.raw_name = '_lazy_raw_' + name
+        self.tx = tx
+    def set_raw(self, instance, value):
+        '''
+        Store the raw value for an instance
+        '''
+        instance_dict = instance.__dict__
+        instance_dict.pop(self.name, None)
+        instance_dict[self.raw_name] = value
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        instance_dict = instance.__dict__
+        try:
+            raw = instance_dict[self.raw_name]
+        except KeyError:
+            try:
+                return instance_dict[self.name]  # transformed by another thread since this lookup started
+            except KeyError:
+                raise AttributeError(self.name) from None
+        value = instance_dict[self.name] = self.tx(raw)
+        instance_dict.pop(self.raw_name, None)
+        return value
+
+_lazy_installed = WeakKeyDictionary()  # class -> args2attrs wrappers whose lazy_attrs it has
+_lazy_install_lock = threading.Lock()
+
+def _install_lazy_attrs(cls, method):
+    '''Install the lazy_attrs of an args2attrs-wrapped method, once per class (see :class:`lazy_attr`)'''
+    installed = _lazy_installed.get(cls)
+    if (installed is not None) and (method in installed):
+        return
+    with _lazy_install_lock:
+        owner = next((c for c in cls.__mro__ if _defines(c, method)), cls)
+        for name, descriptor in method.lazy_attrs.items():
+            existing = next((vars(c)[name] for c in owner.__mro__ if name in vars(c)), None)
+            if existing is None:
+                setattr(owner, name, descriptor)
+            elif existing is not descriptor:
+                raise TypeError('Lazy argument {!r} clashes with attribute {!r} of class {}'.format(name, existing, owner.__name__))
+            if inspect.getattr_static(cls, name, None) is not descriptor:
+                raise TypeError('Lazy argument {!r} is hidden by an attribute of class {}'.format(name, cls.__name__))
+        _lazy_installed.setdefault(cls, WeakSet()).add(method)
+
+def _defines(cls, method):
+    '''True if method, or a function wrapping it, is an attribute of cls'''
+    for value in vars(cls).values():
+        seen = set()
+        while (value is not None) and (id(value) not in seen):
+            if value is method:
+                return True
+            seen.add(id(value))
+            value = getattr(value, '__wrapped__', None)
+    return False
+
+def validated_attrs(cls):
+    '''
+    Class decorator to apply the annotations of ``__init__`` parameters
+    (see :func:`drytools.annotation.composition.compose_annotations`) to
+    the attributes with the same names every time they are assigned
+
+    Args:
+        cls (:class:`type`): Class to decorate
+
+    Returns:
+        :class:`type`: *cls*, with a :class:`validated_attr` for each
+        attribute copied from an annotated ``__init__`` parameter (all
+        annotated parameters unless ``__init__`` is decorated with
+        :func:`args2attrs`, in which case only those it copies)
+
+    Example:
+        >>> from operator import ge
+        >>> @validated_attrs
+        ... class person:
+        ...     @args2attrs
+        ...     def __init__(self, name: check(isinstance, str, raises=TypeError),
+        ...                        age: (int, check(ge, 0))):
+        ...         pass
+        >>> p = person('Ann', '31')
+        >>> p.age
+        31
+        >>> p.age = -1
+        Traceback (most recent call last):
+            ...
+        ValueError: -1
+
+    The annotations run once per assignment, including the assignments made
+    by :func:`args2attrs`, so :func:`compose_annotations` is only needed
+    for annotations used by the body of ``__init__``.  If it's applied
+    outside :func:`args2attrs`, the values it copies have already been
+    transformed, so they're stored without running the annotations again
+    (they're registered in the *pretransformed_attrs* attribute of the
+    :func:`args2attrs` wrapper).  Without :func:`args2attrs`, the body of
+    ``__init__`` assigns the attributes, so :class:`TypeError` is raised if
+    :func:`compose_annotations` also transforms them (the values would pass
+    through their annotations twice).
+    '''
+    init = cls.__init__
+    annotations = param_annotations(init)
+    params = list(inspect.signature(init).parameters.values())[1:]
+    copied_args = getattr(init, 'copied_args', None)
+    if copied_args is not None:
+        args2attrs_level, applied_before_copy = _args2attrs_level(init)
+    else:
+        composed = sorted(p.name for p in params if p.name in getattr(init, 'composed_transforms', {}))
+        if composed:
+            raise TypeError('Parameters of __init__ of {} are transformed by compose_annotations and would be '
+                            'transformed again when assigned (use args2attrs to copy them): {}'.format(cls.__name__, composed))
+    for param in params:
+        if ((copied_args is None) or (param.name in copied_args)) and (param.name in annotations):
+            tx = annotation_transform(annotations[param.name])
+            if tx is None:
+                continue
+            if param.kind is inspect._VAR_POSITIONAL:
+                tx = (lambda val_tx: lambda args: tuple(map(val_tx, args)))(tx)
+            elif param.kind is inspect._VAR_KEYWORD:
+                tx = (lambda val_tx: lambda kwargs: {k: val_tx(v) for k, v in kwargs.items()})(tx)
+            descriptor = validated_attr(tx)
+            setattr(cls, param.name, descriptor)
+            descriptor.__set_name__(cls, param.name)
+            if (copied_args is not None) and (param.name in applied_before_copy):
+                args2attrs_level.pretransformed_attrs[param.name] = descriptor
+    return cls
+
+def _args2attrs_level(init):
+    '''
+    The :func:`args2attrs` wrapper among the decorators of *init*, and the
+    transforms applied to arguments before it copies them (by
+    :func:`compose_annotations` applied outside it)
+    '''
+    levels = [init]
+    while hasattr(levels[-1], '__wrapped__'):
+        levels.append(levels[-1].__wrapped__)
+    args2attrs_level = [level for level in levels if 'copied_args' in vars(level)][-1]
+    inner_txs = getattr(args2attrs_level, 'composed_transforms', {})
+    return args2attrs_level, {k: v for k, v in getattr(init, 'composed_transforms', {}).items()
+                              if (k != 'return') and (k not in inner_txs)}
+
+@decorator_factory
+def bulk_constructor(call_init=False):
+    '''
+    Class decorator adding a classmethod *from_rows* which builds many
+    instances of a class whose ``__init__`` is decorated with
+    :func:`args2attrs`
+
+    Args:
+        call_init (bool): Also run the body of ``__init__`` (ie: the
+          original function, without its decorators) for each instance
+
+    Returns:
+        func: decorator
+
+    ``cls.from_rows(rows, as_generator=False)`` takes an iterable of rows,
+    each a tuple of positional arguments or a dict of keyword arguments,
+    and returns a list (or a generator) of instances.  The arguments are
+    bound to the signature of ``__init__`` and the resulting attributes
+    are stored as ``__init__`` would store them, including the transforms
+    of :func:`drytools.annotation.composition.compose_annotations`
+    (validations are never skipped), :class:`lazy_attr` and
+    :class:`validated_attr`.  Instances are created with ``__new__`` and
+    filled in directly, with the plan for doing so worked out on the first
+    call (instead of binding arguments and merging defaults per instance).
+    Transformed default values are computed once if they're immutable and
+    not in the *fresh_defaults* of :func:`compose_annotations`.
+
+    Example:
+        >>> @bulk_constructor
+        ... class person:
+        ...     @compose_annotations
+        ...     @args2attrs
+        ...     def __init__(self, name, age: int, height: float=1.7):
+        ...         pass
+        >>> people = person.from_rows([('Ann', '31'), {'name': 'Bob', 'age': 45, 'height': 2}])
+        >>> [vars(p) for p in people]
+        [{'name': 'Ann', 'age': 31, 'height': 1.7}, {'name': 'Bob', 'age': 45, 'height': 2.0}]
+    '''
+    def decorator(cls):
+        plans = WeakKeyDictionary()  # per class (including subclasses)
+        @classmethod
+        def from_rows(cls, rows, as_generator=False):
+            try:
+                plan = plans[cls]
+            except KeyError:
+                plan = plans[cls] = _bulk_plan(cls, call_init)
+            instances = map(plan.build, rows)
+            return instances if as_generator else list(instances)
+        cls.from_rows = from_rows
+        return cls
+    return decorator
+
+class _bulk_plan:
+    '''How :func:`bulk_constructor` builds instances of a class'''
+    def __init__(self, cls, call_init):
+        init = cls.__init__
+        if not hasattr(init, 'copied_args'):
+            raise TypeError('__init__ of {} is not decorated with args2attrs'.format(cls.__name__))
+        args2attrs_level, self.attr_txs = _args2attrs_level(init)  # attr_txs: applied before args2attrs copies
+        all_txs = {k: v for k, v in getattr(init, 'composed_transforms', {}).items() if k != 'return'}
+        self.body_txs = all_txs if call_init else self.attr_txs
+        self.body = inspect.unwrap(init) if call_init else None
+        self.cls = cls
+        self.params = list(inspect.signature(init).parameters.values())[1:]
+        self.names = [p.name for p in self.params]
+        self.positional = [p.name for p in self.params if p.kind in (inspect._POSITIONAL_ONLY, inspect._POSITIONAL_OR_KEYWORD)]
+        self.keywords = {p.name for p in self.params if p.kind in (inspect._POSITIONAL_OR_KEYWORD, inspect._KEYWORD_ONLY)}
+        self.var_positional = next((p.name for p in self.params if p.kind is inspect._VAR_POSITIONAL), None)
+        self.var_keyword = next((p.name for p in self.params if p.kind is inspect._VAR_KEYWORD), None)
+        self.defaults = {p.name: p.default for p in self.params if p.default is not inspect._empty}
+        self.tx_defaults = {}
+        fresh = getattr(init, 'fresh_defaults', frozenset())
+        for name, default in self.defaults.items():
+            if (name in self.body_txs) and (name not in fresh):
+                try:
+                    tx_default = self.body_txs[name](default)
+                except Exception:
+                    continue  # transformed (raising the exception) for each row that omits it
+                if _is_immutable(tx_default):
+                    self.tx_defaults[name] = tx_default
+        self.copied = init.copied_args - set(init.lazy_attrs)
+        self.expanded = init.expanded_args
+        self.lazy_attrs = init.lazy_attrs
+        if self.lazy_attrs:
+            _install_lazy_attrs(cls, args2attrs_level)
+        pretransformed = args2attrs_level.pretransformed_attrs
+        self.validated = {name: attr.tx for name in init.copied_args
+                          for attr in [inspect.getattr_static(cls, name, None)]
+                          if isinstance(attr, validated_attr) and (pretransformed.get(name) is not attr)}
+        self.simple = (not self.var_positional) and (len(self.positional) == len(self.names))
+    def arguments(self, row):
+        '''Dict of argument values (including defaults) and the set of names given defaults'''
+        if isinstance(row, dict):
+            args, kwargs = (), row
+        else:
+            args, kwargs = row, {}
+        n_positional = len(self.positional)
+        if self.simple and (len(args) == n_positional) and not kwargs:
+            return dict(zip(self.positional, args)), ()
+        if (len(args) > n_positional) and not self.var_positional:
+            raise TypeError('too many positional arguments: {!r}'.format(row))
+        values = dict(zip(self.positional, args))
+        if self.var_positional:
+            values[self.var_positional] = tuple(args[n_positional:])
+        extra = {}
+        for k, v in kwargs.items():
+            if k in self.keywords:
+                if k in values:
+                    raise TypeError('multiple values for argument {!r}'.format(k))
+                values[k] = v
+            elif self.var_keyword:
+                extra[k] = v
+            else:
+                raise TypeError('unexpected keyword argument {!r}'.format(k))
+        if self.var_keyword:
+            values[self.var_keyword] = extra
+        defaulted = set()
+        for name in self.names:
+            if name not in values:
+                if name not in self.defaults:
+                    raise TypeError('missing argument {!r}: {!r}'.format(name, row))
+                values[name] = self.defaults[name]
+                defaulted.add(name)
+        return values, defaulted
+    def build(self, row):
+        values, defaulted = self.arguments(row)
+        tx_values = dict(values)
+        for name, tx in self.body_txs.items():
+            if name in defaulted and name in self.tx_defaults:
+                tx_values[name] = self.tx_defaults[name]
+            else:
+                tx_values[name] = tx(values[name])
+        instance = self.cls.__new__(self.cls)
+        instance_dict = instance.__dict__
+        for name in self.names:
+            value = tx_values[name] if name in self.attr_txs else values[name]
+            if name in self.validated:
+                value = self.validated[name](value)
+            if name in self.copied:
+                instance_dict[name] = value
+            elif name in self.expanded:
+                instance_dict.update(value)
+            elif name in self.lazy_attrs:
+                self.lazy_attrs[name].set_raw(instance, value)
+        if self.body is not None:
+            positional = [tx_values[name] for name in self.positional]
+            if self.var_positional:
+                positional.extend(tx_values[self.var_positional])
+            keyword = {p.name: tx_values[p.name] for p in self.params if p.kind is inspect._KEYWORD_ONLY}
+            if self.var_keyword:
+                keyword.update(tx_values[self.var_keyword])
+            self.body(instance, *positional, **keyword)
+        return instance
+
+class validated_attr:
+    '''
+    Data descriptor that passes values assigned to an attribute through an
+    annotation (see :func:`drytools.annotation.composition.compose_annotations`)
+
+    Args:
+        annotation: A callable, or a sequence of callables (pipeline)
+
+    Values are stored in the instance's ``__dict__``.  Usually installed by
+    :func:`validated_attrs`, but can also be used directly in a class body.
+
+    Example:
+        >>> class temperature:
+        ...     celsius = validated_attr((float, check(lambda t: t >= -273.15)))
+        >>> t = temperature()
+        >>> t.celsius = '21.5'
+        >>> t.celsius
+        21.5
+    '''
+    def __init__(self, annotation):
+        self.tx = annotation_transform(annotation)
+        if self.tx is None:
+            raise TypeError('Annotation is not callable: {!r}'.format(annotation))
+        self.name = None
+    def __set_name__(self, owner, name):
+        self.name = name
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+    def set_raw(self, instance, value):
+        '''
+        Store a value for an instance without transforming it (eg: one
+        that has already been transformed)
+        '''
+        instance.__dict__[self.name] = value
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = self.tx(value)
+    def __delete__(self, instance):
+        try:
+            del instance.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+@memoized
 @compose_annotations
-def ordered_by(*attrs: check(isinstance, str, raises=TypeError)):
+def ordered_by(*attrs: check(isinstance, str, raises=TypeError), cache_key=False):
     '''
     Class decorator factory for adding comparison methods based on one or more attributes
 
     Args:
         attrs (str): Name(s) of attribute(s) to use for ordering instances
+        cache_key (bool): Compute each instance's key (tuple of *attrs*
+          values) once and cache it on the instance.  Assigning to (or
+          deleting) any of *attrs* invalidates the cached key (as with
+          other attribute updates, assignments concurrent with comparisons
+          of the same instance need external synchronization).  The key
+          is cached in the instance's ``__dict__`` (so it appears in
+          :func:`vars`, under a name starting with ``'_ordered_by_key:'``),
+          and :class:`TypeError` is raised for classes whose instances
+          have no ``__dict__`` (eg: classes with ``__slots__``).
 
     Returns:
         func: Function to add comparison methods to the class
 
+    Calls with equal arguments return the same function (see
+    :func:`drytools.decorator_factory.memoized`).
+
+    The class also gets a *sort_key* method returning the key, so
+    ``sorted(instances, key=cls.sort_key)`` sorts without calling the
+    comparison methods, and a *sort_attrs* attribute holding *attrs* (see
+    :mod:`drytools.sorting`).
+
     Example:
         >>> @ordered_by('name')
         ... class my_cls:
@@ -99,21 +550,52 @@ def ordered_by(*attrs: check(isinstance, str, raises=TypeError)):
         ...         return '{}({})'.format(type(self).__name__, repr(self.name))
         >>> sorted([my_cls('foo'), my_cls('bar'), my_cls('bax')])
         [my_cls('bar'), my_cls('bax'), my_cls('foo')]
+        >>> my_cls('foo').sort_key()
+        ('foo',)
     '''
     if not attrs:
         raise TypeError('No attrs')
     def comp_val(instance):
         return tuple(getattr(instance, attr) for attr in attrs)
+    if cache_key:
+        attr_set = set(attrs)
+        cached_key_name = _cached_key_prefix + ','.join(attrs)  # classes ordered by other attrs use other names
+        def sort_key(self):
+            instance_dict = self.__dict__
+            try:
+                return instance_dict[cached_key_name]
+            except KeyError:
+                key = instance_dict[cached_key_name] = comp_val(self)
+                return key
+    else:
+        sort_key = comp_val
     def decorator(cls):
+        if cache_key and not any('__dict__' in vars(c) for c in cls.__mro__):
+            raise TypeError('cache_key requires instances with a __dict__ (eg: no __slots__): {}'.format(cls.__name__))
         def add_comparison_method(comparison):
             method_name = '__{comparison.__name__}__'.format(**locals())
-            fun = lambda self, other: comparison(comp_val(self), comp_val(other))
+            fun = lambda self, other: comparison(sort_key(self), sort_key(other))
             setattr(cls, method_name, fun)
         for comparison in [eq, ne, gt, lt, ge, le]:
             add_comparison_method(comparison)
+        cls.sort_key = sort_key
+        cls.sort_attrs = attrs
+        if cache_key:
+            base_setattr, base_delattr = cls.__setattr__, cls.__delattr__
+            def __setattr__(self, name, value):
+                base_setattr(self, name, value)
+                if name in attr_set:
+                    self.__dict__.pop(cached_key_name, None)
+            def __delattr__(self, name):
+                base_delattr(self, name)
+                if name in attr_set:
+                    self.__dict__.pop(cached_key_name, None)
+            cls.__setattr__, cls.__delattr__ = __setattr__, __delattr__
         return cls
     return decorator
 
+_cached_key_prefix = '_ordered_by_key:'
+
 
 if __name__ == '__main__':
     import doctest
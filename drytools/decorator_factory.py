@@ -4,15 +4,18 @@
 decorator_factory - Tools for making decorators
 ===============================================
 '''
-from functools import wraps
+from functools import lru_cache, partial, wraps
 
-def decorator_factory(fun):
+def decorator_factory(fun=None, *, memoize=False, maxsize=128):
     '''
     Decorator to make parentheses optional when applying a decorator factory
     which has optional arguments.
 
     Args:
         fun (func): Function that returns a decorator
+        memoize (bool): Return the same decorator for calls with equal
+          (hashable) arguments (see :func:`memoized`)
+        maxsize (int): Maximum number of decorators to keep if *memoize* is True
 
     Returns:
         func: Decorator factory which, if it is called with a single callable parameter, returns a wrapped function instead of a decorator
@@ -54,7 +57,35 @@ def decorator_factory(fun):
         calling my_fun_decorated_empty_parentheses
         >>> my_fun_decorated_no_parentheses()
         calling my_fun_decorated_no_parentheses
+
+    With *memoize*, the factory is only called once for each set of
+    arguments (while its result stays in the cache), so decorators that
+    precompute state from their arguments share it:
+
+        >>> @decorator_factory(memoize=True)
+        ... def tagged(tag='default'):
+        ...     print('making decorator {}'.format(tag))
+        ...     def decorator(fun):
+        ...         fun.tag = tag
+        ...         return fun
+        ...     return decorator
+        >>> tagged('a') is tagged('a')
+        making decorator a
+        True
+        >>> @tagged
+        ... def f():
+        ...     pass
+        making decorator default
+        >>> @tagged
+        ... def g():
+        ...     pass
+        >>> tagged.cache_info()
+        CacheInfo(hits=2, misses=2, maxsize=128, currsize=2)
     '''
+    if fun is None:
+        return partial(decorator_factory, memoize=memoize, maxsize=maxsize)
+    if memoize:
+        fun = memoized(fun, maxsize=maxsize)
     @wraps(fun)
     def decorator_or_decorated_function(*args, **kwargs):
         if (not kwargs) and (len(args) == 1) and callable(args[0]):
@@ -63,6 +94,47 @@ def decorator_factory(fun):
             return fun(*args, **kwargs) # decorator
     return decorator_or_decorated_function
 
+def memoized(fun=None, *, maxsize=128):
+    '''
+    Decorator to cache the results of a function for hashable arguments
+    (eg: a factory whose results can be shared)
+
+    Args:
+        fun (func): Function to cache the results of
+        maxsize (int): Maximum number of results to keep (the least
+          recently used are discarded first).  If None, there's no limit.
+
+    Returns:
+        func: Function returning the cached result for arguments equal (and
+        of the same types) to those of a previous call, and calling *fun*
+        otherwise.  Calls with unhashable arguments aren't cached.  Its
+        *cache_info* and *cache_clear* methods are those of
+        :func:`functools.lru_cache`.
+
+    Example:
+        >>> @memoized(maxsize=2)
+        ... def make_list(*args):
+        ...     return list(args)
+        >>> make_list(1, 2) is make_list(1, 2)
+        True
+        >>> make_list([1]) is make_list([1])  # unhashable
+        False
+        >>> make_list.cache_info()
+        CacheInfo(hits=1, misses=1, maxsize=2, currsize=1)
+    '''
+    if fun is None:
+        return partial(memoized, maxsize=maxsize)
+    cached = lru_cache(maxsize=maxsize, typed=True)(fun)
+    @wraps(fun)
+    def memoized_fun(*args, **kwargs):
+        try:
+            hash((args, tuple(kwargs.values())))
+        except TypeError:
+            return fun(*args, **kwargs)
+        return cached(*args, **kwargs)
+    memoized_fun.cache_info, memoized_fun.cache_clear = cached.cache_info, cached.cache_clear
+    return memoized_fun
+
 
 
 if __name__ == '__main__':
@@ -0,0 +1,161 @@
+'''
+===========================================
+deferred - Decoration deferred to first use
+===========================================
+
+Decorators that analyse signatures
+(:func:`drytools.annotation.composition.compose_annotations` and
+:func:`drytools.decorator.args2attrs`) can defer that work from import
+time to the first call, for processes that only use some of the decorated
+functions.  Enable this for every such decorator with :func:`set_defer`,
+or for one with its *defer* argument.
+
+A deferred decoration returns a trampoline, which decorates the function
+when it's first called (or when a decorator is applied on top of it, or
+when it's looked up as a method) and then replaces itself with the
+decorated function, as the attribute of its module or class, so later
+calls go straight to the decorated function.  Errors the decorator would
+have raised at import time are raised by the first call instead, or by
+:func:`validate_all`.
+
+Example:
+    >>> from drytools import compose_annotations
+    >>> from drytools.deferred import DecorationError, validate_all
+    >>> @compose_annotations(defer=True, fresh_defaults='no_such_parameter')
+    ... def f(x: int):
+    ...     return x
+    >>> try:
+    ...     validate_all()
+    ... except DecorationError as e:  # other modules' decorations may be pending too
+    ...     print([(fun.__name__, error) for fun, error in e.errors if fun is f.__wrapped__])
+    [('f', ValueError("Unknown fresh_defaults: ['no_such_parameter']"))]
+'''
+from functools import update_wrapper
+from itertools import count
+import sys
+import threading
+from weakref import WeakValueDictionary
+
+_default_defer = False
+_pending = WeakValueDictionary()  # trampolines not yet resolved, by creation order
+_ids = count()
+_lock = threading.RLock()  # decorating a function can resolve the trampolines it wraps
+
+
+class DecorationError(Exception):
+    '''
+    Raised by :func:`validate_all` when deferred decorations fail
+
+    Attributes:
+        errors (list): (undecorated function, exception) pairs, in the
+          order the functions were decorated
+    '''
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('{} decoration{} failed: {}'.format(
+            len(errors), '' if len(errors) == 1 else 's',
+            '; '.join('{}: {!r}'.format(fun.__qualname__, e) for fun, e in errors)))
+
+
+def set_defer(defer):
+    '''
+    Set whether decorators defer their work when their *defer* argument is None
+
+    Args:
+        defer (bool): New setting
+
+    Returns:
+        bool: The previous setting
+    '''
+    global _default_defer
+    with _lock:
+        previous, _default_defer = _default_defer, bool(defer)
+    return previous
+
+def deferral(decorate, fun, defer=None):
+    '''
+    Apply a decorator now or when first needed
+
+    Args:
+        decorate (func): Decorator
+        fun (func): Function to decorate
+        defer (bool): Whether to defer decoration (if None, the global
+          setting, see :func:`set_defer`)
+
+    Returns:
+        func: ``decorate(resolved(fun))``, or a trampoline that returns it
+        when first needed (see module documentation)
+    '''
+    if _default_defer if defer is None else defer:
+        return _trampoline(decorate, fun)
+    return decorate(resolved(fun))
+
+def resolved(fun):
+    '''
+    Returns:
+        func: *fun*, with its deferred decoration (if any) applied
+    '''
+    return fun.resolve() if isinstance(fun, _trampoline) else fun
+
+def validate_all():
+    '''
+    Apply all deferred decorations that haven't been applied yet
+
+    Raises:
+        :class:`DecorationError`: if any of them fail
+    '''
+    with _lock:
+        pending = list(_pending.values())
+    errors = []
+    for trampoline in pending:
+        try:
+            trampoline.resolve()
+        except Exception as e:
+            errors.append((trampoline.__wrapped__, e))
+    if errors:
+        raise DecorationError(errors) from errors[0][1]
+
+
+class _trampoline:
+    '''Callable standing in for a function until its decoration is applied'''
+    def __init__(self, decorate, fun):
+        update_wrapper(self, fun)
+        self._decorate = decorate
+        self._decorated = None
+        self._owner = None
+        self._id = next(_ids)
+        with _lock:
+            _pending[self._id] = self
+    def __set_name__(self, owner, name):
+        self._owner, self._name = owner, name
+    def resolve(self):
+        decorated = self._decorated
+        if decorated is None:
+            with _lock:
+                if self._decorated is None:
+                    self._decorated = self._decorate(resolved(self.__wrapped__))
+                    _pending.pop(self._id, None)
+                    self._replace_references()
+                decorated = self._decorated
+        return decorated
+    def _replace_references(self):
+        if self._owner is not None:
+            namespace, name = self._owner, self._name
+        elif self.__qualname__ == self.__name__:  # module-level function
+            namespace, name = sys.modules.get(self.__module__), self.__name__
+        else:
+            return
+        if (namespace is not None) and (vars(namespace).get(name) is self):
+            setattr(namespace, name, self._decorated)
+    def __get__(self, instance, owner=None):
+        decorated = self.resolve()
+        return decorated.__get__(instance, owner) if hasattr(decorated, '__get__') else decorated
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+    def __repr__(self):
+        return '<deferred decoration of {}>'.format(self.__qualname__)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,139 @@
+'''
+=================================================
+dispatch - Multiple dispatch based on annotations
+=================================================
+
+Chooses among implementations of a function according to the types of
+all its positional arguments, as declared by the implementations'
+parameter annotations.  The implementation chosen for each tuple of
+argument types is cached, so repeated calls with the same types cost one
+dictionary lookup.
+
+Example:
+    >>> @dispatch
+    ... def combine(a, b):
+    ...     return 'anything'
+    >>> @combine.register
+    ... def _(a: int, b: int):
+    ...     return 'ints'
+    >>> @combine.register
+    ... def _(a: str, b: object):
+    ...     return 'str first'
+    >>> combine(1, 2), combine(True, 2), combine('x', 2), combine(1.5, 2)
+    ('ints', 'ints', 'str first', 'anything')
+'''
+from functools import update_wrapper
+import inspect
+from types import MethodType
+
+from drytools.annotation.composition import param_annotations
+
+
+class dispatch:
+    '''
+    Decorator making a function dispatch on the types of its positional
+    arguments
+
+    Args:
+        fun (func): Default implementation, called when no registered
+                    implementation matches
+
+    Implementations are added with the :meth:`register` decorator.  The
+    annotation of each positional parameter of an implementation is the
+    type its argument must be an instance of (annotations that aren't
+    classes, and missing annotations, match anything), and the annotation of
+    its variable positional parameter (if any) is the type of each extra
+    positional argument.  Annotations applied
+    by :func:`drytools.annotation.composition.compose_annotations` count
+    too, so a composed implementation is chosen for arguments that already
+    have the annotated types.  Implementations must also accept the number
+    of positional arguments given.  Keyword arguments are passed on but
+    don't affect the choice.
+
+    The most specific matching implementation is called, ie: the one whose
+    parameter types are all subclasses of those of every other matching
+    implementation.  If there is no such implementation, :class:`TypeError`
+    is raised.
+    '''
+    def __init__(self, fun):
+        update_wrapper(self, fun)
+        self.default = fun
+        self._implementations = []
+        self._cache = {}
+    def register(self, fun):
+        '''
+        Decorator to add an implementation
+
+        Returns:
+            func: *fun* (unchanged)
+        '''
+        annotations = param_annotations(fun)
+        params = list(inspect.signature(fun).parameters.values())
+        positional = [p for p in params if p.kind in (inspect._POSITIONAL_ONLY, inspect._POSITIONAL_OR_KEYWORD)]
+        param_type = lambda p: annotations[p.name] if isinstance(annotations.get(p.name), type) else object
+        types = tuple(map(param_type, positional))
+        min_args = sum(p.default is inspect._empty for p in positional)
+        rest = next((param_type(p) for p in params if p.kind is inspect._VAR_POSITIONAL), None)  # type of extra arguments
+        self._implementations.append((types, min_args, rest, fun))
+        self._cache = {}  # replaced, not cleared, so concurrent calls never see a partial cache
+        return fun
+    @property
+    def registry(self):
+        '''
+        Returns:
+            list: (parameter types, implementation) for each registered implementation
+        '''
+        return [(types, fun) for types, _, _, fun in self._implementations]
+    def dispatch(self, *arg_types):
+        '''
+        Returns:
+            func: the implementation called for positional arguments of types *arg_types*
+        '''
+        cache = self._cache
+        try:
+            return cache[arg_types]
+        except KeyError:
+            pass
+        n_args = len(arg_types)
+        matches = [(types, fun) for types, fun in (_expanded(*implementation, n_args) for implementation in self._implementations)
+                   if (types is not None) and all(map(issubclass, arg_types, types))]
+        best = [fun for types, fun in matches if all(_at_least_as_specific(types, other, n_args) for other, _ in matches)]
+        if best:
+            result = best[-1]  # the last registered, if several are equally specific
+        elif matches:
+            candidates = [types for types, _ in matches if not any(_more_specific(other, types, n_args) for other, _ in matches)]
+            raise TypeError('Ambiguous dispatch for argument types {}: {}'.format(arg_types, candidates))
+        else:
+            result = self.default
+        cache[arg_types] = result
+        return result
+    def __get__(self, instance, owner=None):
+        return self if instance is None else MethodType(self, instance)
+    def __call__(self, *args, **kwargs):
+        try:
+            fun = self._cache[tuple(map(type, args))]
+        except KeyError:
+            fun = self.dispatch(*map(type, args))
+        return fun(*args, **kwargs)
+
+
+def _expanded(types, min_args, rest, fun, n_args):
+    '''Parameter types of an implementation for n_args positional arguments (None if it doesn't accept them) and the implementation'''
+    if n_args < min_args:
+        return None, fun
+    if n_args > len(types):
+        if rest is None:
+            return None, fun
+        return types + (rest,) * (n_args - len(types)), fun
+    return types[:n_args], fun
+
+def _at_least_as_specific(types, other, n_args):
+    return all(map(issubclass, types[:n_args], other[:n_args]))
+
+def _more_specific(types, other, n_args):
+    return _at_least_as_specific(types, other, n_args) and not _at_least_as_specific(other, types, n_args)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
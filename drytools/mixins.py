@@ -5,6 +5,82 @@ mixins - add Python standard methods
 ====================================
 '''
 import inspect
+from operator import attrgetter
+import reprlib
+from weakref import WeakKeyDictionary
+
+def bounded_repr(**limits):
+    '''
+    Factory for :class:`reprlib.Repr` instances, for use as
+    :attr:`repr_from_init.repr_limits`
+
+    Args:
+        limits: :class:`reprlib.Repr` attributes to override (eg: maxlevel,
+                maxlist, maxstring, maxother).  *maxtuple* and *maxdict*
+                also limit the number of variable positional and keyword
+                arguments shown.
+
+    Returns:
+        :class:`reprlib.Repr`: configured instance
+
+    Example:
+        >>> bounded_repr(maxlist=2).repr(list(range(1000)))
+        '[0, 1, ...]'
+    '''
+    result = reprlib.Repr()
+    for name, value in limits.items():
+        if not hasattr(result, name):
+            raise TypeError('Unknown limit: {}'.format(name))
+        setattr(result, name, value)
+    return result
+
+class _init_plan:
+    '''Parameters of a class's __init__ (excluding self), analysed once per class (see :func:`init_plan`)'''
+    def __init__(self, cls):
+        self.params = tuple(inspect.signature(cls.__init__).parameters.values())[1:]
+        names = [p.name for p in self.params]
+        if len(names) > 1:
+            self.get_args = attrgetter(*names)
+        else:
+            self.get_args = (lambda obj: (getattr(obj, names[0]),)) if names else (lambda obj: ())
+        kinds = [p.kind for p in self.params]
+        self.n_positional = sum(k in (inspect._POSITIONAL_ONLY, inspect._POSITIONAL_OR_KEYWORD) for k in kinds)
+        self.var_positional = kinds.index(inspect._VAR_POSITIONAL) if inspect._VAR_POSITIONAL in kinds else None
+        self.keyword_only = [(i, p.name) for i, p in enumerate(self.params) if p.kind is inspect._KEYWORD_ONLY]
+        self.var_keyword = kinds.index(inspect._VAR_KEYWORD) if inspect._VAR_KEYWORD in kinds else None
+    def call_args(self, args):
+        '''(positional, keyword) constructor arguments from a tuple with one value per parameter'''
+        positional = list(args[:self.n_positional])
+        if self.var_positional is not None:
+            positional.extend(args[self.var_positional])
+        keyword = {name: args[i] for i, name in self.keyword_only}
+        if self.var_keyword is not None:
+            keyword.update(args[self.var_keyword])
+        return positional, keyword
+
+_init_plans = WeakKeyDictionary()
+
+def init_plan(cls):
+    '''
+    Analysis of the signature of a class's __init__, shared by
+    :class:`repr_from_init` and :class:`pickle_from_init` and computed only
+    once per class
+
+    Args:
+        cls (:class:`type`): Class whose __init__ saves each of its arguments
+                             as an attribute with the same name
+
+    Returns:
+        Object with attributes *params* (:class:`inspect.Parameter` objects,
+        excluding self) and *get_args* (function returning an instance's
+        argument values as a tuple, one per parameter) and method
+        *call_args* (converts such a tuple to constructor arguments)
+    '''
+    try:
+        return _init_plans[cls]
+    except KeyError:
+        plan = _init_plans[cls] = _init_plan(cls)
+        return plan
 
 class repr_from_init:
     '''
@@ -27,26 +103,187 @@ class repr_from_init:
         * __init__ arguments (including variable positional ones) must all 
           be saved as instance attribtues with the same names.  An easy 
           way to do this is to use the :func:`args2attrs` decorator.
+
+    Bounded output:
+        Set the class attribute *repr_limits* to a :class:`reprlib.Repr`
+        (see :func:`bounded_repr`) to abbreviate large argument values and
+        long variable argument lists, and use :meth:`write_repr` to write
+        the representation to a text stream piece by piece instead of
+        building one string.
+
+        >>> class big(my_cls):
+        ...     repr_limits = bounded_repr(maxlist=3, maxtuple=2)
+        >>> big(list(range(1000)), 'x', 'y', 'z')
+        big([0, 1, 2, ...], 'x', 'y', ...)
     '''
+    repr_limits = None
     def __repr__(self):
-        sig = inspect.signature(self.__init__)
-        def _kwarg_repr(name, value):
-            value_repr = repr(value)
-            return '{name}={value_repr}'.format(**locals())
-        arg_reprs = []
-        for param in sig.parameters.values():
-            param_value = getattr(self, param.name)
-            if param.kind is inspect._VAR_POSITIONAL:
-                arg_reprs.extend(map(repr, param_value))
-            elif param.kind is inspect._VAR_KEYWORD:
-                arg_reprs.extend(_kwarg_repr(k, v) for k, v in sorted(param_value.items()))
-            elif param.default is not inspect._empty:
-                if param_value != param.default:
-                    arg_reprs.append(_kwarg_repr(param.name, param_value))
-            else:
-                assert param.kind in (inspect._POSITIONAL_ONLY, inspect._POSITIONAL_OR_KEYWORD)
-                arg_reprs.append(repr(param_value))
-        return '{cls_name}({combined_args_repr})'.format(cls_name=type(self).__name__, combined_args_repr=', '.join(arg_reprs))
+        limits = self.repr_limits
+        value_repr = repr if limits is None else limits.repr
+        return ''.join(self._iter_repr(lambda value: (value_repr(value),)))
+    def write_repr(self, stream):
+        '''
+        Write the representation returned by :func:`repr` to a text stream
+        in small pieces
+
+        Without *repr_limits*, arguments that are lists, tuples, dicts, sets
+        or frozensets are written element by element (recursively), so
+        only the representations of other values (eg: one long string) are
+        built in full.  With *repr_limits*, each argument's (bounded)
+        representation is written in one piece.
+
+        Args:
+            stream: Object with a *write* method accepting :class:`str`
+        '''
+        limits = self.repr_limits
+        value_pieces = _repr_pieces if limits is None else (lambda value: (limits.repr(value),))
+        for piece in self._iter_repr(value_pieces):
+            stream.write(piece)
+    def _iter_repr(self, value_pieces):
+        limits = self.repr_limits
+        params = init_plan(type(self)).params
+        def kwarg_pieces(name, value):
+            yield '{}='.format(name)
+            yield from value_pieces(value)
+        def limited(args, max_count):
+            for i, arg in enumerate(args):
+                if (limits is not None) and (i >= max_count):
+                    yield (getattr(limits, 'fillvalue', '...'),)
+                    return
+                yield arg
+        def arg_pieces():
+            for param in params:
+                param_value = getattr(self, param.name)
+                if param.kind is inspect._VAR_POSITIONAL:
+                    yield from limited(map(value_pieces, param_value), getattr(limits, 'maxtuple', None))
+                elif param.kind is inspect._VAR_KEYWORD:
+                    yield from limited((kwarg_pieces(k, v) for k, v in sorted(param_value.items())), getattr(limits, 'maxdict', None))
+                elif param.default is not inspect._empty:
+                    if param_value != param.default:
+                        yield kwarg_pieces(param.name, param_value)
+                else:
+                    assert param.kind in (inspect._POSITIONAL_ONLY, inspect._POSITIONAL_OR_KEYWORD)
+                    yield value_pieces(param_value)
+        yield type(self).__name__
+        yield '('
+        for i, pieces in enumerate(arg_pieces()):
+            if i:
+                yield ', '
+            yield from pieces
+        yield ')'
+
+_recursive_reprs = {list: '[...]', tuple: '(...)', dict: '{...}'}  # sets can't contain themselves
+
+def _repr_pieces(value, active=None):
+    '''Pieces of repr(value), with built-in containers represented element by element'''
+    cls = type(value)
+    if cls not in (list, tuple, dict, set, frozenset) or not value:
+        yield repr(value)
+        return
+    active = set() if active is None else active
+    if id(value) in active:
+        yield _recursive_reprs[cls]
+        return
+    active.add(id(value))
+    opening, closing = {list: ('[', ']'), tuple: ('(', ',)' if len(value) == 1 else ')'), dict: ('{', '}'),
+                        set: ('{', '}'), frozenset: ('frozenset({', '})')}[cls]
+    yield opening
+    for i, element in enumerate(value.items() if cls is dict else value):
+        if i:
+            yield ', '
+        if cls is dict:
+            yield from _repr_pieces(element[0], active)
+            yield ': '
+            element = element[1]
+        yield from _repr_pieces(element, active)
+    yield closing
+    active.discard(id(value))
+
+
+def _from_args(cls, args):
+    return cls.from_args(args)
+
+class pickle_from_init:
+    '''
+    Mixin that implements pickling and copying based on the signature of
+    __init__ (with the same requirements as :class:`repr_from_init`, except
+    that variable keyword arguments are allowed if saved as a dict).
+
+    Instances are reduced to their constructor arguments (one value per
+    parameter of __init__, see :meth:`to_args`) instead of their __dict__,
+    so pickles are smaller and copies are built by calling the constructor.
+
+    Example:
+        >>> import copy
+        >>> from drytools import args2attrs
+        >>> class point(pickle_from_init, repr_from_init):
+        ...     @args2attrs
+        ...     def __init__(self, x, y, *tags, label=''):
+        ...         self.length = (x*x + y*y) ** 0.5
+        >>> p = point(3, 4, 'a', label='p')
+        >>> p.to_args()
+        (3, 4, ('a',), 'p')
+        >>> copy.copy(p)
+        point(3, 4, 'a', label='p')
+        >>> copy.deepcopy(p).length
+        5.0
+        >>> columns = point.encode_batch([p, point(1, 0)])
+        >>> columns
+        ((3, 1), (4, 0), (('a',), ()), ('p', ''))
+        >>> point.decode_batch(columns)
+        [point(3, 4, 'a', label='p'), point(1, 0)]
+    '''
+    def to_args(self):
+        '''
+        Returns:
+            tuple: the value of each parameter of __init__ (in order,
+            excluding self).  Variable positional and keyword arguments are
+            one tuple and one dict respectively.
+        '''
+        return init_plan(type(self)).get_args(self)
+    @classmethod
+    def from_args(cls, args):
+        '''
+        Inverse of :meth:`to_args`
+
+        Args:
+            args (tuple): One value per parameter of __init__
+
+        Returns:
+            New instance
+        '''
+        positional, keyword = init_plan(cls).call_args(args)
+        return cls(*positional, **keyword)
+    def __reduce__(self):
+        return _from_args, (type(self), self.to_args())
+    def __copy__(self):
+        return self.from_args(self.to_args())
+    @classmethod
+    def encode_batch(cls, instances):
+        '''
+        Encode instances compactly as one tuple per parameter of __init__
+        (eg: for transfer between processes)
+
+        Args:
+            instances (iterable): Instances of *cls*
+
+        Returns:
+            tuple: tuple of columns, each with one value per instance
+        '''
+        plan = init_plan(cls)
+        columns = tuple(zip(*map(plan.get_args, instances)))
+        return columns or ((),) * len(plan.params)
+    @classmethod
+    def decode_batch(cls, columns):
+        '''
+        Inverse of :meth:`encode_batch`
+
+        Returns:
+            list: new instances
+        '''
+        plan = init_plan(cls)
+        call_args = plan.call_args
+        return [cls(*positional, **keyword) for positional, keyword in map(call_args, zip(*columns))]
 
 
 if __name__ == '__main__':
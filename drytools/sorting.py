@@ -0,0 +1,300 @@
+'''
+==============================================
+sorting - Fast sorting of ordered_by instances
+==============================================
+
+Sorts sequences of instances of classes decorated with
+:func:`drytools.decorator.ordered_by` with :func:`numpy.lexsort` instead of
+comparison methods: each ordering attribute is extracted into a column
+(the columns of a :class:`drytools.columnar.columnar` container are used
+directly) and sorted in C.
+
+The order is the same as that of the generated comparison methods (ie: of
+the tuples of attribute values), and sorts are stable.  Columns that NumPy
+can't represent exactly as a 1-dimensional array of numbers or strings
+(eg: tuples, mixed types including ints with floats, integers too large for
+64 bits or strings containing NUL characters) are ranked with Python
+comparisons first, so their values must be hashable.  Floating point
+columns containing NaN are not supported.
+
+:func:`argsort`, :func:`sort` and :func:`searchsorted` require
+`NumPy <https://numpy.org>`_ (eg: ``pip install drytools[numpy]``).
+:func:`external_sort` sorts more instances than fit in memory, without
+NumPy.
+
+Example:
+
+.. code:: python
+
+    from drytools import args2attrs, ordered_by
+    from drytools.sorting import argsort, external_sort, searchsorted, sort
+
+    @ordered_by('surname', 'age')
+    class person:
+        @args2attrs
+        def __init__(self, surname, age):
+            pass
+
+    people = [person('Smith', 40), person('Jones', 31), person('Smith', 25)]
+    argsort(people)                        # array([1, 2, 0])
+    ordered = sort(people)                 # same as sorted(people)
+    searchsorted(ordered, [('Smith', 30), ('Adams', 50)])  # array([2, 0])
+    for p in external_sort(many_people, run_size=100000):  # iterator
+        ...
+'''
+from contextlib import ExitStack
+from heapq import merge
+from itertools import chain, count, islice
+import os
+import pickle
+import tempfile
+
+from drytools.columnar import columnar
+from drytools.mixins import pickle_from_init
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def sort_attrs(items):
+    '''
+    Returns:
+        tuple: ordering attributes of the class of the items in *items*
+        (a sequence of instances of a class decorated with
+        :func:`drytools.decorator.ordered_by`, or a
+        :class:`drytools.columnar.columnar` of them)
+    '''
+    cls = items.cls if isinstance(items, columnar) else (type(items[0]) if len(items) else None)
+    try:
+        return cls.sort_attrs
+    except AttributeError:
+        raise TypeError('Not an ordered_by class: {!r}'.format(cls)) from None
+
+def _raw_column(items, attr):
+    if isinstance(items, columnar):
+        return items.as_numpy(attr) if items.typecodes.get(attr) else items.column(attr)
+    return [getattr(item, attr) for item in items]
+
+def _sortable(values):
+    '''1-dimensional array of numbers or strings with the same order as values'''
+    if isinstance(values, np.ndarray) and (values.ndim == 1) and (values.dtype.kind in 'biufUS'):
+        return values
+    values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+    arr = _exact_array(values)
+    if arr is not None:
+        return arr
+    ranks = {v: i for i, v in enumerate(sorted(set(values)))}
+    return np.fromiter((ranks[v] for v in values), dtype=np.intp, count=len(values))
+
+def _exact_array(values):
+    '''
+    Array of values (a list) if they're all of one kind that NumPy holds
+    exactly and orders as Python does, otherwise None: ints within int64,
+    floats, or strings or bytes without NUL characters (NumPy strips
+    trailing ones).  Mixed ints and floats are compared exactly by Python,
+    but not by NumPy (which converts the ints to floats).
+    '''
+    types = set(map(type, values))
+    if types <= {bool, int}:
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            return None
+    elif types == {float}:
+        return np.array(values, dtype=np.float64)
+    elif (types == {str}) or (types == {bytes}):
+        nul = '\x00' if types == {str} else b'\x00'
+        if not any(nul in v for v in values):
+            return np.array(values)
+    return None
+
+def _key_columns(items, attrs):
+    if np is None:
+        raise ImportError('drytools.sorting requires numpy')
+    attrs = sort_attrs(items) if attrs is None else attrs
+    return [_sortable(_raw_column(items, attr)) for attr in attrs]
+
+def argsort(items, attrs=None):
+    '''
+    Permutation that sorts instances of an :func:`drytools.decorator.ordered_by` class
+
+    Args:
+        items: Sequence of instances (or a :class:`drytools.columnar.columnar`)
+        attrs (tuple): Attributes to sort by (the class's ordering attributes if None)
+
+    Returns:
+        :class:`numpy.ndarray`: indices of *items* in sorted order
+    '''
+    if not len(items):
+        return np.zeros(0, dtype=np.intp)
+    return np.lexsort(_key_columns(items, attrs)[::-1])
+
+def sort(items, attrs=None):
+    '''
+    Sort instances of an :func:`drytools.decorator.ordered_by` class (see :func:`argsort`)
+
+    Returns:
+        :class:`list` (or :class:`drytools.columnar.columnar` if *items* is one): sorted items
+    '''
+    order = argsort(items, attrs)
+    if isinstance(items, columnar):
+        return items.take(order.tolist())
+    return [items[i] for i in order.tolist()]
+
+def searchsorted(items, keys, side='left', attrs=None):
+    '''
+    Positions at which keys would be inserted into sorted instances to keep them sorted
+
+    Args:
+        items: Sorted sequence of instances (or a :class:`drytools.columnar.columnar`)
+        keys (iterable): Key tuples (one value per ordering attribute, like
+                         the *sort_key* method of instances)
+        side (str): 'left' or 'right' (as :func:`numpy.searchsorted`)
+        attrs (tuple): Attributes the items are sorted by (the class's
+                       ordering attributes if None)
+
+    Returns:
+        :class:`numpy.ndarray`: one index per key
+    '''
+    keys = [tuple(key) for key in keys]
+    if not (len(items) and keys):
+        return np.zeros(len(keys), dtype=np.intp)
+    attrs = sort_attrs(items) if attrs is None else attrs
+    if any(len(key) != len(attrs) for key in keys):
+        raise ValueError('Keys must have one value per attribute: {}'.format(attrs))
+    n_items = len(items)
+    columns = []
+    for attr, key_values in zip(attrs, zip(*keys)):
+        raw = _raw_column(items, attr)
+        combined = None
+        if isinstance(raw, np.ndarray):  # numeric column of a columnar
+            key_array = _exact_array(list(key_values))
+            if (key_array is not None) and (key_array.dtype.kind in 'if'):
+                with np.errstate(all='ignore'):
+                    cast = key_array.astype(raw.dtype)
+                    exact = (key_array.dtype == raw.dtype) or np.array_equal(cast.astype(key_array.dtype), key_array)
+                if exact:  # keys are held exactly by the column's type
+                    combined = np.concatenate([raw, cast])
+            raw = raw.tolist()
+        if combined is None:
+            combined = list(raw) + list(key_values)
+        columns.append(_sortable(combined))
+    # dense ranks of the (item and key) tuples, so each tuple becomes one integer
+    order = np.lexsort(columns[::-1])
+    changed = np.zeros(len(order), dtype=bool)
+    for column in columns:
+        in_order = column[order]
+        changed[1:] |= in_order[1:] != in_order[:-1]
+    ranks = np.empty(len(order), dtype=np.intp)
+    ranks[order] = np.cumsum(changed)
+    return np.searchsorted(ranks[:n_items], ranks[n_items:], side=side)
+
+def external_sort(items, run_size=100000, tmpdir=None, attrs=None, block_size=1000, fan_in=64):
+    '''
+    Sort instances of an :func:`drytools.decorator.ordered_by` class that
+    may not fit in memory
+
+    Sorted runs of *run_size* instances are written to temporary files,
+    then merged (with :func:`heapq.merge`, which computes each instance's
+    key once).  If there are more than *fan_in* runs, consecutive groups of
+    *fan_in* runs are first merged into longer runs (repeatedly), so no
+    more than *fan_in* runs (plus the run being written) are open at a
+    time.  At most *run_size* instances are held in memory while writing
+    runs, and *block_size* per run while merging.  Instances of
+    :class:`drytools.mixins.pickle_from_init` classes are written in the
+    compact form of :meth:`~drytools.mixins.pickle_from_init.encode_batch`,
+    and other instances are pickled.  Temporary files are deleted when the
+    result is exhausted or closed (or garbage collected).
+
+    Args:
+        items (iterable): Instances to sort
+        run_size (int): Number of instances per sorted run (if *items*
+                        has no more than this, they're sorted in memory)
+        tmpdir (str): Directory in which to create the temporary directory
+                      holding the runs (see :func:`tempfile.TemporaryDirectory`)
+        attrs (tuple): Attributes to sort by (the class's ordering
+                       attributes if None)
+        block_size (int): Number of instances written or read at a time
+        fan_in (int): Maximum number of runs merged at a time (at least 2)
+
+    Returns:
+        *iterator*: the instances, in sorted order (the sort is stable)
+    '''
+    if (run_size < 1) or (block_size < 1):
+        raise ValueError('run_size and block_size must be positive')
+    if fan_in < 2:
+        raise ValueError('fan_in must be at least 2')
+    items = iter(items)
+    first_run = list(islice(items, run_size))
+    if not first_run:
+        return iter(())
+    key = _sort_key(type(first_run[0]), attrs)
+    return _merged_runs(first_run, items, key, run_size, tmpdir, block_size, fan_in)
+
+def _sort_key(cls, attrs):
+    if attrs is not None:
+        attrs = tuple(attrs)
+        return lambda item: tuple(getattr(item, attr) for attr in attrs)
+    try:
+        cls.sort_attrs
+    except AttributeError:
+        raise TypeError('Not an ordered_by class: {!r}'.format(cls)) from None
+    return cls.sort_key
+
+def _merged_runs(run, items, key, run_size, tmpdir, block_size, fan_in):
+    for following in items:
+        items = chain([following], items)
+        break
+    else:  # one run: sorted in memory
+        run.sort(key=key)
+        yield from run
+        return
+    with tempfile.TemporaryDirectory(dir=tmpdir) as run_dir:
+        names = (os.path.join(run_dir, str(i)) for i in count())
+        paths = []
+        while run:
+            run.sort(key=key)
+            paths.append(next(names))
+            with open(paths[-1], 'wb') as run_file:
+                _write_run(run_file, run, block_size)
+            run = None  # so only one run is held at a time
+            run = list(islice(items, run_size))
+        while len(paths) > fan_in:  # merge consecutive groups (keeping the sort stable) into longer runs
+            merged_paths = []
+            for start in range(0, len(paths), fan_in):
+                group = paths[start:start+fan_in]
+                merged_paths.append(next(names))
+                with ExitStack() as stack:
+                    files = [stack.enter_context(open(path, 'rb')) for path in group]
+                    with open(merged_paths[-1], 'wb') as run_file:
+                        _write_run(run_file, merge(*map(_read_run, files), key=key), block_size)
+                for path in group:
+                    os.remove(path)
+            paths = merged_paths
+        with ExitStack() as stack:
+            files = [stack.enter_context(open(path, 'rb')) for path in paths]
+            yield from merge(*map(_read_run, files), key=key)
+
+def _write_run(run_file, run, block_size):
+    run = iter(run)
+    for block in iter(lambda: list(islice(run, block_size)), []):
+        cls = type(block[0])
+        if issubclass(cls, pickle_from_init) and all(type(item) is cls for item in block):
+            pickle.dump((cls, cls.encode_batch(block)), run_file, pickle.HIGHEST_PROTOCOL)
+        else:
+            pickle.dump((None, block), run_file, pickle.HIGHEST_PROTOCOL)
+
+def _read_run(run_file):
+    while True:
+        try:
+            cls, block = pickle.load(run_file)
+        except EOFError:
+            return
+        yield from (block if cls is None else cls.decode_batch(block))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -30,14 +30,21 @@ setup(
       'Development Status :: 3 - Alpha',
       'Intended Audience :: Developers',
       'Programming Language :: Python :: 3',
+      'Programming Language :: Python :: 3 :: Only',
+      'Programming Language :: Python :: 3.9',
+      'Programming Language :: Python :: 3.10',
+      'Programming Language :: Python :: 3.11',
+      'Programming Language :: Python :: 3.12',
       'License :: OSI Approved :: GNU General Public License v3 (GPLv3)',
       'Natural Language :: English',
     ],
     keywords='',
     packages=find_packages(exclude=['docs', 'tests*']),
+    python_requires='>=3.9',
     include_package_data=True,
     author='Dan Elias',
     install_requires=install_requires,
+    extras_require={'numpy': ['numpy']},
     dependency_links=dependency_links,
     author_email='daniel@elias-family.com'
 )
@@ -0,0 +1,18 @@
+'''
+====================================
+Snapshots for memory footprint tests
+====================================
+
+:func:`take_snapshot` records a :mod:`tracemalloc` snapshot from inside a
+function measured by :mod:`tests.test_footprint`.  Allocations made in this
+module are excluded from the measurements.
+'''
+import tracemalloc
+
+capturing = False
+snapshots = []
+
+def take_snapshot():
+    '''Record a snapshot (if *capturing*)'''
+    if capturing:
+        snapshots.append(tracemalloc.take_snapshot())
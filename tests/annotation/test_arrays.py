@@ -0,0 +1,91 @@
+'''
+=======================================
+Unit tests for module annotation.arrays
+=======================================
+
+Unit tests for annotation.arrays
+'''
+import array
+import os
+import tempfile
+import unittest
+import warnings
+from drytools.annotation.composition import compose_annotations
+from drytools.annotation.arrays import ArrayCopyWarning, as_array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, 'numpy not installed')
+class Test_as_array(unittest.TestCase):
+    def setUp(self):
+        self.copies = []
+        self.record_copy = lambda original, arr: self.copies.append(type(original))
+    def test_conforming_unchanged(self):
+        data = np.arange(12.0).reshape(3, 4)
+        coerce = as_array(dtype=np.float64, shape=(None, 4), order='C', on_copy=self.record_copy)
+        self.assertIs(coerce(data), data)
+        self.assertEqual(self.copies, [])
+    def test_views_not_reported(self):
+        coerce = as_array(dtype=np.uint8, on_copy=self.record_copy)
+        for raw in [b'abc', bytearray(b'abc'), array.array('B', b'abc'), memoryview(b'abc')]:
+            self.assertEqual(coerce(raw).tolist(), [97, 98, 99])
+        self.assertEqual(self.copies, [])
+    def test_copies_reported(self):
+        coerce = as_array(dtype=np.float64, order='C', on_copy=self.record_copy)
+        data = np.arange(10.0)
+        for raw in [[1, 2], np.arange(3), data[::2]]:
+            result = coerce(raw)
+            self.assertEqual(result.dtype, np.float64)
+            self.assertTrue(result.flags.c_contiguous)
+        self.assertEqual(self.copies, [list, np.ndarray, np.ndarray])
+    def test_on_copy_warn_and_raise(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            as_array(dtype=np.int32, on_copy='warn')(np.arange(3, dtype=np.int64))
+        self.assertEqual([w.category for w in caught], [ArrayCopyWarning])
+        with self.assertRaises(TypeError):
+            as_array(order='F', on_copy='raise', raises=TypeError)(np.ones((2, 2)))
+    def test_shape_checks(self):
+        for coerce, raw in [(as_array(ndim=1), np.ones((2, 2))),
+                            (as_array(shape=(None, 3)), np.ones((2, 2))),
+                            (as_array(shape=(2,)), [1, 2, 3]),
+                           ]:
+            with self.assertRaises(ValueError):
+                coerce(raw)
+    def test_subok(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'data.bin')
+            mapped = np.memmap(path, dtype=np.uint8, mode='w+', shape=(4,))
+            self.assertIs(as_array()(mapped), mapped)
+            view = as_array(subok=False, on_copy=self.record_copy)(mapped)
+            self.assertIs(type(view), np.ndarray)
+            self.assertEqual(self.copies, [])
+            del mapped, view
+    def test_memory_mapped_paths(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            npy_path = os.path.join(tmpdir, 'data.npy')
+            np.save(npy_path, np.arange(6).reshape(2, 3))
+            raw_path = os.path.join(tmpdir, 'data.bin')
+            np.arange(4, dtype=np.int16).tofile(raw_path)
+            @compose_annotations
+            def f(x: as_array(shape=(None, 3), on_copy=self.record_copy),
+                  y: as_array(dtype=np.int16, on_copy=self.record_copy)):
+                return x, y
+            x, y = f(npy_path, raw_path)
+            self.assertIsInstance(x, np.memmap)
+            self.assertIsInstance(y, np.memmap)
+            self.assertEqual(x.tolist(), [[0, 1, 2], [3, 4, 5]])
+            self.assertEqual(y.tolist(), [0, 1, 2, 3])
+            self.assertEqual(self.copies, [])
+            del x, y
+    def test_bad_args(self):
+        for kwargs in [{'order': 'X'}, {'on_copy': 'explode'}, {'ndim': 1, 'shape': (1, 2)}]:
+            with self.assertRaises(ValueError):
+                as_array(**kwargs)
+
+if __name__ == '__main__':
+    unittest.main()
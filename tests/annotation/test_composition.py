@@ -6,8 +6,12 @@ Unit tests for module annotation.composition
 
 Unit tests for annotation.composition
 '''
+import threading
+import time
 import unittest
-from drytools.annotation.composition import compose_annotations
+from drytools.annotation.composition import compose_annotations, set_validate_every, trusted
+from drytools.annotation.functions import check, each
+from drytools.annotation.predicates import in_range, isinstance_of
 
 class Test_compose_annotations(unittest.TestCase):
     def test_coerce_params(self):
@@ -52,8 +56,305 @@ class Test_compose_annotations(unittest.TestCase):
             def __init__(self, x:str):
                 self.x = x
         self.assertIsInstance(my_cls(10).x, str)
+    def test_omitted_var_args(self):
+        @compose_annotations
+        def f(x: int, *args: int, **kwargs: int):
+            return x, args, kwargs
+        self.assertEqual(f('1'), (1, (), {}))
+        @compose_annotations(combine_var_positional=True, combine_var_keyword=True)
+        def g(*args: len, **kwargs: (lambda d: dict(d, n=len(d)))):
+            return args, kwargs
+        with self.assertRaises(TypeError):  # the combined transform's result is unpacked
+            g()
+        @compose_annotations(combine_var_keyword=True)
+        def h(*args, **kwargs: (lambda d: dict(d, n=len(d)))):
+            return args, kwargs
+        self.assertEqual(h(), ((), {'n': 0}))
+    def test_defaults_with_var_positional(self):
+        @compose_annotations
+        def f(a, b: int=1, *args: str, c: int=2):
+            return a, b, args, c
+        self.assertEqual(f(0, '5', 6, 7), (0, 5, ('6', '7'), 2))
+        self.assertEqual(f(0), (0, 1, (), 2))
+    def test_omitted_positional_then_keyword(self):
+        @compose_annotations
+        def f(a=0, b: str=1, c: int=2):
+            return a, b, c
+        self.assertEqual(f(b=3), (0, '3', 2))
+        self.assertEqual(f(c='4'), (0, '1', 4))
+
+class Test_transformed_defaults(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+    def tx(self, x):
+        self.calls.append(x)
+        return (x,)
+    def test_transformed_once(self):
+        @compose_annotations
+        def f(x: self.tx=1):
+            return x
+        self.assertEqual(self.calls, [1])
+        self.assertIs(f(), f())
+        self.assertEqual(f(2), (2,))
+        self.assertEqual(self.calls, [1, 2])
+    def test_mutable_not_shared(self):
+        @compose_annotations
+        def add(x, acc: list=(), groups: (each(list), list)=[(1,)]):
+            acc.append(x)
+            groups[0].append(x)
+            return acc, groups
+        self.assertEqual(add(1), ([1], [[1, 1]]))
+        self.assertEqual(add(2), ([2], [[1, 2]]))
+        @compose_annotations
+        def f(x: tuple=[1, [2]]):
+            return x
+        self.assertIsNot(f(), f())  # tuple containing a list
+    def test_fresh_defaults(self):
+        for fresh_defaults in ['x', ['x'], True]:
+            self.calls.clear()
+            @compose_annotations(fresh_defaults=fresh_defaults)
+            def f(x: self.tx=1, y: self.tx=2):
+                return x, y
+            first, second = f(), f()
+            self.assertIsNot(first[0], second[0])
+            self.assertEqual(first, ((1,), (2,)))
+            self.assertEqual(self.calls.count(1), 2)
+            self.assertEqual(self.calls.count(2), 1 if fresh_defaults != True else 2)
+        with self.assertRaises(ValueError):
+            compose_annotations(fresh_defaults='z')(lambda x: x)
+    def test_failing_default_raises_on_call(self):
+        @compose_annotations
+        def f(x: int=None):
+            return x
+        self.assertEqual(f('3'), 3)
+        with self.assertRaises(TypeError):
+            f()
+    def test_defaults_validated(self):
+        @compose_annotations(validate_every=2)
+        def f(x: check(lambda v: v > 0)=-1):
+            return x
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                f()
+            self.assertEqual(f(), -1)  # validation skipped
+
+class Test_adaptive(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+    def counted(self, tx):
+        def counted_tx(x):
+            self.calls.append(x)
+            return tx(x)
+        return counted_tx
+    def test_implied_elements_skipped(self):
+        @compose_annotations(adaptive=3)
+        def f(x: (int, check(isinstance, int), in_range(0)), y: (str, isinstance_of(str)), z: list=()):
+            return x, y, z
+        data = [1]
+        for _ in range(5):
+            self.assertEqual(f(5, 'a', data), (5, 'a', [1]))
+        self.assertIsNot(f(5, 'a', data)[2], data)  # list(x) isn't implied by type list
+        self.assertEqual(dict(f.adaptive_stats), {'hits': 3})
+        with self.assertRaises(ValueError):
+            f(-1, 'a')  # validations not implied by the type still apply
+        self.assertEqual(f('7', 8), (7, '8', []))
+        self.assertEqual(f(True, 'a')[0], 1)  # bool isn't int
+        self.assertEqual(dict(f.adaptive_stats), {'hits': 4, 'misses': 2})
+    def test_guarded_transform_not_called(self):
+        @compose_annotations(adaptive=1)
+        def f(x: (int, self.counted(lambda v: v))):
+            return x
+        f(1)
+        f(2)
+        self.assertEqual(self.calls, [1, 2])  # non-implied elements are kept
+    def test_type_changed_by_earlier_element(self):
+        @compose_annotations(adaptive=1)
+        def f(x: (float, int)):
+            return x
+        self.assertEqual([type(f(v)) for v in (1, 2, 3)], [int, int, int])
+        @compose_annotations(adaptive=1)
+        def g(x: (str, check(isinstance, int))):
+            return x
+        for v in (1, 2):
+            with self.assertRaises(ValueError):
+                g(v)
+    def test_mixed_types_not_specialized(self):
+        @compose_annotations(adaptive=2)
+        def f(x: int):
+            return x
+        f(1)
+        f(1.5)
+        f(2)
+        self.assertEqual(dict(f.adaptive_stats), {})
+    def test_var_args(self):
+        @compose_annotations(adaptive=2)
+        def f(*args: (str, isinstance_of(str)), **kwargs: str):
+            return args, kwargs
+        f('a', b='c')
+        f('d', 'e')
+        self.assertEqual(f('x', 'y', k='z'), (('x', 'y'), {'k': 'z'}))
+        self.assertEqual(f('x', 1), (('x', '1'), {}))
+        self.assertEqual(dict(f.adaptive_stats), {'hits': 1, 'misses': 1})
+    def test_threads(self):
+        @compose_annotations(adaptive=100)
+        def f(x: int):
+            return x
+        threads = [threading.Thread(target=lambda: [f(i) for i in range(100)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(f.adaptive_stats.values()), 300)
+
+class Test_sampled_validation(unittest.TestCase):
+    def setUp(self):
+        self.previous_setting = set_validate_every(1)
+    def tearDown(self):
+        set_validate_every(self.previous_setting)
+    def make_fun(self, **kwargs):
+        @compose_annotations(**kwargs)
+        def f(x: (int, check(lambda v: v > 0)), y: in_range(0)=0) -> str:
+            return x
+        return f
+    def count_failures(self, f, n_calls):
+        failures = 0
+        for _ in range(n_calls):
+            try:
+                self.assertEqual(f('-1'), '-1')
+            except ValueError:
+                failures += 1
+        return failures
+    def test_validate_every(self):
+        f = self.make_fun(validate_every=3)
+        self.assertEqual(self.count_failures(f, 9), 3)
+        self.assertEqual(dict(f.validation_stats), {'validated': 3, 'skipped': 6})
+    def test_global_setting(self):
+        f = self.make_fun()
+        self.assertEqual(self.count_failures(f, 4), 4)
+        self.assertEqual(set_validate_every(4), 1)
+        self.assertEqual(self.count_failures(f, 8), 2)
+        with self.assertRaises(ValueError):
+            set_validate_every(0)
+    def test_invalid_validate_every(self):
+        for n in (0, -1, 1.5):
+            with self.assertRaises(ValueError):
+                self.make_fun(validate_every=n)
+    def test_trusted(self):
+        f = self.make_fun()
+        with trusted():
+            self.assertEqual(self.count_failures(f, 3), 0)
+            self.assertEqual(f('1', -1), '1')
+        self.assertEqual(self.count_failures(f, 3), 3)
+        self.assertEqual(dict(f.validation_stats), {'validated': 3, 'skipped': 4})
+    def test_trusted_is_thread_local(self):
+        f = self.make_fun()
+        failures = []
+        with trusted():
+            thread = threading.Thread(target=lambda: failures.append(self.count_failures(f, 2)))
+            thread.start()
+            thread.join()
+        self.assertEqual(failures, [2])
+    def test_coercions_always_applied(self):
+        f = self.make_fun(validate_every=1000)
+        f('1')
+        self.assertEqual(f(2.5), '2')
+    def test_stats_from_threads(self):
+        f = self.make_fun(validate_every=2)
+        threads = [threading.Thread(target=lambda: [f('1') for _ in range(1000)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(dict(f.validation_stats), {'validated': 2000, 'skipped': 2000})
+        self.assertNotIn('other', f.validation_stats)
+    def test_short_lived_threads(self):
+        f = self.make_fun(validate_every=2)
+        for _ in range(200):
+            thread = threading.Thread(target=lambda: [f('1') for _ in range(3)])
+            thread.start()
+            thread.join()
+        self.assertEqual(dict(f.validation_stats), {'validated': 400, 'skipped': 200})
+        self.assertLessEqual(len(f.validation_stats._counters), 1)  # exited threads' counts are folded together
+    def test_no_validations_no_stats(self):
+        @compose_annotations
+        def f(x: int):
+            return x
+        self.assertFalse(hasattr(f, 'validation_stats'))
         
 
+class Test_parallel(unittest.TestCase):
+    def setUp(self):
+        self.thread_names = set()
+        def slow_int(x):
+            self.thread_names.add(threading.current_thread().name)
+            time.sleep(0.01)
+            return int(x)
+        self.slow_int = slow_int
+    def test_ordered_results(self):
+        @compose_annotations(parallel=4)
+        def f(*args: self.slow_int, **kwargs: self.slow_int):
+            return args, kwargs
+        args = [str(i) for i in range(20)]
+        kwargs = {'k{}'.format(i): str(i) for i in range(20)}
+        result_args, result_kwargs = f(*args, **kwargs)
+        self.assertEqual(result_args, tuple(range(20)))
+        self.assertEqual(list(result_kwargs.items()), [(k, int(v)) for k, v in kwargs.items()])
+        self.assertGreater(len(self.thread_names), 1)
+    def test_below_threshold_serial(self):
+        @compose_annotations(parallel=True)
+        def f(*args: self.slow_int):
+            return args
+        self.assertEqual(f('1', '2'), (1, 2))
+        self.assertEqual(self.thread_names, {threading.current_thread().name})
+    def test_first_error_raised_and_rest_cancelled(self):
+        started = []
+        def check_value(x):
+            started.append(x)
+            if x == 'bad':
+                raise ValueError(x)
+            time.sleep(0.05)
+            return x
+        @compose_annotations(parallel=2)
+        def f(*args: check_value):
+            return args
+        with self.assertRaisesRegex(ValueError, 'bad'):
+            f('bad', *['ok'] * 200)
+        time.sleep(0.2)
+        self.assertLess(len(started), 201)
+    def test_trusted_in_workers(self):
+        @compose_annotations
+        def positive(x: check(lambda v: v > 0)):  # validated in the pool's threads
+            return x
+        @compose_annotations(parallel=2)
+        def f(*args: (self.slow_int, positive)):
+            return args
+        with trusted():
+            self.assertEqual(f('-1', '-2', '-3'), (-1, -2, -3))
+        self.assertGreater(len(self.thread_names - {threading.current_thread().name}), 0)
+        with self.assertRaises(ValueError):
+            f('-1', '-2', '-3')
+    def test_earliest_error_by_position(self):
+        def check_value(x):
+            if x == 3:
+                time.sleep(0.1)
+                raise ValueError(x)
+            if x == 10:
+                raise KeyError(x)
+            return x
+        @compose_annotations(parallel=2)
+        def f(*args: check_value):
+            return args
+        with self.assertRaises(ValueError):
+            f(*range(20))
+    def test_nested(self):
+        @compose_annotations(parallel=2)
+        def inner(*args: int):
+            return sum(args)
+        @compose_annotations(parallel=2)
+        def outer(*args: (lambda n: inner(*range(n)))):
+            return args
+        self.assertEqual(outer(*range(1, 50)), tuple(sum(range(n)) for n in range(1, 50)))
+
 
 if __name__ == '__main__':
     unittest.main()
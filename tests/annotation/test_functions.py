@@ -6,12 +6,15 @@ Unit tests for module annotation.functions
 
 Unit tests for annotation.functions
 '''
+import array
 from collections import OrderedDict
 from collections.abc import Iterator
 from itertools import count
 from operator import gt
+import pickle
 import unittest
-from drytools.annotation.functions import check, iterify
+from drytools.annotation.composition import compose_annotations
+from drytools.annotation.functions import as_memoryview, as_readonly_buffer, check, each, iter_chunks, iterify
 
 class Test_check(unittest.TestCase):
     def setUp(self):
@@ -45,12 +48,111 @@ class Test_iterify(unittest.TestCase):
                              (lambda: iterify(list(self.data)), list(self.data)),
                              (lambda: iterify(set(self.data)), set(self.data)),
                              (lambda: iterify(tuple(self.data)), tuple(self.data)),
+                             (lambda: iterify(b'foo'), [b'foo']),
+                             (lambda: iterify(bytearray(b'foo')), [bytearray(b'foo')]),
+                             (lambda: iterify(b'foo', excluded_types=str), b'foo'),
                             ]:
             self.assertEqual(calc(), retval)
     def test_iterator(self):
         iterator = iterify(iter('foo'))
         self.assertIsInstance(iterator, Iterator)
         self.assertFalse(hasattr(iterator, '__len__'))
+    def test_memoryview_atomic(self):
+        view = memoryview(b'foo')
+        self.assertEqual(iterify(view), [view])
+
+
+class Test_each(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        def counted_int(x):
+            self.calls.append(x)
+            return int(x)
+        self.counted_int = counted_int
+        self.positive = check(gt, 0)
+    def test_validated_once_through_layers(self):
+        annotation = each(self.counted_int, self.positive)
+        @compose_annotations
+        def inner(values: annotation):
+            return values
+        @compose_annotations
+        def middle(values: each(self.counted_int, self.positive)):
+            return inner(values)
+        @compose_annotations
+        def outer(values: annotation):
+            return middle(values)
+        result = outer(['1', 2, 3.5])
+        self.assertEqual(result, (1, 2, 3))
+        self.assertEqual(self.calls, ['1', 2, 3.5])
+    def test_frozenset(self):
+        positive_ints = each(int, self.positive, container=frozenset)
+        values = positive_ints([1, '1', 2])
+        self.assertEqual(values, {1, 2})
+        self.assertIsInstance(values, frozenset)
+        self.assertIs(positive_ints(values), values)
+        self.assertIsNot(each(int, self.positive)(values), values)  # a different container
+        self.assertIs(type(values | {3}), frozenset)
+        with self.assertRaises(ValueError):
+            positive_ints([0])
+    def test_iterified(self):
+        self.assertEqual(each(str)('abc'), ('abc',))
+        self.assertEqual(each(str)(1), ('1',))
+    def test_plain_containers_processed(self):
+        positive_ints = each(self.counted_int, self.positive)
+        positive_ints((1, 2))
+        positive_ints(positive_ints((3,))[:])  # slices aren't marked
+        self.assertEqual(self.calls, [1, 2, 3, 3])
+    def test_pickle(self):
+        for container in (tuple, frozenset):
+            values = each(int, container=container)(['1'])
+            unpickled = pickle.loads(pickle.dumps(values))
+            self.assertEqual(unpickled, values)
+            self.assertIs(type(unpickled), container)
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            each(int, container=list)
+        with self.assertRaises(TypeError):
+            each(int, 'not callable')
+
+
+class Test_buffers(unittest.TestCase):
+    def test_as_memoryview(self):
+        data = bytearray(b'foo')
+        view = as_memoryview(data)
+        self.assertIs(as_memoryview(view), view)
+        view[0] = ord('g')
+        self.assertEqual(data, b'goo')
+    def test_as_readonly_buffer(self):
+        data = bytearray(b'foo')
+        view = as_readonly_buffer(data)
+        self.assertTrue(view.readonly)
+        self.assertIs(as_readonly_buffer(view), view)
+        data[0] = ord('g')
+        self.assertEqual(view.tobytes(), b'goo')
+    def test_raises_TypeError(self):
+        for fun in [as_memoryview, as_readonly_buffer]:
+            with self.assertRaises(TypeError):
+                fun('foo')
+    def test_iter_chunks(self):
+        data = bytearray(range(10))
+        chunks = list(iter_chunks(data, 4))
+        self.assertEqual([bytes(c) for c in chunks], [bytes(range(4)), bytes(range(4, 8)), bytes(range(8, 10))])
+        chunks[0][0] = 99
+        self.assertEqual(data[0], 99)
+    def test_iter_chunks_non_byte_format(self):
+        data = array.array('i', range(4))
+        chunks = list(iter_chunks(data, data.itemsize))
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(chunks[1].tobytes(), array.array('i', [1]).tobytes())
+    def test_iter_chunks_non_contiguous(self):
+        data = memoryview(array.array('i', range(8)))[::2]
+        with self.assertRaisesRegex(ValueError, 'not C-contiguous'):
+            iter_chunks(data, 4)
+        strided_bytes = memoryview(bytes(range(8)))[::2]  # already bytes: sliced element-wise
+        self.assertEqual([bytes(c) for c in iter_chunks(strided_bytes, 3)], [bytes([0, 2, 4]), bytes([6])])
+    def test_iter_chunks_bad_size(self):
+        with self.assertRaises(ValueError):
+            iter_chunks(b'foo', 0)
 
 if __name__ == '__main__':
     unittest.main()
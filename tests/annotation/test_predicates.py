@@ -0,0 +1,92 @@
+'''
+===========================================
+Unit tests for module annotation.predicates
+===========================================
+
+Unit tests for annotation.predicates
+'''
+from operator import gt
+import unittest
+from drytools.annotation.composition import compose_annotations
+from drytools.annotation.functions import check
+from drytools.annotation.predicates import all_of, any_of, fused, in_range, isinstance_of, predicate, satisfies
+
+class Test_in_range(unittest.TestCase):
+    def test_bounds(self):
+        for pred, value, expected in [(in_range(0, 10), 0, True),
+                                      (in_range(0, 10), 10, True),
+                                      (in_range(0, 10), 11, False),
+                                      (in_range(0, 10, lower_inclusive=False), 0, False),
+                                      (in_range(0, 10, upper_inclusive=False), 10, False),
+                                      (in_range(upper=10), -100, True),
+                                      (in_range(), 'anything', True),
+                                     ]:
+            self.assertEqual(pred.test(value), expected)
+    def test_retval_identical(self):
+        value = 5.0
+        self.assertIs(in_range(0, 10)(value), value)
+
+class Test_combination(unittest.TestCase):
+    def test_merged_ranges_name_failed_clause(self):
+        pred = in_range(0) & in_range(upper=200) & in_range(lower=10, raises=TypeError)
+        self.assertEqual(pred(50), 50)
+        for value, errtype, clause in [(-1, ValueError, 'in_range(0)'),
+                                       (201, ValueError, 'in_range(upper=200)'),
+                                       (5, TypeError, 'in_range(10)'),
+                                      ]:
+            with self.assertRaisesRegex(errtype, r'does not satisfy {}$'.format(clause.replace('(', r'\(').replace(')', r'\)'))):
+                pred(value)
+    def test_merged_single_test(self):
+        pred = in_range(0) & in_range(upper=200) & in_range(upper=100, upper_inclusive=False)
+        self.assertEqual([pred.test(v) for v in (-1, 0, 99, 100, 150)], [False, True, True, False, False])
+    def test_incomparable_bounds_not_merged(self):
+        pred = in_range(0) & in_range(upper='z')
+        with self.assertRaises(TypeError):
+            pred(5)
+    def test_order_preserved(self):
+        pred = isinstance_of(int) & in_range(0)
+        with self.assertRaises(TypeError):
+            pred('a')
+    def test_any_of(self):
+        pred = in_range(upper=0) | in_range(10) | satisfies(gt, 4) & in_range(upper=6)
+        self.assertEqual([pred.test(v) for v in (-1, 3, 5, 7, 11)], [True, False, True, False, True])
+        with self.assertRaisesRegex(ValueError, 'does not satisfy'):
+            pred(7)
+    def test_any_of_raises(self):
+        with self.assertRaises(TypeError):
+            any_of(isinstance_of(str), isinstance_of(bytes))(1)
+        with self.assertRaises(ValueError):
+            any_of(isinstance_of(str), in_range(0))(-1)
+        with self.assertRaises(KeyError):
+            any_of(isinstance_of(str), in_range(0), raises=KeyError)(-1)
+    def test_flattening(self):
+        pred = all_of(in_range(0), all_of(isinstance_of(int), in_range(upper=5)))
+        self.assertEqual(len(pred.clauses), 3)
+    def test_non_predicate_operands(self):
+        for combine in [lambda p, f: p & f, lambda p, f: p | f, lambda p, f: f & p, lambda p, f: f | p,
+                        lambda p, f: all_of(p, f), lambda p, f: any_of(p, f)]:
+            with self.assertRaises(TypeError):
+                combine(in_range(0), check(gt, 0))
+        self.assertTrue((in_range(0) & satisfies(gt, 0)).test(1))
+    def test_abstract_base(self):
+        with self.assertRaises(TypeError):
+            predicate()
+    def test_satisfies_kwargs(self):
+        pred = satisfies(lambda x, lo, hi=0: lo <= x <= hi, 1, hi=3)
+        self.assertEqual([pred.test(v) for v in (0, 2, 4)], [False, True, False])
+
+class Test_fused(unittest.TestCase):
+    def test_fused(self):
+        pipeline = fused([in_range(0), int, in_range(0), in_range(upper=3), str])
+        self.assertEqual(len(pipeline), 4)
+        self.assertIsInstance(pipeline[2], all_of)
+    def test_compose_annotations(self):
+        @compose_annotations
+        def f(age: (int, in_range(0), in_range(upper=200))):
+            return age
+        self.assertEqual(f('42'), 42)
+        with self.assertRaisesRegex(ValueError, 'upper=200'):
+            f(300)
+
+if __name__ == '__main__':
+    unittest.main()
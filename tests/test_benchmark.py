@@ -0,0 +1,27 @@
+'''
+===============================
+Unit tests for module benchmark
+===============================
+
+Unit tests for benchmark
+'''
+import unittest
+from drytools.benchmark import default_scenarios, report, run, throughput
+
+
+class Test_benchmark(unittest.TestCase):
+    def test_run(self):
+        results = run(thread_counts=[1, 2], n_calls=20)
+        self.assertEqual(set(results), set(default_scenarios()))
+        for by_threads in results.values():
+            self.assertEqual(sorted(by_threads), [1, 2])
+            self.assertTrue(all(v > 0 for v in by_threads.values()))
+        self.assertIn('GIL enabled', report(results))
+    def test_errors_raised(self):
+        def fail():
+            raise KeyError('x')
+        with self.assertRaises(KeyError):
+            throughput(fail, 2, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+'''
+==============================
+Unit tests for module columnar
+==============================
+
+Unit tests for columnar
+'''
+import unittest
+from drytools.columnar import columnar
+from drytools.decorator import args2attrs, ordered_by
+from drytools.mixins import repr_from_init
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@ordered_by('age', 'name')
+class person(repr_from_init):
+    @args2attrs
+    def __init__(self, name, age, *tags, height=1.7):
+        pass
+
+
+class Test_columnar(unittest.TestCase):
+    def setUp(self):
+        self.table = columnar(person, typecodes={'age': 'i', 'height': 'd'})
+        self.table.extend([('Ann', 31), ('Bob', 45, 'x', 'y'), {'name': 'Cy', 'age': 8, 'height': 1.2}])
+    def test_columns(self):
+        self.assertEqual(list(self.table.column('age')), [31, 45, 8])
+        self.assertEqual(self.table['name'], ['Ann', 'Bob', 'Cy'])
+        self.assertEqual(self.table['tags'], [(), ('x', 'y'), ()])
+        self.assertEqual(list(self.table['height']), [1.7, 1.7, 1.2])
+    def test_rows_behave_like_instances(self):
+        rows = list(self.table)
+        self.assertTrue(all(isinstance(r, person) for r in rows))
+        self.assertEqual(repr(rows[1]), "person('Bob', 45, 'x', 'y')")
+        self.assertEqual([r.name for r in sorted(rows)], ['Cy', 'Ann', 'Bob'])
+        self.assertFalse(hasattr(rows[0], '__dict__') and rows[0].__dict__)
+    def test_row_assignment(self):
+        self.table[0].age = 32
+        self.assertEqual(self.table[0].age, 32)
+        with self.assertRaises(TypeError):
+            self.table[0].age = 'not an int'
+    def test_append(self):
+        self.table.append('Di', age=50, height=1.9)
+        self.assertEqual(len(self.table), 4)
+        self.assertEqual(repr(self.table[-1]), "person('Di', 50, height=1.9)")
+    def test_extend_atomic(self):
+        for rows, errtype in [([('Di', 50), ('Ed',)], TypeError),
+                              ([('Di', 50), ('Ed', 'not an int')], TypeError)]:
+            with self.assertRaises(errtype):
+                self.table.extend(rows)
+            self.assertEqual(len(self.table), 3)
+    def test_slicing_and_filtering(self):
+        sliced = self.table[1:]
+        self.assertEqual(sliced['name'], ['Bob', 'Cy'])
+        filtered = self.table.filter(lambda name, age: name < 'C' and age > 40, 'name', 'age')
+        self.assertEqual(filtered['name'], ['Bob'])
+        self.assertEqual(self.table.take([2, 0])['name'], ['Cy', 'Ann'])
+        sliced[0].age = 1
+        self.assertEqual(self.table[1].age, 45)
+    def test_indexing(self):
+        with self.assertRaises(IndexError):
+            self.table[3]
+        self.assertEqual(self.table[-3].name, 'Ann')
+    def test_bad_args(self):
+        class with_var_kw:
+            def __init__(self, **kwargs):
+                pass
+        for args in [(with_var_kw,), (person, {'weight': 'd'})]:
+            with self.assertRaises(ValueError):
+                columnar(*args)
+    @unittest.skipIf(np is None, 'numpy not installed')
+    def test_as_numpy(self):
+        ages = self.table.as_numpy('age')
+        self.assertEqual(ages.tolist(), [31, 45, 8])
+        self.table[0].age = 1
+        self.assertEqual(ages[0], 1)
+        self.assertEqual(self.table.as_numpy('name').tolist(), ['Ann', 'Bob', 'Cy'])
+
+if __name__ == '__main__':
+    unittest.main()
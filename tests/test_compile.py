@@ -0,0 +1,115 @@
+'''
+=============================
+Unit tests for module compile
+=============================
+
+Unit tests for compile
+'''
+import ast
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from drytools.compile import compile_file, compile_source
+
+
+sample_source = '''
+from operator import gt
+from drytools.annotation.functions import check
+from drytools.annotation.predicates import in_range
+from drytools.annotation.composition import compose_annotations
+from drytools.decorator import args2attrs, ordered_by
+from drytools.mixins import repr_from_init
+
+@compose_annotations
+def scale(x: (float, check(gt, 0, raises=TypeError)), *factors: int, offset: in_range(0, 10)=0, **named: str) -> str:
+    if x > 100:
+        return 'big'
+    return x * sum(factors) + offset
+
+@compose_annotations(combine_var_positional=True)
+def total(*values: sorted):
+    return values
+
+@ordered_by('surname', 'name')
+class person(repr_from_init):
+    @compose_annotations
+    @args2attrs(expand_kw=False)
+    def __init__(self, name: str, surname: str, *aliases, age: int=0, verbose=False, **details):
+        pass
+
+def nested(limit):
+    @compose_annotations
+    def clip(x: (lambda x: min(x, limit))):
+        return x
+    return clip
+
+@compose_annotations(parallel=True)
+def not_expanded(*x: int):
+    return x
+'''
+
+
+def exec_source(source):
+    namespace = {}
+    exec(compile(source, '<test>', 'exec'), namespace)
+    return namespace
+
+
+class Test_compile_source(unittest.TestCase):
+    def setUp(self):
+        self.original = exec_source(sample_source)
+        self.compiled_source = compile_source(sample_source)
+        self.compiled = exec_source(self.compiled_source)
+    def same_result(self, name, *args, **kwargs):
+        results = []
+        for namespace in [self.original, self.compiled]:
+            try:
+                results.append(('result', namespace[name](*args, **kwargs)))
+            except Exception as e:
+                results.append(('raised', type(e)))
+        self.assertEqual(*results)
+        return results[0]
+    def test_functions(self):
+        for args, kwargs in [(('5', '2', 3), {}), ((500,), {}), ((-1,), {}), (('x',), {}),
+                             ((1, 2), {'offset': 11}), ((1, 2), {'offset': 3, 'a': 1}), ((), {})]:
+            with self.subTest(args=args, kwargs=kwargs):
+                self.same_result('scale', *args, **kwargs)
+        self.assertEqual(self.same_result('total', 3, 1, 2), ('result', (1, 2, 3)))
+    def test_classes(self):
+        people = {}
+        for key, namespace in [('original', self.original), ('compiled', self.compiled)]:
+            cls = namespace['person']
+            people[key] = [cls('Ann', 'Smith', 'A', age='31', verbose=True, town='Oslo'), cls(1, 'Jones')]
+        for original, compiled in zip(people['original'], people['compiled']):
+            self.assertEqual(repr(original), repr(compiled))
+            self.assertEqual(vars(original), vars(compiled))
+        self.assertEqual([repr(p) for p in sorted(people['original'])], [repr(p) for p in sorted(people['compiled'])])
+        self.assertTrue(people['compiled'][1] < people['compiled'][0])
+        self.assertEqual(len({people['compiled'][0], people['compiled'][0]}), 1)
+    def test_expanded(self):
+        decorators = {f.name: [ast.unparse(d) for d in f.decorator_list]
+                      for f in ast.walk(ast.parse(self.compiled_source)) if isinstance(f, (ast.FunctionDef, ast.ClassDef))}
+        for name in ['scale', 'total', 'person', '__init__']:
+            self.assertEqual(decorators[name], [], name)
+        self.assertEqual(decorators['clip'], ['compose_annotations'])
+        self.assertEqual(decorators['not_expanded'], ['compose_annotations(parallel=True)'])
+        self.assertEqual(self.compiled['nested'](3)(5), self.original['nested'](3)(5))
+        self.assertIn('def __repr__', self.compiled_source)
+
+class Test_compile_file(unittest.TestCase):
+    def test_command_line(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            source_path, output_path = os.path.join(tmpdir, 'sample.py'), os.path.join(tmpdir, 'out.py')
+            with open(source_path, 'w') as f:
+                f.write(sample_source)
+            subprocess.run([sys.executable, '-m', 'drytools.compile', source_path, '-o', output_path], check=True,
+                           cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            with open(output_path) as f:
+                output = f.read()
+            self.assertTrue(output.startswith('# Generated from'))
+            self.assertEqual(output, compile_file(source_path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,7 +8,9 @@ Unit tests for decorator
 '''
 import random
 import unittest
-from drytools.decorator import args2attrs
+from operator import ge
+from drytools.annotation.functions import check
+from drytools.decorator import args2attrs, bulk_constructor, lazy_attr, validated_attr, validated_attrs
 from drytools.annotation.composition import compose_annotations
 from drytools.annotation.functions import iterify
 from drytools.decorator import ordered_by
@@ -20,6 +22,19 @@ class Test_args2attrs(unittest.TestCase):
     def assertOrdinaryAttrs(self, inst, expected_attrs:(iterify, set)):
         actual_attrs = {a for a in dir(inst) if not a.startswith('_')}
         self.assertEqual(actual_attrs, expected_attrs)
+    def test_memoized(self):
+        self.assertIs(args2attrs(restrict_to='a'), args2attrs(restrict_to='a'))
+        self.assertIsNot(args2attrs(restrict_to='a'), args2attrs(restrict_to='b'))
+        decorator = args2attrs(restrict_to='a')
+        class first:
+            @decorator
+            def __init__(self, a, b):
+                pass
+        class second:
+            @decorator
+            def __init__(self, a, c=3):
+                pass
+        self.assertEqual((vars(first(1, 2)), vars(second(4))), ({'a': 1}, {'a': 4}))
     def test_restrict_to_1(self):
         class has_b:
             @args2attrs(restrict_to='b')
@@ -66,6 +81,261 @@ class Test_args2attrs(unittest.TestCase):
                 pass
         self.assertOrdinaryAttrs(cls(19, 20, w=21), ['a', 'b', 'u', 'kwargs'])
 
+class Test_args2attrs_lazy(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        def expensive(x):
+            self.calls.append(x)
+            return int(x)
+        class cls:
+            @compose_annotations
+            @args2attrs(lazy=('b', 'args'))
+            def __init__(self, a: expensive, b: expensive, *args: expensive):
+                self.raw_b = b
+        self.cls = cls
+    def test_coerced_on_first_access(self):
+        inst = self.cls('1', '2', '3', '4')
+        self.assertEqual(self.calls, ['1'])
+        self.assertEqual(inst.raw_b, '2')
+        self.assertEqual((inst.b, inst.b), (2, 2))
+        self.assertEqual(inst.args, (3, 4))
+        self.assertEqual(self.calls, ['1', '2', '3', '4'])
+        self.assertIsInstance(type(inst).__dict__['b'], lazy_attr)
+    def test_unused_not_coerced(self):
+        insts = [self.cls(i, 'not an int') for i in range(3)]
+        self.assertEqual([inst.a for inst in insts], [0, 1, 2])
+        self.assertEqual(self.calls, [0, 1, 2])
+    def test_errors_on_access(self):
+        inst = self.cls(1, 'not an int')
+        with self.assertRaises(ValueError):
+            inst.b
+    def test_assignment_replaces(self):
+        inst = self.cls(1, 2)
+        inst.b = 'assigned'
+        self.assertEqual(inst.b, 'assigned')
+        inst2 = self.cls(1, 5)
+        self.assertEqual(inst2.b, 5)
+    def test_installed_on_defining_class(self):
+        class child(self.cls):
+            pass
+        inst = child('1', '2')
+        self.assertIsInstance(vars(self.cls)['b'], lazy_attr)
+        self.assertNotIn('b', vars(child))
+        self.assertEqual(inst.b, 2)
+    def test_subclass_with_own_lazy_attr(self):
+        for parent_first in (True, False):
+            self.setUp()  # a parent class with no descriptor installed yet
+            class child(self.cls):
+                @args2attrs(lazy='b')
+                def __init__(self, a, b: str):
+                    super().__init__(a, b)
+            if parent_first:
+                self.assertEqual(self.cls(1, '2').b, 2)
+            with self.assertRaises(TypeError):  # two descriptors for one attribute
+                child(1, 2)
+    def test_clashes(self):
+        class has_constant:
+            b = 'constant'
+            @args2attrs(lazy='b')
+            def __init__(self, b: int):
+                pass
+        with self.assertRaisesRegex(TypeError, 'clashes'):
+            has_constant('1')
+        self.assertEqual(has_constant.b, 'constant')
+        class hides(self.cls):
+            b = 'hidden'
+        with self.assertRaisesRegex(TypeError, 'hidden'):
+            hides(1, 2)
+        class validated:
+            @args2attrs(lazy='b')
+            def __init__(self, b: int):
+                pass
+            b = validated_attr(str)
+        with self.assertRaisesRegex(TypeError, 'clashes'):
+            validated(1)
+    def test_bad_lazy_params(self):
+        for kwargs in [{'lazy': 'missing'}, {'lazy': 'a', 'exclude': 'a'}, {'lazy': 'c'}, {'lazy': 'kwargs'}]:
+            with self.assertRaises(ValueError):
+                @args2attrs(**kwargs)
+                def __init__(self, a: int, c, **kwargs: int):
+                    pass
+
+class Test_validated_attrs(unittest.TestCase):
+    def test_assignment_coerced(self):
+        calls = []
+        def non_negative_int(x):
+            calls.append(x)
+            x = int(x)
+            if x < 0:
+                raise ValueError(x)
+            return x
+        @validated_attrs
+        class cls:
+            @compose_annotations
+            @args2attrs(exclude='c')
+            def __init__(self, a: non_negative_int, b, c: str, *args: non_negative_int):
+                self.c = c
+        inst = cls('1', 'b', 3, '4', '5')
+        self.assertEqual((inst.a, inst.args, inst.c), (1, (4, 5), '3'))
+        calls.clear()
+        inst.a = '7'
+        self.assertEqual(inst.a, 7)
+        self.assertEqual(calls, ['7'])
+        with self.assertRaises(ValueError):
+            inst.a = -1
+        self.assertEqual(inst.a, 7)
+        inst.c = 5
+        self.assertEqual(inst.c, 5)
+        self.assertEqual(sorted(k for k, v in vars(cls).items() if isinstance(v, validated_attr)), ['a', 'args'])
+    def test_transformed_once(self):
+        seen = []
+        double = lambda v: v * 2  # not idempotent
+        @bulk_constructor
+        @validated_attrs
+        class compose_outside:
+            @compose_annotations
+            @args2attrs
+            def __init__(self, a: double, b=0):
+                seen.append(a)
+        @bulk_constructor
+        @validated_attrs
+        class compose_inside:
+            @args2attrs
+            @compose_annotations
+            def __init__(self, a: double, b=0):
+                seen.append(a)
+        for cls in (compose_outside, compose_inside):
+            with self.subTest(cls=cls.__name__):
+                seen.clear()
+                self.assertEqual(cls(1).a, 2)
+                self.assertEqual(seen, [2])
+                self.assertEqual(cls.from_rows([(1,)])[0].a, 2)
+                inst = cls(1)
+                inst.a = 3
+                self.assertEqual(inst.a, 6)
+    def test_without_args2attrs(self):
+        @validated_attrs
+        class cls:
+            def __init__(self, x: (int, check(ge, 0))):
+                self.x = x
+        with self.assertRaises(ValueError):
+            cls('-1')
+        inst = cls('2')
+        self.assertEqual(inst.x, 2)
+        del inst.x
+        with self.assertRaises(AttributeError):
+            inst.x
+    def test_composed_without_args2attrs(self):
+        with self.assertRaisesRegex(TypeError, r"\['x'\]"):
+            @validated_attrs
+            class cls:
+                @compose_annotations
+                def __init__(self, x: (lambda v: v * 2), y):
+                    self.x, self.y = x, y
+    def test_descriptor(self):
+        class cls:
+            x = validated_attr(int)
+        inst = cls()
+        inst.x = '3'
+        self.assertEqual(inst.x, 3)
+        with self.assertRaises(TypeError):
+            validated_attr('not callable')
+
+class Test_bulk_constructor(unittest.TestCase):
+    def assertSameAsInit(self, cls, rows, **kwargs):
+        built = cls.from_rows(rows, **kwargs)
+        expected = [cls(**row) if isinstance(row, dict) else cls(*row) for row in rows]
+        self.assertEqual([vars(inst) for inst in built], [vars(inst) for inst in expected])
+        self.assertTrue(all(type(inst) is cls for inst in built))
+    def test_signature_kinds(self):
+        @bulk_constructor
+        class cls:
+            @compose_annotations
+            @args2attrs(exclude='e')
+            def __init__(self, a: int, b=[], *args: str, c: (iterify, set)=(), e: float=0, **kwargs: float):
+                pass
+        rows = [(1,), ('2', 3, 4, 5), {'a': 1, 'c': 'x', 'z': '1.5', 'e': 4}, {'a': 1, 'b': 2}]
+        self.assertSameAsInit(cls, rows)
+        first, second = cls.from_rows([(1,), (2,)])
+        self.assertIsNot(first.c, second.c)  # unhashable transformed defaults aren't shared
+        for bad_row in [(), {'b': 1}]:
+            with self.assertRaises(TypeError):
+                cls.from_rows([bad_row])
+    def test_defaults_not_shared(self):
+        class bag:
+            def __init__(self, items=None):
+                self.items = list(items or ())
+        calls = []
+        def counted(x):
+            calls.append(x)
+            return x
+        @bulk_constructor
+        class cls:
+            @compose_annotations(fresh_defaults='n')
+            @args2attrs
+            def __init__(self, a, b: bag=None, n: counted=0, t: tuple=[1, 2]):
+                pass
+        first, second = cls.from_rows([(1,), (2,)])
+        self.assertIsNot(first.b, second.b)
+        self.assertIs(first.t, second.t)
+        self.assertEqual(calls.count(0), 2)
+    def test_generator_and_bad_row(self):
+        @bulk_constructor
+        class cls:
+            @args2attrs
+            def __init__(self, a, b=2):
+                pass
+        rows = cls.from_rows([(1,), (1, 2, 3)], as_generator=True)
+        self.assertEqual(vars(next(rows)), {'a': 1, 'b': 2})
+        with self.assertRaises(TypeError):
+            next(rows)
+    def test_transform_order(self):
+        @bulk_constructor
+        class inner_compose:
+            @args2attrs(expand_kw=False)
+            @compose_annotations
+            def __init__(self, a: int, **kwargs: int):
+                pass
+        self.assertSameAsInit(inner_compose, [{'a': '1', 'b': '2'}, {'a': '3', 'b': '4', 'c': 5}])
+        self.assertEqual(vars(inner_compose.from_rows([{'a': '1', 'b': '2'}])[0]), {'a': '1', 'kwargs': {'b': '2'}})
+    def test_call_init(self):
+        @bulk_constructor(call_init=True)
+        class cls:
+            @compose_annotations
+            @args2attrs(restrict_to='a')
+            def __init__(self, a: int, b: int=5, *, c: str=''):
+                self.total = a + b
+                self.c2 = c * 2
+        self.assertSameAsInit(cls, [('1',), ('1', '2'), {'a': 3, 'c': 1}])
+        @bulk_constructor
+        class no_init(cls):
+            pass
+        self.assertEqual(vars(no_init.from_rows([(1,)])[0]), {'a': 1})
+    def test_lazy_and_validated(self):
+        calls = []
+        def parse(raw):
+            calls.append(raw)
+            return float(raw)
+        @bulk_constructor
+        @validated_attrs
+        class cls:
+            @compose_annotations
+            @args2attrs(lazy='b')
+            def __init__(self, a: (int, check(ge, 0)), b: parse):
+                pass
+        inst, = cls.from_rows([('1', '2.5')])
+        self.assertEqual(calls, [])
+        self.assertEqual((inst.a, inst.b, calls), (1, 2.5, ['2.5']))
+        with self.assertRaises(ValueError):
+            cls.from_rows([(-1, 2)])
+    def test_requires_args2attrs(self):
+        @bulk_constructor
+        class cls:
+            def __init__(self, a):
+                self.a = a
+        with self.assertRaises(TypeError):
+            cls.from_rows([(1,)])
+
 class Test_ordered_by(unittest.TestCase):
     def setUp(self):
         random.seed(0)
@@ -86,6 +356,71 @@ class Test_ordered_by(unittest.TestCase):
         self.assertEqual(sorted_num1, sorted_instances_num1)
         self.assertEqual(num2_from_sorted_pairs, sorted_instances_num2)
         self.assertNotEqual(sorted_num2, sorted_instances_num2)
+    def test_sort_key(self):
+        @ordered_by('num1', 'num2')
+        class my_cls:
+            def __init__(self, num1, num2):
+                self.num1, self.num2 = num1, num2
+        instances = [my_cls(random.randrange(5), random.randrange(5)) for _ in range(50)]
+        self.assertEqual([x.sort_key() for x in sorted(instances, key=my_cls.sort_key)],
+                         [x.sort_key() for x in sorted(instances)])
+    def test_cache_key(self):
+        calls = []
+        @ordered_by('num1', 'num2', cache_key=True)
+        class my_cls:
+            def __init__(self, num1, num2):
+                self.num1, self.num2 = num1, num2
+            def __getattribute__(self, name):
+                if name in ('num1', 'num2'):
+                    calls.append(name)
+                return super().__getattribute__(name)
+        a, b = my_cls(1, 2), my_cls(1, 3)
+        for _ in range(3):
+            self.assertLess(a, b)
+        self.assertEqual(len(calls), 4)
+        a.num2 = 4
+        self.assertGreater(a, b)
+        self.assertEqual(a.sort_key(), (1, 4))
+        a.other = 'not an ordering attribute'
+        self.assertEqual(len(calls), 6)
+        del a.num1
+        with self.assertRaises(AttributeError):
+            a.sort_key()
+    def test_cache_key_requires_dict(self):
+        with self.assertRaisesRegex(TypeError, '__dict__'):
+            @ordered_by('a', cache_key=True)
+            class slotted:
+                __slots__ = ('a',)
+        @ordered_by('a', cache_key=True)
+        class with_dict_slot:
+            __slots__ = ('a', '__dict__')
+            def __init__(self, a):
+                self.a = a
+        self.assertEqual(sorted([with_dict_slot(2), with_dict_slot(1)])[0].a, 1)
+        self.assertEqual(list(vars(with_dict_slot(1))), [])
+        inst = with_dict_slot(3)
+        inst.sort_key()
+        self.assertEqual(vars(inst), {'_ordered_by_key:a': (3,)})
+    def test_cache_key_subclass_other_attrs(self):
+        @ordered_by('a', cache_key=True)
+        class parent:
+            def __init__(self, a, b):
+                self.a, self.b = a, b
+        @ordered_by('b', cache_key=True)
+        class child(parent):
+            pass
+        c, p1, p2 = child(1, 100), parent(0, 5), parent(2, 0)
+        self.assertEqual(child.sort_key(c), (100,))
+        self.assertEqual(parent.sort_key(c), (1,))
+        self.assertEqual(child.sort_key(c), (100,))
+        self.assertTrue(p1 < c)  # reflected: child's __gt__, comparing (100,) with (5,)
+        self.assertFalse(c < p2)
+        self.assertEqual(child.sort_key(p1), (5,))
+        self.assertTrue(p1 < p2)  # not affected by the child's key for p1
+        self.assertEqual((parent.sort_key(p1), parent.sort_key(p2)), ((0,), (2,)))
+        c.b = -1
+        c.a = 3
+        self.assertEqual((child.sort_key(c), parent.sort_key(c)), ((-1,), (3,)))
     def test_no_parentheses(self):
         with self.assertRaises(TypeError):
             @ordered_by
@@ -95,6 +430,20 @@ class Test_ordered_by(unittest.TestCase):
         for args in [(1,), ()]:
             with self.assertRaises(TypeError):
                 ordered_by(*args)
+    def test_memoized(self):
+        self.assertIs(ordered_by('num', cache_key=True), ordered_by('num', cache_key=True))
+        decorator = ordered_by('num', cache_key=True)
+        @decorator
+        class first:
+            def __init__(self, num):
+                self.num = num
+        @decorator
+        class second(first):
+            pass
+        a, b = second(2), first(1)
+        self.assertLess(b, a)
+        a.num = 0
+        self.assertLess(a, b)
 
 
 if __name__ == '__main__':
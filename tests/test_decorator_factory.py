@@ -9,7 +9,7 @@ Unit tests for decorator_factory
 
 from functools import wraps
 import unittest
-from drytools.decorator_factory import decorator_factory
+from drytools.decorator_factory import decorator_factory, memoized
 
 class Test_decorator_factory(unittest.TestCase):
     def setUp(self):
@@ -53,6 +53,54 @@ class Test_decorator_factory(unittest.TestCase):
             with self.assertRaises(TypeError):
                 test_func(*args, **kwargs)
 
+
+class Test_memoize(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        @decorator_factory(memoize=True, maxsize=2)
+        def tagged(tag='default', tags=None):
+            self.calls.append(tag)
+            def decorator(fun):
+                fun.tag = tag
+                return fun
+            return decorator
+        self.tagged = tagged
+    def test_same_decorator(self):
+        self.assertIs(self.tagged('a'), self.tagged('a'))
+        self.assertIs(self.tagged(tag='b'), self.tagged(tag='b'))
+        @self.tagged
+        def f():
+            pass
+        @self.tagged
+        def g():
+            pass
+        self.assertEqual((f.tag, g.tag), ('default', 'default'))
+        self.assertEqual(self.calls, ['a', 'b', 'default'])
+        self.assertEqual(self.tagged.cache_info().hits, 3)
+    def test_unhashable_arguments(self):
+        self.assertIsNot(self.tagged('a', tags=[]), self.tagged('a', tags=[]))
+        self.assertEqual(self.tagged.cache_info().currsize, 0)
+    def test_bounded(self):
+        for tag in ['a', 'b', 'c', 'a']:
+            self.tagged(tag)
+        self.assertEqual(self.calls, ['a', 'b', 'c', 'a'])
+        self.assertEqual(self.tagged.cache_info().currsize, 2)
+        self.tagged.cache_clear()
+        self.assertEqual(self.tagged.cache_info().currsize, 0)
+    def test_typed(self):
+        @memoized
+        def identity(x):
+            return x
+        self.assertIs(type(identity(1)), int)
+        self.assertIs(type(identity(1.0)), float)
+        self.assertIs(type(identity(True)), bool)
+    def test_not_memoized_by_default(self):
+        @decorator_factory
+        def make():
+            return lambda fun: fun
+        self.assertIsNot(make(), make())
+        self.assertFalse(hasattr(make, 'cache_info'))
+
 if __name__ == '__main__':
     unittest.main()
 
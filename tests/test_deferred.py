@@ -0,0 +1,107 @@
+'''
+==============================
+Unit tests for module deferred
+==============================
+
+Unit tests for deferred
+'''
+import gc
+import sys
+import types
+import unittest
+from drytools.annotation.composition import compose_annotations, param_annotations
+from drytools.decorator import args2attrs, bulk_constructor
+from drytools.deferred import DecorationError, resolved, set_defer, validate_all
+
+class Test_deferred(unittest.TestCase):
+    def setUp(self):
+        self.previous_setting = set_defer(False)
+        self.calls = []
+    def tearDown(self):
+        set_defer(self.previous_setting)
+    def counted(self, x):
+        self.calls.append(x)
+        return int(x)
+    def test_decorated_on_first_call(self):
+        @compose_annotations(defer=True)
+        def f(x: self.counted=0):
+            return x
+        self.assertEqual(self.calls, [])  # the default is transformed by decoration
+        self.assertEqual(f('2'), 2)
+        self.assertEqual(self.calls, [0, '2'])
+        self.assertEqual(f(), 0)
+        self.assertIsNot(resolved(f), f)
+        self.assertIs(resolved(f), resolved(f))
+    def test_global_setting(self):
+        set_defer(True)
+        @compose_annotations
+        def f(x: self.counted=0):
+            return x
+        self.assertEqual(self.calls, [])
+        self.assertEqual(set_defer(False), True)
+        @compose_annotations
+        def g(x: self.counted=0):
+            return x
+        self.assertEqual(self.calls, [0])
+        @compose_annotations(defer=True)
+        def h(x: self.counted=0):
+            return x
+        self.assertEqual(self.calls, [0])
+    def test_module_attribute_replaced(self):
+        module = types.ModuleType('deferred_test_module')
+        sys.modules[module.__name__] = module
+        try:
+            exec('from drytools import compose_annotations\n'
+                 '@compose_annotations(defer=True)\n'
+                 'def f(x: int):\n'
+                 '    return x\n', vars(module))
+            trampoline = module.f
+            self.assertEqual(trampoline('1'), 1)
+            self.assertIsNot(module.f, trampoline)
+            self.assertEqual(module.f('2'), 2)
+        finally:
+            del sys.modules[module.__name__]
+    def test_method(self):
+        @bulk_constructor
+        class my_cls:
+            @compose_annotations(defer=True)
+            @args2attrs(defer=True)
+            def __init__(self, a: int, b: str='x'):
+                pass
+        self.assertEqual(type(vars(my_cls)['__init__']).__name__, '_trampoline')
+        inst = my_cls('1')
+        self.assertEqual((inst.a, inst.b), (1, 'x'))
+        self.assertEqual(my_cls.__init__.copied_args, {'a', 'b'})
+        self.assertIs(vars(my_cls)['__init__'], my_cls.__init__)
+        self.assertEqual(vars(my_cls.from_rows([('2', 3)])[0]), {'a': 2, 'b': '3'})
+    def test_eager_decorator_over_deferred(self):
+        @compose_annotations
+        @args2attrs(defer=True)
+        def f(self, a: int):
+            pass
+        self.assertEqual(f.copied_args, {'a'})
+        self.assertEqual(param_annotations(f), {'a': int})
+    def test_errors(self):
+        @compose_annotations(defer=True, fresh_defaults='y')
+        def f(x: int):
+            return x
+        @args2attrs(defer=True)
+        def g(self):
+            pass
+        @compose_annotations(defer=True)
+        def h(x: int):
+            return x
+        with self.assertRaises(DecorationError) as context:
+            validate_all()
+        self.assertEqual([(fun.__name__, type(e)) for fun, e in context.exception.errors if fun in (f.__wrapped__, g.__wrapped__)],
+                         [('f', ValueError), ('g', ValueError)])
+        self.assertEqual(h('3'), 3)
+        with self.assertRaises(ValueError):
+            f(1)
+        del f, g, context
+        gc.collect()  # tracebacks refer to the trampolines
+        validate_all()  # failed decorations are dropped with their functions
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+'''
+==============================
+Unit tests for module dispatch
+==============================
+
+Unit tests for dispatch
+'''
+import unittest
+from drytools.annotation.composition import compose_annotations
+from drytools.dispatch import dispatch
+
+
+class animal: pass
+class dog(animal): pass
+class cat(animal): pass
+
+class Test_dispatch(unittest.TestCase):
+    def setUp(self):
+        @dispatch
+        def meet(a, b):
+            return 'default'
+        @meet.register
+        def _(a: animal, b: animal):
+            return 'animals'
+        @meet.register
+        def _(a: dog, b: animal):
+            return 'dog first'
+        self.meet = meet
+    def test_most_specific(self):
+        self.assertEqual(self.meet(cat(), dog()), 'animals')
+        self.assertEqual(self.meet(dog(), cat()), 'dog first')
+        self.assertEqual(self.meet(dog(), 1), 'default')
+        self.assertEqual(self.meet.__name__, 'meet')
+    def test_ambiguous(self):
+        @self.meet.register
+        def _(a: animal, b: dog):
+            return 'dog second'
+        self.assertEqual(self.meet(cat(), dog()), 'dog second')
+        with self.assertRaises(TypeError):
+            self.meet(dog(), dog())
+        @self.meet.register
+        def _(a: dog, b: dog):
+            return 'dogs'
+        self.assertEqual(self.meet(dog(), dog()), 'dogs')  # cache cleared by register
+    def test_cached(self):
+        self.meet(dog(), cat())
+        self.assertIs(self.meet._cache[(dog, cat)], self.meet.dispatch(dog, cat))
+        self.assertEqual(len(self.meet.registry), 2)
+    def test_arity_and_keywords(self):
+        @dispatch
+        def f(*args, **kwargs):
+            return 'default'
+        @f.register
+        def _(a: int, b: int=0, *, c=None):
+            return 'one or two ints', c
+        @f.register
+        def _(a: str, *args: int):
+            return 'str then ints'
+        @f.register
+        def _(a: str, *args):
+            return 'str then anything'
+        self.assertEqual(f(1, c=3), ('one or two ints', 3))
+        self.assertEqual(f(1, 2), ('one or two ints', None))
+        self.assertEqual(f(1, 2, 3), 'default')
+        self.assertEqual(f('a', 1, True), 'str then ints')
+        self.assertEqual(f('a'), 'str then anything')  # equally specific (no extra arguments), so the last registered
+        self.assertEqual(f('a', 'b', 1), 'str then anything')
+        self.assertEqual(f(), 'default')
+    def test_composed_and_method(self):
+        class shapes:
+            @dispatch
+            def describe(self, x):
+                return 'other'
+            @describe.register
+            @compose_annotations
+            def _(self, x: float) -> str:
+                return x * 2
+        self.assertEqual(shapes().describe(1.5), '3.0')
+        self.assertEqual(shapes().describe(1), 'other')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,254 @@
+'''
+==================================
+Memory footprint regression tests
+==================================
+
+Per-instance memory (measured with :mod:`tracemalloc`) of classes built
+with drytools and the transient (peak) memory used to construct each
+instance, both in excess of those of a plain class, and the transient
+allocations made by
+:func:`drytools.annotation.composition.compose_annotations` wrappers on
+each call.  Figures are relative to reference figures measured on the
+same interpreter (those of the plain class, and of binding the same
+arguments with :meth:`inspect.Signature.bind`), since absolute figures
+depend on the Python version.
+
+The tests fail if a figure exceeds its threshold in *max_excess* or
+*max_footprint*.  Run this module as a script to print the measured
+figures:
+
+.. code-block:: bash
+
+    $ python -m tests.test_footprint
+'''
+import inspect
+import tracemalloc
+import unittest
+
+from drytools.annotation.composition import compose_annotations
+from drytools.decorator import args2attrs, ordered_by
+from drytools.mixins import repr_from_init
+from tests import _snapshots
+from tests._snapshots import take_snapshot
+
+
+def _filtered(snapshot):
+    return snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                   tracemalloc.Filter(False, _snapshots.__file__)])
+
+def _totals(before, after):
+    diffs = _filtered(after).compare_to(_filtered(before), 'filename')
+    return sum(d.size_diff for d in diffs), sum(d.count_diff for d in diffs)
+
+def peak_memory(fun, *args, repeat=3, **kwargs):
+    '''
+    Returns:
+        int: peak memory (bytes) allocated during a call (the least of
+        *repeat* calls, after one unmeasured call)
+    '''
+    fun(*args, **kwargs)
+    peaks = []
+    for _ in range(repeat):
+        tracemalloc.start()  # also resets the peak
+        try:
+            fun(*args, **kwargs)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    return min(peaks)
+
+def instance_footprint(factory, n=1000):
+    '''
+    Memory retained by instances, and used while constructing them
+
+    Args:
+        factory (*callable*): Function (with no arguments) returning a new instance
+        n (int): Number of instances to measure
+
+    Returns:
+        tuple: (bytes per instance, memory blocks per instance, peak bytes
+        during one construction)
+    '''
+    factory()  # let any lazily created (per-class) state be created first
+    instances = [None] * n
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        for i in range(n):
+            instances[i] = factory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    size, count = _totals(before, after)
+    return size / n, count / n, peak_memory(factory)
+
+def call_overhead(decorated, plain, *args, **kwargs):
+    '''
+    Transient memory used by a wrapper on each call
+
+    Args:
+        decorated (*callable*): Wrapped version of *plain*
+        plain (*callable*): Function which calls :func:`tests._snapshots.take_snapshot`
+        args, kwargs: Arguments for the call
+
+    Returns:
+        tuple: (bytes, memory blocks) alive when the body of *plain*
+        starts, in excess of those alive when *plain* is called directly,
+        and the excess peak memory (bytes) used during the call
+    '''
+    def measure(fun):
+        fun(*args, **kwargs)
+        _snapshots.capturing = True
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            fun(*args, **kwargs)
+            size, count = _totals(before, _snapshots.snapshots.pop())
+        finally:
+            tracemalloc.stop()
+            _snapshots.capturing = False
+        return size, count, peak_memory(fun, *args, **kwargs)
+    decorated_figures = measure(decorated)
+    plain_figures = measure(plain)
+    return tuple(d - p for d, p in zip(decorated_figures, plain_figures))
+
+
+class plain_cls:
+    def __init__(self, a, b, c):
+        self.a, self.b, self.c = a, b, c
+
+class slots_cls:
+    __slots__ = ('a', 'b', 'c')
+    def __init__(self, a, b, c):
+        self.a, self.b, self.c = a, b, c
+
+class args2attrs_cls:
+    @args2attrs
+    def __init__(self, a, b, c):
+        pass
+
+class expand_kw_cls:
+    @args2attrs(expand_kw=True)
+    def __init__(self, a, **kwargs):
+        pass
+
+@ordered_by('a', 'b')
+class ordered_by_cls(plain_cls):
+    pass
+
+class repr_from_init_cls(repr_from_init):
+    @args2attrs
+    def __init__(self, a, b, c):
+        pass
+
+def plain_fun(a, b, *args, c=0, **kwargs):
+    take_snapshot()
+
+@compose_annotations
+def composed_fun(a: int, b, *args: int, c: int=0, **kwargs: int):
+    take_snapshot()
+
+def plain_fun_with_defaults(a, b=0, c=0):
+    take_snapshot()
+
+@compose_annotations
+def composed_fun_with_defaults(a: int, b: int=0, c: int=0):
+    take_snapshot()
+
+instances = {  # name -> (class, constructor arguments)
+    'plain': (plain_cls, (1, 2, 3), {}),
+    '__slots__': (slots_cls, (1, 2, 3), {}),
+    'args2attrs': (args2attrs_cls, (1, 2, 3), {}),
+    'args2attrs(expand_kw=True)': (expand_kw_cls, (1,), {'b': 2, 'c': 3}),
+    'ordered_by': (ordered_by_cls, (1, 2, 3), {}),
+    'repr_from_init': (repr_from_init_cls, (1, 2, 3), {}),
+}
+
+calls = {
+    'compose_annotations (all arguments)': (composed_fun, plain_fun, (1, 2, 3), {'c': 4, 'd': 5}),
+    'compose_annotations (omitted defaults)': (composed_fun_with_defaults, plain_fun_with_defaults, (1,), {}),
+    'compose_annotations (omitted variable arguments)': (composed_fun, plain_fun, (1, 2), {}),
+}
+
+def binding(fun):
+    '''Wrapper which only binds its arguments to the signature of *fun* before calling it'''
+    sig = inspect.signature(fun)
+    def wrapper(*args, **kwargs):
+        bound = sig.bind(*args, **kwargs)
+        return fun(*args, **kwargs)
+    return wrapper
+
+def instance_figures(name):
+    '''
+    Returns:
+        tuple: figures of :func:`instance_footprint` for *instances[name]*
+        in excess of those of 'plain', divided by the per-instance bytes
+        and blocks of 'plain' and by the peak memory of binding the
+        arguments to the signature of the undecorated ``__init__``
+    '''
+    cls, args, kwargs = instances[name]
+    base_cls, base_args, base_kwargs = instances['plain']
+    plain = instance_footprint(lambda: base_cls(*base_args, **base_kwargs))
+    measured = instance_footprint(lambda: cls(*args, **kwargs))
+    bind_peak = peak_memory(inspect.signature(inspect.unwrap(cls.__init__)).bind, object(), *args, **kwargs)
+    return tuple((m - p) / base for m, p, base in zip(measured, plain, plain[:2] + (bind_peak,)))
+
+def call_figures(name):
+    '''
+    Returns:
+        tuple: figures of :func:`call_overhead` for *calls[name]*, divided
+        by those of a wrapper which only binds the arguments (see :func:`binding`)
+    '''
+    decorated, plain, args, kwargs = calls[name]
+    measured = call_overhead(decorated, plain, *args, **kwargs)
+    reference = call_overhead(binding(plain), plain, *args, **kwargs)
+    return tuple(m / r for m, r in zip(measured, reference))
+
+# Thresholds, as ratios (see instance_figures and call_figures) so they
+# hold on every supported Python version (None for figures that the
+# version decides): (excess bytes, excess blocks, excess construction
+# peak) per instance and (transient bytes, blocks, peak) per call.  Excess
+# blocks of 0.25 (of the plain class's 1 to 3 blocks) are fewer than one
+# object kept per instance.
+max_excess = {
+    '__slots__': (-0.25, None, 0),  # no __dict__ (which isn't a separate block on 3.13+)
+    'args2attrs': (0.2, 0.25, 3.5),
+    'args2attrs(expand_kw=True)': (0.2, 0.25, 3.5),
+    'ordered_by': (0.1, 0.05, 0.1),
+    'repr_from_init': (0.2, 0.25, 3.5),
+}
+max_footprint = {
+    'compose_annotations (all arguments)': (1.5, 2, 1.25),
+    'compose_annotations (omitted defaults)': (1, 1.5, 1.25),
+    'compose_annotations (omitted variable arguments)': (5, 4, 1.25),
+}
+
+def measure_all():
+    '''
+    Returns:
+        dict: measured figures (see :func:`instance_figures` and
+        :func:`call_figures`), for the keys of *max_excess* and *max_footprint*
+    '''
+    result = {name: instance_figures(name) for name in max_excess}
+    result.update((name, call_figures(name)) for name in max_footprint)
+    return result
+
+
+class Test_footprint(unittest.TestCase):
+    def assertWithinLimits(self, figures, limits):
+        for measured, limit in zip(figures, limits):
+            if limit is not None:
+                self.assertLessEqual(measured, limit)
+    def test_instances(self):
+        for name, limits in max_excess.items():
+            with self.subTest(name):
+                self.assertWithinLimits(instance_figures(name), limits)
+    def test_call_overhead(self):
+        for name, limits in max_footprint.items():
+            with self.subTest(name):
+                self.assertWithinLimits(call_figures(name), limits)
+
+
+if __name__ == '__main__':
+    for name, figures in measure_all().items():
+        print('{:50} {}'.format(name, ', '.join('{:8.2f}'.format(f) for f in figures)))
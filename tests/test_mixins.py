@@ -6,9 +6,12 @@ Unit tests for module mixins
 
 Unit tests for mixins
 '''
+import copy
+import io
+import pickle
 import unittest
 
-from drytools.mixins import repr_from_init
+from drytools.mixins import bounded_repr, init_plan, pickle_from_init, repr_from_init
 from drytools.decorator import args2attrs
 
 class Test_repr_from_init(unittest.TestCase):
@@ -54,7 +57,101 @@ class Test_repr_from_init(unittest.TestCase):
                 pass
         with self.assertRaises(AttributeError):
             repr(tst(1))
+    def test_bounded(self):
+        class tst(repr_from_init):
+            repr_limits = bounded_repr(maxlist=2, maxstring=10, maxtuple=3, maxdict=1)
+            @args2attrs(expand_kw=False)
+            def __init__(self, a, *args, b='', **kwargs):
+                pass
+        self.assertEqual(repr(tst(list(range(10**5)), 1, 2, 3, 4, b='x'*100, y=1, z=2)),
+                         "tst([0, 1, ...], 1, 2, 3, ..., b='xx...xxx', y=1, ...)")
+    def test_bounded_unknown_limit(self):
+        with self.assertRaises(TypeError):
+            bounded_repr(max_everything=1)
+    def test_write_repr(self):
+        class tst(repr_from_init):
+            @args2attrs
+            def __init__(self, a, *args, b='bar'):
+                pass
+        inst = tst(1, 2, 3, b='foo')
+        stream = io.StringIO()
+        inst.write_repr(stream)
+        self.assertEqual(stream.getvalue(), repr(inst))
+    def test_write_repr_containers(self):
+        class tst(repr_from_init):
+            @args2attrs(expand_kw=False)
+            def __init__(self, a, *args, b=None, **kwargs):
+                pass
+        recursive = [1]
+        recursive.append(recursive)
+        recursive_dict = {'a': 1}
+        recursive_dict['self'] = recursive_dict
+        in_tuple = []
+        recursive_tuple = (in_tuple,)
+        in_tuple.append(recursive_tuple)
+        values = [[], (), {}, set(), frozenset(), (1,), (1, 2), [1, (2, [3, {4: 'x'}])], {'k': {5, 6}},
+                  frozenset({7}), recursive, recursive_dict, recursive_tuple, 'text', None, [[], [()]]]
+        inst = tst(values, *values, b=values, k=values)
+        stream = io.StringIO()
+        inst.write_repr(stream)
+        self.assertEqual(stream.getvalue(), repr(inst))
+    def test_write_repr_pieces_small(self):
+        class tst(repr_from_init):
+            @args2attrs
+            def __init__(self, a):
+                pass
+        class recorder:
+            def __init__(self):
+                self.longest = 0
+            def write(self, piece):
+                self.longest = max(self.longest, len(piece))
+        stream = recorder()
+        tst(list(range(10**5))).write_repr(stream)
+        self.assertLessEqual(stream.longest, 5)
+
+
+class pickled(pickle_from_init, repr_from_init):
+    @args2attrs(expand_kw=False)
+    def __init__(self, a, b=2, *args, c='foo', **kwargs):
+        self.derived = [a, b]
+
+class single(pickle_from_init):
+    @args2attrs
+    def __init__(self, a):
+        pass
 
+class Test_pickle_from_init(unittest.TestCase):
+    def setUp(self):
+        self.instances = [pickled(1), pickled([1], 3, 4, 5, c='bar', d=6), single('x')]
+    def assertSame(self, original, result):
+        self.assertIsNot(original, result)
+        self.assertIs(type(original), type(result))
+        self.assertEqual(vars(original), vars(result))
+    def test_to_args(self):
+        self.assertEqual(self.instances[1].to_args(), ([1], 3, (4, 5), 'bar', {'d': 6}))
+        self.assertEqual(self.instances[2].to_args(), ('x',))
+        for inst in self.instances:
+            self.assertSame(inst, type(inst).from_args(inst.to_args()))
+    def test_pickle(self):
+        for inst in self.instances:
+            for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+                with self.subTest(inst=inst, protocol=protocol):
+                    self.assertSame(inst, pickle.loads(pickle.dumps(inst, protocol)))
+    def test_copy(self):
+        for inst in self.instances:
+            shallow, deep = copy.copy(inst), copy.deepcopy(inst)
+            self.assertSame(inst, shallow)
+            self.assertSame(inst, deep)
+        self.assertIs(copy.copy(self.instances[1]).a, self.instances[1].a)
+        self.assertIsNot(copy.deepcopy(self.instances[1]).a, self.instances[1].a)
+    def test_batch(self):
+        columns = pickled.encode_batch(self.instances[:2])
+        self.assertEqual(len(columns), len(init_plan(pickled).params))
+        for original, decoded in zip(self.instances[:2], pickled.decode_batch(pickle.loads(pickle.dumps(columns)))):
+            self.assertSame(original, decoded)
+        self.assertEqual(pickled.decode_batch(pickled.encode_batch([])), [])
+    def test_plan_cached(self):
+        self.assertIs(init_plan(pickled), init_plan(pickled))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,160 @@
+'''
+=============================
+Unit tests for module sorting
+=============================
+
+Unit tests for sorting
+'''
+import bisect
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+from drytools.columnar import columnar
+from drytools.decorator import args2attrs, ordered_by
+from drytools.mixins import pickle_from_init
+from drytools.sorting import external_sort
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+else:
+    from drytools.sorting import argsort, searchsorted, sort
+
+
+@ordered_by('surname', 'age')
+class person:
+    @args2attrs
+    def __init__(self, surname, age, name=''):
+        pass
+    def __repr__(self):
+        return 'person({!r}, {!r}, {!r})'.format(self.surname, self.age, self.name)
+
+@ordered_by('key')
+class keyed:
+    @args2attrs
+    def __init__(self, key):
+        pass
+
+@ordered_by('surname', 'age')
+class compact_person(pickle_from_init):
+    encoded_batches = 0
+    @args2attrs
+    def __init__(self, surname, age, name=''):
+        pass
+    @classmethod
+    def encode_batch(cls, instances):
+        cls.encoded_batches += 1
+        return super().encode_batch(instances)
+
+
+@unittest.skipIf(np is None, 'numpy not installed')
+class Test_sorting(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.people = [person(random.choice(['Smith', 'Jones', 'Brown']), random.randint(0, 5), str(i)) for i in range(200)]
+    def test_same_as_sorted(self):
+        expected = sorted(self.people)
+        self.assertEqual(sort(self.people), expected)  # stable, like sorted
+        self.assertEqual([self.people[i] for i in argsort(self.people)], expected)
+        self.assertEqual(argsort([]).tolist(), [])
+    def test_python_ranked_columns(self):
+        for keys in [[(2, 'b'), (1, 'z'), (2, 'a')], [2**70, -1, 5], ['b', 'a', 'b'], [1, 2.5, True],
+                     [2**53 + 1, float(2**53)], ['a\x00', 'a', 'a\x00b'], [b'a\x00', b'a']]:
+            with self.subTest(keys=keys):
+                items = [keyed(k) for k in keys]
+                self.assertEqual(sort(items), sorted(items))
+        with self.assertRaises(TypeError):
+            argsort([keyed(1), keyed('a')])
+    def test_explicit_attrs(self):
+        self.assertEqual(sort(self.people, attrs=('name',)), sorted(self.people, key=lambda p: p.name))
+        with self.assertRaises(TypeError):
+            argsort([object()])
+    def test_columnar(self):
+        table = columnar(person, typecodes={'age': 'i'})
+        table.extend((p.surname, p.age, p.name) for p in self.people)
+        self.assertEqual([(p.surname, p.age, p.name) for p in sort(table)],
+                         [(p.surname, p.age, p.name) for p in sorted(self.people)])
+        ordered = sort(table)
+        keys = [('Jones', 3), ('Jones', 2.5), ('Adams', 0), ('Zed', 0)]
+        self.assertEqual(searchsorted(ordered, keys).tolist(), searchsorted(sort(self.people), keys).tolist())
+    def test_searchsorted_exact_keys(self):
+        table = columnar(keyed, typecodes={'key': 'q'})
+        table.extend([(2**53,), (2**53 + 1,), (2**53 + 2,)])
+        sort_keys = [k.sort_key() for k in table]
+        for keys in [[(float(2**53),), (2.5,)], [(2**53 + 1,), (2**70,), (float(2**53 + 2),)]]:
+            for side, bisect_fun in [('left', bisect.bisect_left), ('right', bisect.bisect_right)]:
+                with self.subTest(keys=keys, side=side):
+                    self.assertEqual(searchsorted(table, keys, side=side).tolist(), [bisect_fun(sort_keys, k) for k in keys])
+    def test_searchsorted(self):
+        ordered = sort(self.people)
+        sort_keys = [p.sort_key() for p in ordered]
+        keys = [('Jones', 3), ('Jones', 9), ('Adams', 0), ('Smith', -1), ('Zed', 0), ('Brown', 0)]
+        for side, bisect_fun in [('left', bisect.bisect_left), ('right', bisect.bisect_right)]:
+            self.assertEqual(searchsorted(ordered, keys, side=side).tolist(), [bisect_fun(sort_keys, k) for k in keys])
+        self.assertEqual(searchsorted(ordered, []).tolist(), [])
+        with self.assertRaises(ValueError):
+            searchsorted(ordered, [('Jones',)])
+
+class Test_external_sort(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.rows = [(random.choice(['Smith', 'Jones', 'Brown']), random.randint(0, 5), str(i)) for i in range(500)]
+    def summary(self, people):
+        return [(p.surname, p.age, p.name) for p in people]
+    def test_same_as_sorted(self):
+        for cls in (person, compact_person):
+            people = [cls(*row) for row in self.rows]
+            for run_size, block_size in [(1, 1), (64, 10), (499, 1000), (500, 1000), (10**6, 1)]:
+                with self.subTest(cls=cls, run_size=run_size, block_size=block_size):
+                    result = external_sort(iter(people), run_size=run_size, tmpdir=self.tmpdir.name, block_size=block_size)
+                    self.assertEqual(self.summary(result), self.summary(sorted(people)))  # stable
+        self.assertEqual(list(external_sort([])), [])
+    def test_compact_runs(self):
+        compact_person.encoded_batches = 0
+        people = (compact_person(*row) for row in self.rows)
+        self.assertEqual(len(list(external_sort(people, run_size=100, block_size=50))), 500)
+        self.assertEqual(compact_person.encoded_batches, 10)
+    def test_explicit_attrs(self):
+        people = [person(*row) for row in self.rows]
+        result = external_sort(people, run_size=50, attrs=('name',))
+        self.assertEqual(self.summary(result), self.summary(sorted(people, key=lambda p: p.name)))
+        with self.assertRaises(TypeError):
+            external_sort([object()])
+        with self.assertRaises(ValueError):
+            external_sort(people, run_size=0)
+    def test_bounded_fan_in(self):
+        people = [person(*row) for row in self.rows]
+        open_files = []
+        max_open = []
+        def tracked_open(*args, **kwargs):
+            run_file = open(*args, **kwargs)
+            open_files.append(run_file)
+            max_open.append(sum(not f.closed for f in open_files))
+            return run_file
+        for fan_in in (2, 3, 64):
+            with self.subTest(fan_in=fan_in):
+                open_files.clear()
+                max_open.clear()
+                with mock.patch('drytools.sorting.open', tracked_open, create=True):
+                    result = external_sort(people, run_size=10, tmpdir=self.tmpdir.name, fan_in=fan_in)
+                    self.assertEqual(self.summary(result), self.summary(sorted(people)))
+                self.assertLessEqual(max(max_open), fan_in + 1)
+                self.assertEqual(os.listdir(self.tmpdir.name), [])
+        with self.assertRaises(ValueError):
+            external_sort(people, fan_in=1)
+    def test_cleanup(self):
+        people = [person(*row) for row in self.rows]
+        result = external_sort(people, run_size=100, tmpdir=self.tmpdir.name)
+        next(result)
+        result.close()
+        list(external_sort(people, run_size=100, tmpdir=self.tmpdir.name))
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()